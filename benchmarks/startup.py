@@ -0,0 +1,74 @@
+"""Startup-time benchmark for the menu window.
+
+Measures, in fresh interpreters, the time from start to the first drawn
+menu frame, and checks that no heavy module (openmc, numpy) is imported
+before a builder is opened. Exits non-zero on a regression, so it can run
+in CI:
+
+    python benchmarks/startup.py [--runs 5] [--max-seconds 1.0]
+
+Without a display the menu cannot be drawn; only the import time of
+main.py is measured then.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t_import = time.perf_counter() - t0
+t_menu = None
+try:
+    import tkinter as tk
+    root = tk.Tk()
+    main.build_menu(root)
+    root.update()
+    t_menu = time.perf_counter() - t0
+    root.destroy()
+except tk.TclError:
+    pass
+heavy = [m for m in main.HEAVY_MODULES if m in sys.modules]
+print(json.dumps({"import": t_import, "menu": t_menu, "heavy": heavy}))
+"""
+
+
+def measure(runs):
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=REPO, capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=1.0, help="fail if the median time exceeds this")
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+    key = "menu" if results[0]["menu"] is not None else "import"
+    median = statistics.median(r[key] for r in results)
+    heavy = sorted({m for r in results for m in r["heavy"]})
+
+    print(f"startup ({'first menu frame' if key == 'menu' else 'import only, no display'}): "
+          f"median {median * 1000:.1f} ms over {args.runs} runs")
+    failed = False
+    if heavy:
+        print(f"FAIL: imported at startup: {', '.join(heavy)}")
+        failed = True
+    if median > args.max_seconds:
+        print(f"FAIL: median startup {median:.3f} s exceeds {args.max_seconds:.3f} s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,70 +1,62 @@
+import importlib
+import threading
 import tkinter as tk
-from modules.material_builder import MaterialBuilder
-from modules.geometry_builder import GeometryBuilder
-from modules.universe_builder import UniverseBuilder
-from modules.final_geometry_builder import open_final_geometry_window
-from modules.lattice_builder import LatticeBuilder   # <-- import lattice builder
-from modules.settings_builder import SettingsWindow
-from modules.tallies_builder import TallyBuilderApp   # <-- import tallies builder
-from modules.run_openmc_builder import RunOpenMCApp   # <-- import run OpenMC GUI
 
+# Builder windows are imported on first use so the menu appears immediately;
+# each of them pulls in openmc/numpy, which take seconds to import.
+HEAVY_MODULES = ("openmc", "numpy")
 
-def main():
-    root = tk.Tk()
+
+def lazy(module, attr):
+    """Import modules.<module> when first needed and return one of its attributes."""
+    return getattr(importlib.import_module(f"modules.{module}"), attr)
+
+
+def prewarm_imports():
+    """Import openmc in a background thread so the first builder opens quickly."""
+    def work():
+        for name in HEAVY_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                print(f"Could not import {name}: {e}")
+
+    threading.Thread(target=work, daemon=True).start()
+
+
+def build_menu(root):
     root.title("OpenMC GUI Builder")
-    root.geometry("420x410")   # slightly increased height for extra button
+    root.geometry("420x450")   # slightly increased height for extra button
 
     def open_material_builder():
-        MaterialBuilder(root)
+        lazy("material_builder", "MaterialBuilder")(root)
 
     def open_geometry_builder():
-        GeometryBuilder(root)
+        lazy("geometry_builder", "GeometryBuilder")(root)
 
     def open_final_geometry_builder():
-        open_final_geometry_window()
+        lazy("final_geometry_builder", "open_final_geometry_window")()
 
     def open_universe_builder():
-        import os, json
-
-        # Load existing cells
-        cells_path = os.path.join("output", "cells.json")
-        if os.path.exists(cells_path):
-            with open(cells_path, "r") as f:
-                cells_data = json.load(f)
-            cells = [c["name"] for c in cells_data]
-        else:
-            cells = []
-
-        # Load existing materials
-        materials_path = os.path.join("output", "materials.json")
-        if os.path.exists(materials_path):
-            with open(materials_path, "r") as f:
-                materials_json = json.load(f)
-            materials = {name: None for name in materials_json.keys()}
-        else:
-            materials = {}
-
-        # Load existing universes
-        universes_path = os.path.join("output", "universes.json")
-        if os.path.exists(universes_path):
-            with open(universes_path, "r") as f:
-                universes = json.load(f)
-        else:
-            universes = {}
-
-        UniverseBuilder(root, cells, materials, universes)
+        project = lazy("project", "get_project")()
+        cells = [c["name"] for c in project.cells]
+        materials = {name: None for name in project.materials.keys()}
+        lazy("universe_builder", "UniverseBuilder")(root, cells, materials, project.universes)
 
     def open_lattice_builder():
-        LatticeBuilder(root)
+        lazy("lattice_builder", "LatticeBuilder")(root)
 
     def open_settings_builder():
-        SettingsWindow(root)
+        lazy("settings_builder", "SettingsWindow")(root)
 
     def open_tallies_builder():
-        TallyBuilderApp(root)   # <-- open tallies builder window
+        lazy("tallies_builder", "TallyBuilderApp")(root)   # <-- open tallies builder window
 
     def open_run_openmc():
-        RunOpenMCApp(root)      # <-- Run OpenMC button callback
+        lazy("run_openmc_builder", "RunOpenMCApp")(root)      # <-- Run OpenMC button callback
+
+    def open_results_browser():
+        lazy("results_browser", "ResultsBrowser")(root)
 
       
     tk.Label(root, text="OpenMC GUI Builder", font=("Arial", 20)).pack(pady=6)
@@ -94,7 +86,14 @@ def main():
     tk.Button(root, text="Simulation Settings", command=open_settings_builder, width=24).pack(pady=6)
     tk.Button(root, text="Tallies", command=open_tallies_builder, width=24).pack(pady=6)  
     tk.Button(root, text="Run OpenMC", command=open_run_openmc, width=24).pack(pady=6)  # <-- new button
+    tk.Button(root, text="Browse Results", command=open_results_browser, width=24).pack(pady=6)
 
+
+def main():
+    root = tk.Tk()
+    build_menu(root)
+    # Start warming openmc once the first frame has been drawn
+    root.after(200, prewarm_imports)
     root.mainloop()
 
 
@@ -1,8 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import openmc
 import os
-import json
+from .project import get_project
+from .region import compile_region, check_region
 
 class CellBuilder:
     def __init__(self, master, surfaces, materials, universes):
@@ -10,6 +10,7 @@ class CellBuilder:
         self.master.title("Cell Builder")
         self.master.geometry("600x720")
 
+        self.project = get_project()
         self.surfaces = surfaces
         self.universes = universes
         self.materials = self.load_materials()   # ✅ load materials.json here
@@ -17,7 +18,6 @@ class CellBuilder:
 
         # Store cells in memory
         self.cells = []
-        self.json_file = os.path.join("output", "cells.json")
         self.py_file = os.path.join("output", "geometry.py")
 
         self.load_cells_from_json()
@@ -31,9 +31,12 @@ class CellBuilder:
         tk.Label(self.master, text="Region Expression").pack()
         self.region_entry = tk.Entry(self.master, width=50)
         self.region_entry.pack(pady=3)
+        self.region_entry.bind("<KeyRelease>", self.check_region_entry)
+        self.region_status = tk.Label(self.master, text="", font=("Arial", 9))
+        self.region_status.pack()
         tk.Label(
             self.master,
-            text="Example: +s1 & -s2 | ~s3\n(use surface names you defined in Geometry Builder)",
+            text="Example: +s1 & -s2 | ~(+s3)\n(use surface names you defined in Geometry Builder)",
             font=("Arial", 9),
             fg="gray"
         ).pack(pady=2)
@@ -89,34 +92,26 @@ class CellBuilder:
             )
 
     def load_cells_from_json(self):
-        if os.path.exists(self.json_file):
-            try:
-                with open(self.json_file, "r") as f:
-                    self.cells = json.load(f)
-            except Exception as e:
-                print(f"Error loading cells.json: {e}")
-                self.cells = []
+        self.cells = self.project.cells
 
     def load_materials(self):
-        """Load materials.json from output/"""
-        materials_file = os.path.join("output", "materials.json")
-        if os.path.exists(materials_file):
-            try:
-                with open(materials_file, "r") as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading materials.json: {e}")
-        return {}
+        """Materials from the shared project (materials.json)"""
+        return self.project.materials
 
     def load_lattices(self):
-        lattices_file = os.path.join("output", "lattices.json")
-        if os.path.exists(lattices_file):
-            try:
-                with open(lattices_file, "r") as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading lattices.json: {e}")
-        return {}
+        return self.project.lattices
+
+    def check_region_entry(self, event=None):
+        """Live feedback on the region expression while typing."""
+        region = self.region_entry.get().strip()
+        if not region:
+            self.region_status.config(text="", fg="black")
+            return
+        error = check_region(region, self.surfaces)
+        if error:
+            self.region_status.config(text=error, fg="red")
+        else:
+            self.region_status.config(text="Region OK", fg="green")
 
     def add_cell(self):
         name = self.cell_name_entry.get().strip()
@@ -131,6 +126,10 @@ class CellBuilder:
         if not mat and not uni and not lat:
             messagebox.showerror("Error", "Select a material, universe, or lattice to fill the cell.")
             return
+        error = check_region(region, self.surfaces)
+        if error:
+            messagebox.showerror("Error", f"Invalid region expression:\n{error}")
+            return
 
         new_cell = {"name": name, "region": region}
         if lat:
@@ -141,6 +140,7 @@ class CellBuilder:
             new_cell["material"] = mat
 
         self.cells.append(new_cell)
+        self.project.mark_dirty("cells")
         self.cell_listbox.insert(
             tk.END,
             f"{name}: {region}, material={new_cell.get('material','')}, "
@@ -150,9 +150,14 @@ class CellBuilder:
     def save_cells(self):
         os.makedirs("output", exist_ok=True)
 
+        for cell in self.cells:
+            error = check_region(cell["region"], self.surfaces)
+            if error:
+                messagebox.showerror("Error", f"Cell '{cell['name']}' has an invalid region:\n{error}")
+                return
+
         # Save JSON
-        with open(self.json_file, "w") as f:
-            json.dump(self.cells, f, indent=2)
+        self.project.save(["cells"])
 
         # Save Python (geometry.py)
         lines = [
@@ -172,7 +177,7 @@ class CellBuilder:
             else:
                 fill = cell["material"]
             lines.append(
-                f"{cell['name']} = openmc.Cell(name='{cell['name']}', fill={fill}, region={cell['region']})\n"
+                f"{cell['name']} = openmc.Cell(name='{cell['name']}', fill={fill}, region={compile_region(cell['region']).to_python()})\n"
             )
 
         # Create universes
@@ -0,0 +1,264 @@
+"""Command-line entry points that work without a display.
+
+    python -m modules build [project_dir] [--out DIR] [--root UNIVERSE] [--force]
+    python -m modules sweep sweep.json [--workers N] [--no-run]
+    python -m modules import-materials table.csv [--project DIR] [--density D] [--no-normalize]
+    python -m modules check [project_dir] [--samples N] [--seed S] [--root UNIVERSE]
+    python -m modules volumes [project_dir] [--target REL_ERR] [--max-samples N] [--no-write]
+    python -m modules convergence [statepoint.h5] [--apply PROJECT_DIR]
+    python -m modules preflight [run_dir] [--ranks N] [--calibrate [--particles N] [--threads T]]
+    python -m modules launch [--ranks N] [--threads T] [--detect] [--save]
+    python -m modules results [statepoint.h5] [--tally ID --score S --bins B,... --csv OUT | --npz OUT]
+"""
+import argparse
+import os
+import sys
+
+
+def cmd_build(args):
+    from .xml_exporter import build_project
+
+    written = build_project(args.project_dir, out_dir=args.out, root=args.root, force=args.force)
+    for path in written:
+        print(f"wrote {path}")
+    if not written:
+        print("all XML files are up to date")
+
+
+def cmd_sweep(args):
+    from .sweep import load_sweep, run_sweep
+
+    defn = load_sweep(args.definition)
+    results_path, rows = run_sweep(defn, workers=args.workers, run=False if args.no_run else None)
+    print(f"{len(rows)} variants, results in {results_path}")
+
+
+def cmd_import_materials(args):
+    from .material_import import import_compositions
+    from .project import get_project
+    from .nuclide_catalog import get_catalog
+
+    # check nuclide names against the project's library (or $OPENMC_CROSS_SECTIONS) when there is one
+    catalog = get_catalog(get_project(args.project).settings.get("cross_sections"))
+    names = import_compositions(args.table, project_dir=args.project, normalize=not args.no_normalize,
+                                default_density=args.density, depletable=args.depletable,
+                                known_nuclides=set(catalog.nuclides) if catalog else None)
+    print(f"imported {len(names)} materials into {args.project}")
+
+
+def cmd_check(args):
+    from .project import Project
+    from .geometry_check import check_geometry, format_report
+
+    report = check_geometry(Project(args.project_dir).as_dict(), samples=args.samples, seed=args.seed,
+                            root=args.root, stop_on_overlap=not args.all, workers=args.workers)
+    print(format_report(report))
+    if report["n_overlap"] or report["n_undefined"]:
+        raise SystemExit(2)
+
+
+def cmd_volumes(args):
+    from .project import get_project
+    from .volume_calc import estimate_volumes, apply_volumes, format_report
+
+    project = get_project(args.project_dir)
+    report = estimate_volumes(project.as_dict(), target_rel_error=args.target, max_samples=args.max_samples,
+                              seed=args.seed, root=args.root, workers=args.workers)
+    print(format_report(report))
+    if not args.no_write:
+        apply_volumes(project, report)
+        print(f"volumes written to {project.path('materials')}")
+
+
+def cmd_results(args):
+    import numpy as np
+    from .results import Statepoint, latest_statepoint, export_csv, export_npz
+
+    path = args.statepoint or latest_statepoint()
+    if not path:
+        raise ValueError("No statepoint.*.h5 found in output")
+    with Statepoint(path) as sp:
+        if args.tally is None:
+            print(sp.describe())
+            return
+        if args.tally not in sp.tallies:
+            raise ValueError(f"{path} has no tally {args.tally}")
+        tally = sp.tallies[args.tally]
+        # one entry per filter axis: a bin index, or '-' / ':' for every bin
+        selection = [None] * len(tally.axes)
+        if args.bins:
+            selection = [None if b.strip() in ("-", ":") else int(b) for b in args.bins.split(",")]
+        score = args.score or tally.scores[0]
+        if args.csv or args.npz:
+            writer, out = (export_csv, args.csv) if args.csv else (export_npz, args.npz)
+            n = writer(tally, selection, score, args.nuclide, out)
+            print(f"wrote {n:,} bins to {out}")
+            return
+        mean, std = tally.read(selection, score, args.nuclide, max_bins=1000)
+        for index in np.ndindex(*mean.shape):
+            print(" ".join(map(str, index)), f"{mean[index]:.6e} +/- {std[index]:.3e}")
+
+
+def cmd_convergence(args):
+    from .results import latest_statepoint
+    from .convergence import read_batches, analyze, format_report, apply_to_settings
+
+    path = args.statepoint or latest_statepoint()
+    if not path:
+        raise ValueError("No statepoint.*.h5 found in output")
+    report = analyze(read_batches(path))
+    print(format_report(report))
+    if args.apply:
+        from .project import get_project
+        from .xml_exporter import build_settings, settings_key
+        from .build_cache import export_xml
+
+        project = get_project(args.apply)
+        changes = apply_to_settings(project, report)
+        if changes:
+            export_xml(args.apply, "settings.xml", settings_key(project.settings),
+                       lambda: build_settings(project.settings, args.apply))
+        print("settings updated: " + "; ".join(changes) if changes else "settings already match")
+
+
+def cmd_preflight(args):
+    from .project import Project
+    from .preflight import (xml_tally_bins, check_tallies, format_tally_report, load_thresholds, read_run_size,
+                            calibrate, format_duration, ranks_note)
+    from .launch_config import load_profile
+
+    # ranks and threads default to this host's saved launch profile
+    profile = load_profile() or {}
+    ranks = args.ranks or int(profile.get("ranks") or 1)
+    threads = args.threads or (int(profile["threads"]) if profile.get("threads") else None)
+
+    tallies = os.path.join(args.run_dir, "tallies.xml")
+    summary = None
+    if os.path.exists(tallies):
+        summary = check_tallies(xml_tally_bins(tallies), ranks, load_thresholds(Project(args.run_dir).settings))
+        print(format_tally_report(summary))
+    else:
+        print(f"no tallies.xml in {args.run_dir}")
+    particles, batches, inactive = read_run_size(os.path.join(args.run_dir, "settings.xml"))
+    print(f"{particles:,} particles x {batches} batches ({inactive} inactive) = {particles * batches:,} histories")
+    if args.calibrate:
+        seconds, timings, _ = calibrate(args.run_dir, particles=args.particles, cross_sections=args.cross_sections,
+                                        threads=threads, ranks=ranks)
+        rates = ", ".join(f"{k} {timings[k]:.4g} particles/s" for k in ("inactive", "active") if k in timings)
+        print(f"calibration: {rates}")
+        print(f"estimated wall time: {format_duration(seconds)} ({ranks_note(ranks)})")
+    if summary is not None and summary["warnings"]:
+        raise SystemExit(2)
+
+
+def cmd_launch(args):
+    from .launch_config import (detect_topology, format_topology, suggest_profile, load_profile, save_profile,
+                                check_profile, format_command, host_name, binding_args, mpi_flavor)
+
+    topology = detect_topology()
+    print(f"{host_name()}: {format_topology(topology)}")
+    saved = None if args.detect else load_profile()
+    profile = dict(saved or suggest_profile(topology))
+    if args.ranks:
+        profile["ranks"] = args.ranks
+    if args.threads:
+        profile["threads"] = args.threads
+    if profile["ranks"] > 1 and profile["mpiexec"] and not profile["mpi_args"]:
+        profile["mpi_args"] = binding_args(mpi_flavor(profile["mpiexec"]), profile["threads"])
+    check_profile(profile)
+    print(("saved profile" if saved and not (args.ranks or args.threads) else "profile") + ":")
+    print("  " + format_command(profile))
+    if args.save:
+        save_profile(profile)
+        print(f"saved for {host_name()}")
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(prog="python -m modules", description="OpenMC GUI Builder command-line tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="write the OpenMC XML files from a project's JSON files")
+    p.add_argument("project_dir", nargs="?", default="output", help="directory holding materials.json, cells.json, ... (default: output)")
+    p.add_argument("--out", help="directory for the XML files (default: project_dir)")
+    p.add_argument("--root", help="root universe name (default: the saved final geometry selection)")
+    p.add_argument("--force", action="store_true", help="rewrite geometry, settings and tallies XML even if unchanged")
+    p.set_defaults(func=cmd_build)
+
+    p = sub.add_parser("sweep", help="build (and optionally run) every variant of a parameter sweep")
+    p.add_argument("definition", help="sweep definition JSON file")
+    p.add_argument("--workers", type=int, help="processes used to generate variant XML (default: all cores)")
+    p.add_argument("--no-run", action="store_true", help="only generate the variants, even if the definition enables running")
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser("import-materials", help="bulk-import material compositions from a CSV/NPZ table")
+    p.add_argument("table", help="wide or long CSV, or NPZ with materials/nuclides/fractions arrays")
+    p.add_argument("--project", default="output", help="project directory (default: output)")
+    p.add_argument("--density", type=float, help="density in g/cm3 for rows without one")
+    p.add_argument("--depletable", action="store_true", help="mark the imported materials depletable")
+    p.add_argument("--no-normalize", action="store_true", help="require every row to sum to 1 instead of normalizing")
+    p.set_defaults(func=cmd_import_materials)
+
+    p = sub.add_parser("check", help="sample random points to find overlapping or undefined regions")
+    p.add_argument("project_dir", nargs="?", default="output", help="project directory (default: output)")
+    p.add_argument("--samples", type=int, default=1_000_000, help="points per universe (default: 1000000)")
+    p.add_argument("--seed", type=int, help="random seed, to reproduce a previous check")
+    p.add_argument("--root", help="root universe name (default: the saved final geometry selection)")
+    p.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    p.add_argument("--all", action="store_true", help="keep sampling after the first confirmed overlap")
+    p.set_defaults(func=cmd_check)
+
+    p = sub.add_parser("volumes", help="compute material volumes (exact where possible, sampled otherwise)")
+    p.add_argument("project_dir", nargs="?", default="output", help="project directory (default: output)")
+    p.add_argument("--target", type=float, default=1e-3, help="target relative error of sampled volumes (default: 0.001)")
+    p.add_argument("--max-samples", type=int, default=50_000_000, help="upper limit on sampled points")
+    p.add_argument("--seed", type=int, help="random seed")
+    p.add_argument("--root", help="root universe name (default: the saved final geometry selection)")
+    p.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    p.add_argument("--no-write", action="store_true", help="only print the volumes, do not update materials.json")
+    p.set_defaults(func=cmd_volumes)
+
+    p = sub.add_parser("convergence", help="k-eff/entropy convergence diagnostics and suggested inactive batches")
+    p.add_argument("statepoint", nargs="?", help="statepoint file (default: newest in output)")
+    p.add_argument("--apply", metavar="PROJECT_DIR",
+                   help="write the suggested inactive batches and an entropy mesh into this project's settings")
+    p.set_defaults(func=cmd_convergence)
+
+    p = sub.add_parser("preflight", help="tally memory estimate and (optionally) run time from a short calibration run")
+    p.add_argument("run_dir", nargs="?", default="output", help="directory holding the XML inputs (default: output)")
+    p.add_argument("--ranks", type=int, help="MPI ranks per node; each holds a copy of the tallies "
+                   "(default: the saved launch profile's, else 1)")
+    p.add_argument("--calibrate", action="store_true", help="time a short run to extrapolate the full run's wall time")
+    p.add_argument("--particles", type=int, default=500, help="particles per batch of the calibration run (default: 500)")
+    p.add_argument("--threads", type=int, help="OpenMP threads for the calibration run "
+                   "(default: the saved launch profile's, else OpenMC's)")
+    p.add_argument("--cross-sections", help="cross_sections.xml (default: OPENMC_CROSS_SECTIONS)")
+    p.set_defaults(func=cmd_preflight)
+
+    p = sub.add_parser("launch", help="show or save this machine's MPI ranks x OpenMP threads launch profile")
+    p.add_argument("--ranks", type=int, help="MPI ranks (default: one per NUMA node when mpiexec is available)")
+    p.add_argument("--threads", type=int, help="OpenMP threads per rank (default: physical cores per rank)")
+    p.add_argument("--detect", action="store_true", help="ignore the saved profile and start from the detected cores")
+    p.add_argument("--save", action="store_true", help="store the profile for this host in ~/.openmc_gui")
+    p.set_defaults(func=cmd_launch)
+
+    p = sub.add_parser("results", help="list statepoint tallies, print a slice or stream it to CSV/NPZ")
+    p.add_argument("statepoint", nargs="?", help="statepoint file (default: newest in output)")
+    p.add_argument("--tally", type=int, help="tally ID (default: list all tallies)")
+    p.add_argument("--score", help="score (default: the tally's first)")
+    p.add_argument("--nuclide", default="total", help="nuclide (default: total)")
+    p.add_argument("--bins", help="comma-separated bin index per filter axis (mesh = z,y,x), '-' for all bins")
+    p.add_argument("--csv", help="write the selection to this CSV file")
+    p.add_argument("--npz", help="write the selection to this NPZ file")
+    p.set_defaults(func=cmd_results)
+
+    return parser
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    try:
+        args.func(args)
+    except (ValueError, KeyError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
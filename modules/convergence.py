@@ -0,0 +1,182 @@
+"""Eigenvalue convergence diagnostics from a statepoint.
+
+Reads the per-generation k and (when an entropy mesh was set) Shannon
+entropy arrays, and estimates how many inactive batches the source needed:
+the batch at which a moving average of the entropy (or of k, when there is
+no entropy) first reaches the level it holds over the final half of the run.
+The autocorrelation of the active k values shows how much the reported
+σ underestimates the true uncertainty (batches are not independent).
+"""
+import math
+import numpy as np
+import h5py
+
+from .point_classifier import bounding_box
+
+PARTICLES_PER_MESH_CELL = 20    # entropy mesh sizing rule of thumb
+MAX_LAG = 50
+
+
+def read_batches(path):
+    """Per-generation arrays and run parameters from a statepoint file."""
+    with h5py.File(path, "r") as f:
+        if "k_generation" not in f:
+            raise ValueError(f"{path} has no k-eff history (not an eigenvalue run?)")
+        data = {
+            "k": np.asarray(f["k_generation"][()], dtype=float),
+            "entropy": np.asarray(f["entropy"][()], dtype=float) if "entropy" in f else None,
+            "n_inactive": int(f["n_inactive"][()]) if "n_inactive" in f else 0,
+            "generations_per_batch": int(f["generations_per_batch"][()]) if "generations_per_batch" in f else 1,
+            "n_particles": int(f["n_particles"][()]) if "n_particles" in f else None,
+        }
+    if data["entropy"] is not None and not len(data["entropy"]):
+        data["entropy"] = None
+    return data
+
+
+def cumulative_mean(values):
+    """Running mean and standard deviation of the mean, for every prefix."""
+    n = np.arange(1, len(values) + 1)
+    mean = np.cumsum(values) / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (np.cumsum(values * values) / n - mean * mean) / (n - 1)
+    return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def autocorrelation(values, max_lag=MAX_LAG):
+    """Normalized autocorrelation for lags 0..max_lag (FFT, zero-padded)."""
+    x = np.asarray(values, dtype=float) - np.mean(values)
+    n = len(x)
+    if n < 2 or not x.any():
+        return np.ones(1)
+    size = 1 << (2 * n - 1).bit_length()
+    spectrum = np.fft.rfft(x, size)
+    acf = np.fft.irfft(spectrum * np.conj(spectrum), size)[:n]
+    return acf[:max_lag + 1] / acf[0]
+
+
+def correlation_time(acf):
+    """Integrated autocorrelation time, summing lags until the first negative one."""
+    negative = np.flatnonzero(acf[1:] < 0)
+    cut = negative[0] + 1 if negative.size else len(acf)
+    return max(1.0, 1.0 + 2.0 * acf[1:cut].sum())
+
+
+def stationary_start(values, window=None):
+    """Batch at which a moving average first reaches the level of the run's final half.
+
+    The band is ±1σ of the moving average over the final half, so correlated
+    batches widen it; the whole first in-band window is counted as transient.
+    """
+    n = len(values)
+    if n < 8:
+        return None
+    window = window or max(3, n // 20)
+    moving = np.convolve(values, np.ones(window) / window, mode="valid")
+    tail = moving[n // 2:]
+    mu, sigma = tail.mean(), tail.std(ddof=1)
+    inside = np.flatnonzero(np.abs(moving - mu) <= sigma + 1e-12)
+    if not inside.size or inside[0] + window > n // 2:
+        return None
+    return int(inside[0] + window)
+
+
+def analyze(data):
+    """Diagnostics report (in batches) for the arrays returned by read_batches."""
+    gens = data["generations_per_batch"]
+    k = data["k"]
+    n_batches = len(k) // gens
+    # per-batch k: average of the batch's generations
+    k_batch = k[:n_batches * gens].reshape(n_batches, gens).mean(axis=1)
+    entropy = data["entropy"]
+    entropy_batch = None
+    if entropy is not None:
+        entropy_batch = entropy[:n_batches * gens].reshape(n_batches, gens).mean(axis=1)
+
+    k_start = stationary_start(k_batch)
+    entropy_start = stationary_start(entropy_batch) if entropy_batch is not None else None
+    # entropy when present, otherwise k; nothing is suggested while either has not settled
+    starts = [k_start] if entropy_batch is None else [k_start, entropy_start]
+    suggested = None if None in starts else max(starts)
+
+    inactive = data["n_inactive"]
+    active = k_batch[inactive:] if inactive < n_batches else k_batch[-1:]
+    acf = autocorrelation(active)
+    tau = correlation_time(acf)
+    mean, std = cumulative_mean(active)
+    return {
+        "n_batches": n_batches,
+        "n_inactive": inactive,
+        "k_batch": k_batch,
+        "entropy_batch": entropy_batch,
+        "k_start": k_start,
+        "entropy_start": entropy_start,
+        "suggested_inactive": suggested,
+        "k_mean": mean,
+        "k_std": std,
+        "acf": acf,
+        "tau": tau,
+        "n_particles": data["n_particles"],
+    }
+
+
+def format_report(report):
+    lines = [f"{report['n_batches']} batches, {report['n_inactive']} inactive"]
+    if report["entropy_batch"] is None:
+        lines.append("No Shannon entropy in the statepoint; add an entropy mesh for a reliable source check.")
+    for key, label in (("entropy_start", "Entropy"), ("k_start", "k-eff")):
+        if key == "entropy_start" and report["entropy_batch"] is None:
+            continue
+        start = report[key]
+        lines.append(f"{label} stationary after batch {start}" if start is not None
+                     else f"{label} did not settle in the first half of the run")
+    suggested = report["suggested_inactive"]
+    if suggested is None:
+        lines.append("Suggested inactive batches: unknown (run more batches)")
+    else:
+        verdict = "OK" if suggested <= report["n_inactive"] else "too few"
+        lines.append(f"Suggested inactive batches: {suggested} (this run used {report['n_inactive']}: {verdict})")
+    if len(report["k_mean"]):
+        lines.append(f"Active k = {report['k_mean'][-1]:.5f} ± {report['k_std'][-1]:.5f}")
+    lines.append(f"Batch autocorrelation: lag-1 = {report['acf'][1] if len(report['acf']) > 1 else 0:.3f}, "
+                 f"integrated time = {report['tau']:.2f} batches "
+                 f"(σ underestimated by about x{math.sqrt(report['tau']):.2f})")
+    return "\n".join(lines)
+
+
+# ---------------- Settings ----------------
+def apply_to_settings(project, report, add_mesh=True):
+    """Use the suggested inactive batches (keeping the active count) and add an entropy mesh.
+
+    Returns a list of human-readable changes; settings.json is saved if any.
+    """
+    settings = project.settings
+    if not settings:
+        raise ValueError("No settings.json yet; save the simulation settings first")
+    changes = []
+    suggested = report["suggested_inactive"]
+    if suggested is not None and suggested != int(settings.get("inactive") or 0):
+        active = int(settings["batches"]) - int(settings.get("inactive") or 0)
+        settings["inactive"] = suggested
+        settings["batches"] = suggested + active
+        changes.append(f"inactive batches {suggested}, total batches {settings['batches']} ({active} active)")
+    if add_mesh and not settings.get("entropy_mesh"):
+        settings["entropy_mesh"] = entropy_mesh(project.surfaces, int(settings["particles"]))
+        dims = " x ".join(map(str, settings["entropy_mesh"]["dimension"]))
+        changes.append(f"entropy mesh {dims}")
+    if changes:
+        project.mark_dirty("settings")
+        project.save(["settings"])
+    return changes
+
+
+# ---------------- Entropy mesh ----------------
+def entropy_mesh(surfaces, particles):
+    """Regular mesh over the model's boundary with about PARTICLES_PER_MESH_CELL particles per cell."""
+    lower_left, upper_right = bounding_box(surfaces, margin=1.0)
+    width = upper_right - lower_left
+    cells = max(1, particles // PARTICLES_PER_MESH_CELL)
+    # split the cells over the axes in proportion to the box's extent
+    scale = (cells / np.prod(width)) ** (1 / 3)
+    dimension = np.maximum(1, np.round(width * scale)).astype(int)
+    return {"lower_left": lower_left.tolist(), "upper_right": upper_right.tolist(), "dimension": dimension.tolist()}
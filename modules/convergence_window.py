@@ -0,0 +1,124 @@
+import os
+import tkinter as tk
+from tkinter import messagebox, filedialog
+import numpy as np
+
+from .project import get_project
+from .results import latest_statepoint
+from .convergence import read_batches, analyze, format_report, apply_to_settings
+
+
+class ConvergenceWindow:
+    def __init__(self, master, path=None):
+        self.master = tk.Toplevel(master)
+        self.master.title("Convergence Diagnostics")
+        self.master.geometry("760x640")
+        self.report = None
+
+        top = tk.Frame(self.master)
+        top.pack(fill="x", padx=8, pady=6)
+        tk.Label(top, text="Statepoint:").pack(side="left")
+        self.path_var = tk.StringVar(value=path or latest_statepoint("output") or "")
+        tk.Entry(top, textvariable=self.path_var, width=60).pack(side="left", padx=4)
+        tk.Button(top, text="Browse", command=self.browse).pack(side="left", padx=2)
+        tk.Button(top, text="Analyze", command=self.run_analysis).pack(side="left", padx=2)
+
+        self.canvas = tk.Canvas(self.master, bg="white", height=300, highlightthickness=0)
+        self.canvas.pack(fill="x", padx=8)
+        self.canvas.bind("<Configure>", lambda e: self.draw())
+
+        self.report_text = tk.Text(self.master, height=10, width=90, wrap="word", font=("Courier", 10))
+        self.report_text.pack(fill="both", expand=True, padx=8, pady=6)
+
+        btn_frame = tk.Frame(self.master)
+        btn_frame.pack(pady=4)
+        self.mesh_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(btn_frame, text="Add an entropy mesh if settings have none", variable=self.mesh_var).pack(
+            side="left", padx=6)
+        tk.Button(btn_frame, text="Apply to Settings", command=self.apply).pack(side="left", padx=6)
+
+        if self.path_var.get():
+            self.run_analysis()
+
+    def browse(self):
+        path = filedialog.askopenfilename(title="Select statepoint", filetypes=[("HDF5 files", "*.h5")],
+                                          initialdir="output" if os.path.isdir("output") else None)
+        if path:
+            self.path_var.set(path)
+            self.run_analysis()
+
+    def run_analysis(self):
+        # only the k and entropy history is read: a few kB even for long runs
+        try:
+            self.report = analyze(read_batches(self.path_var.get().strip()))
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Error", f"Could not analyze statepoint:\n{e}")
+            return
+        self.report_text.delete("1.0", tk.END)
+        self.report_text.insert(tk.END, format_report(self.report))
+        self.draw()
+
+    # ---------------- Plot ----------------
+    def draw(self):
+        """k per batch with the active running mean (top) and entropy (bottom)."""
+        self.canvas.delete("all")
+        if self.report is None:
+            return
+        r = self.report
+        width, height = max(self.canvas.winfo_width(), 200), max(self.canvas.winfo_height(), 200)
+        n = r["n_batches"]
+        to_x = lambda b: 40 + b / max(n - 1, 1) * (width - 50)
+        batches = np.arange(n)
+        panels = [(10, height / 2 - 10 if r["entropy_batch"] is not None else height - 20)]
+        if r["entropy_batch"] is not None:
+            panels.append((height / 2 + 10, height - 20))
+
+        k_top, k_bottom = panels[0]
+        active = np.arange(r["n_inactive"], r["n_inactive"] + len(r["k_mean"]))
+        band = np.concatenate((r["k_batch"], (r["k_mean"] - r["k_std"])[1:], (r["k_mean"] + r["k_std"])[1:]))
+        self.plot_line(batches, r["k_batch"], to_x, k_top, k_bottom, band, "gray")
+        self.plot_line(active, r["k_mean"], to_x, k_top, k_bottom, band, "blue", width=2)
+        self.canvas.create_text(45, k_top, anchor="nw", font=("Arial", 8),
+                                text="k per batch (gray), active running mean (blue)")
+        if r["entropy_batch"] is not None:
+            e_top, e_bottom = panels[1]
+            self.plot_line(batches, r["entropy_batch"], to_x, e_top, e_bottom, r["entropy_batch"], "darkorange")
+            self.canvas.create_text(45, e_top, anchor="nw", font=("Arial", 8), text="Shannon entropy")
+
+        for batch, color, dash in ((r["n_inactive"], "gray40", (4, 2)), (r["suggested_inactive"], "red", None)):
+            if batch is not None:
+                self.canvas.create_line(to_x(batch), 10, to_x(batch), height - 20, fill=color, dash=dash)
+        self.canvas.create_text(width - 10, height - 5, anchor="se", font=("Arial", 8),
+                                text="dashed: inactive batches used   red: suggested")
+
+    def plot_line(self, x, y, to_x, top, bottom, scale_values, color, width=1):
+        finite = scale_values[np.isfinite(scale_values)]
+        mask = np.isfinite(y)
+        if not finite.size or mask.sum() < 2:
+            return
+        lo, hi = finite.min(), finite.max()
+        span = max(hi - lo, 1e-12)
+        px = np.column_stack((to_x(x[mask]), bottom - (y[mask] - lo) / span * (bottom - top)))
+        self.canvas.create_line(*px.ravel().tolist(), fill=color, width=width)
+
+    # ---------------- Settings ----------------
+    def apply(self):
+        if self.report is None:
+            return
+        project = get_project()
+        try:
+            changes = apply_to_settings(project, self.report, add_mesh=self.mesh_var.get())
+        except (ValueError, KeyError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if not changes:
+            messagebox.showinfo("Settings", "Settings already match the suggestion.")
+            return
+        try:
+            from .xml_exporter import build_settings, settings_key
+            from .build_cache import export_xml
+            export_xml("output", "settings.xml", settings_key(project.settings), lambda: build_settings(project.settings))
+        except Exception as e:
+            messagebox.showerror("Error", f"settings.json was updated, but settings.xml could not be written:\n{e}")
+            return
+        messagebox.showinfo("Settings", "Updated settings.json and settings.xml:\n" + "\n".join(changes))
@@ -1,21 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
-import openmc
+from .project import get_project
 
 def load_universes():
-    """Load universe names from output/universes.json"""
-    path = os.path.join("output", "universes.json")
-    if not os.path.exists(path):
-        return []
-    with open(path, "r") as f:
-        try:
-            universes = json.load(f)
-            return list(universes.keys())
-        except Exception as e:
-            print("Error loading universes.json:", e)
-            return []
+    """Universe names from the shared project (universes.json)"""
+    return list(get_project().universes.keys())
 
 def save_final_geometry(selected_universe):
     """Generate final_geometry.py using the selected universe"""
@@ -40,6 +30,11 @@ def save_final_geometry(selected_universe):
     with open(output_path, "w") as f:
         f.writelines(code_lines)
 
+    # Remember the selection for the headless builder
+    project = get_project()
+    project.set("geometry", {"root_universe": selected_universe})
+    project.save(["geometry"])
+
     # Show confirmation and close window
     messagebox.showinfo(
         "Success",
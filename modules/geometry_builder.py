@@ -1,23 +1,22 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
-import openmc
-import json
 from .cell_builder import CellBuilder
-from .utils import load_materials_from_xml
+from .project import get_project
 
 
 class GeometryBuilder:
     def __init__(self, master):
         self.master = tk.Toplevel(master)
         self.master.title("Geometry Builder")
-        self.master.geometry("500x550")  # slightly taller to fit new dropdown
+        self.master.geometry("500x720")  # taller to fit the plot/check/volume buttons
 
+        self.project = get_project()
         self.surfaces = self.load_surfaces_from_json()
         self.surface_listbox = None
 
         # Materials for cell builder
-        self.materials_by_name = load_materials_from_xml()
+        self.materials_by_name = self.project.materials
 
 
         
@@ -72,6 +71,11 @@ class GeometryBuilder:
         # Open Cell Builder
         tk.Button(self.master, text="Open Cell Builder", command=self.open_cell_builder).pack(pady=6)
 
+        # Slice plot of the whole geometry
+        tk.Button(self.master, text="Plot Geometry", command=self.open_slice_plotter).pack(pady=6)
+        tk.Button(self.master, text="Check Geometry", command=self.open_geometry_check).pack(pady=6)
+        tk.Button(self.master, text="Calculate Volumes", command=self.open_volume_calc).pack(pady=6)
+
         # Developer credit label (top-right corner)
         tk.Label(
             self.master,
@@ -168,20 +172,15 @@ class GeometryBuilder:
             )
 
     def save_surfaces_json(self):
-        out_dir = "output"
-        os.makedirs(out_dir, exist_ok=True)
-        with open(os.path.join(out_dir, "surfaces.json"), "w") as f:
-            json.dump(self.surfaces, f, indent=2)
+        self.project.mark_dirty("surfaces")
+        self.project.save(["surfaces"])
 
     def load_surfaces_from_json(self):
-        path = os.path.join("output", "surfaces.json")
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                return json.load(f)
-        return {}
+        return self.project.surfaces
 
     def save_surfaces(self):
         """Save surfaces to Python file"""
+        os.makedirs("output", exist_ok=True)
         py_file = "output/surfaces.py"
 
         lines = ["import openmc\n\n"]
@@ -209,13 +208,17 @@ class GeometryBuilder:
         messagebox.showinfo("Saved", f"Surfaces saved to {py_file}")
 
     def open_cell_builder(self):
-        # Load universes from JSON
-        universes_path = os.path.join("output", "universes.json")
-        if os.path.exists(universes_path):
-            with open(universes_path, "r") as f:
-                universes = json.load(f)
-        else:
-            universes = {}  # empty if no universes exist yet
-
         # Open CellBuilder with surfaces, materials, and universes
-        CellBuilder(self.master, self.surfaces, self.materials_by_name, universes)
+        CellBuilder(self.master, self.surfaces, self.materials_by_name, self.project.universes)
+
+    def open_slice_plotter(self):
+        from .slice_plotter import SlicePlotter
+        SlicePlotter(self.master)
+
+    def open_geometry_check(self):
+        from .geometry_check_window import GeometryCheckWindow
+        GeometryCheckWindow(self.master)
+
+    def open_volume_calc(self):
+        from .volume_window import VolumeWindow
+        VolumeWindow(self.master)
@@ -0,0 +1,142 @@
+"""Stochastic overlap and undefined-region check.
+
+Random points are classified with the point classifier, in chunks spread
+over worker processes. The root pass samples the model's bounding box and
+flags points inside the boundary surfaces that no cell claims, or that
+several cells claim; one extra pass per universe looks for overlaps inside
+that universe on its own. Each chunk draws from its own child SeedSequence,
+so a given seed reproduces the same points whatever the worker count.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from .point_classifier import GeometryModel, bounding_box, inside_boundary
+
+CHUNK = 250_000
+MAX_REPORTED = 20
+
+_worker_model = None
+
+
+# ---------------- Worker side ----------------
+def _init_worker(project_data, root):
+    global _worker_model
+    _worker_model = GeometryModel(project_data, root=root)
+
+
+def sample_chunk(seed, n, lower_left, upper_right, universe=None, check_undefined=True):
+    """Classify n uniform points; return counts and a few example coordinates."""
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(lower_left, upper_right, size=(n, 3))
+    if check_undefined:
+        points = points[inside_boundary(_worker_model.surfaces, points)]
+    _, hits = _worker_model.classify(points, count=True, universe=universe)
+    overlap = hits > 1
+    undefined = hits == 0 if check_undefined else np.zeros(len(points), dtype=bool)
+    return {
+        "sampled": len(points),
+        "n_overlap": int(overlap.sum()),
+        "n_undefined": int(undefined.sum()),
+        "overlap": points[overlap][:MAX_REPORTED],
+        "undefined": points[undefined][:MAX_REPORTED],
+    }
+
+
+# ---------------- Driver ----------------
+def check_passes(model, lower_left, upper_right):
+    """[(universe or None, lower_left, upper_right, check_undefined), ...] to sample."""
+    passes = [(None, lower_left, upper_right, True)]
+    lattice_pitch = {}
+    for lat in model.lattices.values():
+        for u in set(lat.table.ravel().tolist()) | {lat.outer}:
+            if u >= 0:
+                lattice_pitch[u] = max(lattice_pitch.get(u, 0.0), lat.pitch)
+    for u, name in enumerate(model.universe_names):
+        if u == model.root:
+            continue
+        lo, hi = lower_left.copy(), upper_right.copy()
+        if u in lattice_pitch:
+            # a lattice tile never reaches further than one pitch from its centre
+            lo[:2], hi[:2] = np.maximum(lo[:2], -lattice_pitch[u]), np.minimum(hi[:2], lattice_pitch[u])
+        passes.append((name, lo, hi, False))
+    return passes
+
+
+def check_geometry(project_data, samples=1_000_000, seed=None, root=None, stop_on_overlap=True,
+                   workers=None, cancel=None, progress=None):
+    """Sample the geometry and report overlapping and undefined points.
+
+    samples is the number of points per pass (root and each universe).
+    Returns a report dict; see format_report.
+    """
+    model = GeometryModel(project_data, root=root)
+    if model.root is None:
+        raise ValueError(model.root_error)
+    seq = np.random.SeedSequence(seed)
+    lower_left, upper_right = bounding_box(model.surfaces)
+    passes = check_passes(model, lower_left, upper_right)
+
+    tasks = []
+    for universe, lo, hi, check_undefined in passes:
+        for start in range(0, samples, CHUNK):
+            tasks.append((universe, lo, hi, check_undefined, min(CHUNK, samples - start)))
+    seeds = seq.spawn(len(tasks))
+
+    report = {"seed": seq.entropy, "sampled": 0, "n_overlap": 0, "n_undefined": 0,
+              "overlaps": [], "undefined": [], "stopped_early": False,
+              "bounding_box": (lower_left.tolist(), upper_right.tolist())}
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(project_data, root))
+    try:
+        futures = {pool.submit(sample_chunk, s, n, lo, hi, u, chk): u
+                   for s, (u, lo, hi, chk, n) in zip(seeds, tasks)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            universe = futures[future]
+            result = future.result()
+            report["sampled"] += result["sampled"]
+            report["n_overlap"] += result["n_overlap"]
+            report["n_undefined"] += result["n_undefined"]
+
+            confirmed = False
+            for point in result["overlap"]:
+                path = model.trace(point, universe)
+                if any(len(cells) > 1 for _, cells in path):
+                    confirmed = True
+                    if len(report["overlaps"]) < MAX_REPORTED:
+                        report["overlaps"].append({"universe": universe or model.universe_names[model.root],
+                                                   "point": point.tolist(), "path": path})
+            for point in result["undefined"]:
+                if len(report["undefined"]) < MAX_REPORTED:
+                    report["undefined"].append({"point": point.tolist(), "path": model.trace(point)})
+
+            if progress:
+                progress(done, len(futures))
+            if (confirmed and stop_on_overlap) or (cancel is not None and cancel.is_set()):
+                report["stopped_early"] = done < len(futures)
+                break
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return report
+
+
+def format_report(report):
+    """Human-readable summary of a check_geometry report."""
+    lines = [f"Sampled {report['sampled']:,} points (seed {report['seed']})"]
+    if report["stopped_early"]:
+        lines.append("Stopped early.")
+    if not report["n_overlap"] and not report["n_undefined"]:
+        lines.append("No overlaps or undefined regions found.")
+    if report["n_overlap"]:
+        lines.append(f"\n{report['n_overlap']:,} overlapping points, e.g.:")
+        for item in report["overlaps"]:
+            x, y, z = item["point"]
+            where, cells = next((u, c) for u, c in item["path"] if len(c) > 1)
+            lines.append(f"  ({x:.4f}, {y:.4f}, {z:.4f}) in {where}: {', '.join(cells)}")
+    if report["n_undefined"]:
+        lines.append(f"\n{report['n_undefined']:,} points not in any cell, e.g.:")
+        for item in report["undefined"]:
+            x, y, z = item["point"]
+            where = item["path"][-1][0]
+            lines.append(f"  ({x:.4f}, {y:.4f}, {z:.4f}) in {where}")
+    return "\n".join(lines)
@@ -0,0 +1,102 @@
+import threading
+import tkinter as tk
+from tkinter import messagebox
+
+from .project import get_project
+from .geometry_check import check_geometry, format_report
+
+POLL_MS = 100
+
+
+class GeometryCheckWindow:
+    def __init__(self, master):
+        self.master = tk.Toplevel(master)
+        self.master.title("Check Geometry")
+        self.master.geometry("640x520")
+
+        self.project = get_project()
+        self.thread = None
+        self.cancel = threading.Event()
+        self.result = None
+        self.progress = (0, 0)
+
+        form = tk.Frame(self.master)
+        form.pack(pady=8)
+        tk.Label(form, text="Samples per universe").grid(row=0, column=0, sticky="e", padx=4, pady=2)
+        self.samples_entry = tk.Entry(form, width=14)
+        self.samples_entry.insert(0, "1000000")
+        self.samples_entry.grid(row=0, column=1, sticky="w")
+
+        tk.Label(form, text="Seed (blank = random)").grid(row=1, column=0, sticky="e", padx=4, pady=2)
+        self.seed_entry = tk.Entry(form, width=14)
+        self.seed_entry.grid(row=1, column=1, sticky="w")
+
+        self.stop_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(form, text="Stop at the first confirmed overlap", variable=self.stop_var).grid(
+            row=2, column=0, columnspan=2, sticky="w")
+
+        btn_frame = tk.Frame(self.master)
+        btn_frame.pack(pady=4)
+        self.run_button = tk.Button(btn_frame, text="Run Check", command=self.start_check)
+        self.run_button.grid(row=0, column=0, padx=5)
+        tk.Button(btn_frame, text="Stop", command=self.cancel.set).grid(row=0, column=1, padx=5)
+
+        self.status = tk.Label(self.master, text="")
+        self.status.pack()
+        self.report_text = tk.Text(self.master, height=20, width=80, wrap="none")
+        self.report_text.pack(fill="both", expand=True, padx=6, pady=6)
+
+    def start_check(self):
+        if self.thread and self.thread.is_alive():
+            return
+        try:
+            samples = int(self.samples_entry.get())
+            seed = int(self.seed_entry.get()) if self.seed_entry.get().strip() else None
+        except ValueError:
+            messagebox.showerror("Error", "Samples and seed must be integers.")
+            return
+        if samples <= 0:
+            messagebox.showerror("Error", "Samples must be positive.")
+            return
+
+        self.cancel.clear()
+        self.result = None
+        self.progress = (0, 0)
+        self.run_button.config(state="disabled")
+        self.report_text.delete("1.0", tk.END)
+        data = self.project.as_dict()
+        root = self.project.geometry.get("root_universe")
+        self.thread = threading.Thread(target=self.run_check, daemon=True,
+                                       args=(data, samples, seed, root, self.stop_var.get()))
+        self.thread.start()
+        self.master.after(POLL_MS, self.poll_check)
+
+    def run_check(self, data, samples, seed, root, stop_on_overlap):
+        # runs on the worker thread: no Tk calls or Tk variables here
+        try:
+            self.result = check_geometry(data, samples=samples, seed=seed, root=root,
+                                         stop_on_overlap=stop_on_overlap, cancel=self.cancel,
+                                         progress=self.set_progress)
+        except Exception as e:
+            self.result = e
+
+    def set_progress(self, done, total):
+        self.progress = (done, total)
+
+    def poll_check(self):
+        if not self.master.winfo_exists():
+            return
+        if self.thread.is_alive():
+            done, total = self.progress
+            self.status.config(text=f"Sampling... {done}/{total} chunks" if total else "Starting workers...")
+            self.master.after(POLL_MS, self.poll_check)
+            return
+
+        self.run_button.config(state="normal")
+        if isinstance(self.result, Exception):
+            self.status.config(text="Check failed", fg="red")
+            messagebox.showerror("Error", f"Geometry check failed:\n{self.result}")
+            return
+        ok = not self.result["n_overlap"] and not self.result["n_undefined"]
+        self.status.config(text="Geometry OK" if ok else "Problems found", fg="green" if ok else "red")
+        self.report_text.insert(tk.END, format_report(self.result))
@@ -1,49 +1,150 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
+import numpy as np
+from .project import get_project
+from .lattice_model import (HexLatticeMap, RectLatticeMap, hex_positions, lattices_python, rect_pitch,
+                            EMPTY, MAX_RINGS)
+from .slice_plotter import palette, tile_image
+
+MAP_SIZE = 520
+EMPTY_COLOR = "#dddddd"
+GRID_RGB = (100, 100, 100)
+SQRT3 = np.sqrt(3.0)
+
 
 class LatticeBuilder:
     def __init__(self, master):
         self.top = tk.Toplevel(master)
         self.top.title("Lattice Builder")
-        self.top.geometry("500x600")
-        self.top.resizable(False, False)
+        self.top.geometry("900x700")
 
+        self.project = get_project()
         self.universes = self.load_universes()
-        self.ring_entries = []
+        self.colors = ["#%02x%02x%02x" % tuple(rgb) for rgb in palette(len(self.universes))[:-1]]
+        self.lattice = HexLatticeMap(3)
+        self.tile_items = []        # flat map index -> canvas polygon
+        self.item_index = {}        # canvas polygon -> flat map index
+        self.cell_px = 1            # rect map: canvas pixels per lattice position
+        self.map_image = None
+        self.selection = None       # rect map: (row0, col0, row1, col1), inclusive
+        self.selection_anchor = None
+        self.clipboard = None
+
+        form = tk.Frame(self.top)
+        form.pack(side="left", fill="y", padx=10, pady=10)
 
         # ===== Lattice Properties =====
-        tk.Label(self.top, text="Lattice Name:", font=("Arial", 11)).pack(pady=5)
-        self.name_entry = tk.Entry(self.top, width=30)
-        self.name_entry.pack(pady=5)
+        tk.Label(form, text="Lattice Name:", font=("Arial", 11)).pack(pady=3)
+        self.name_entry = ttk.Combobox(form, width=28, values=list(self.project.lattices))
+        self.name_entry.pack(pady=3)
+        self.name_entry.bind("<<ComboboxSelected>>", lambda e: self.load_lattice(self.name_entry.get()))
 
-        tk.Label(self.top, text="Pitch (comma-separated):", font=("Arial", 11)).pack(pady=5)
-        self.pitch_entry = tk.Entry(self.top, width=30)
+        tk.Label(form, text="Lattice Type:", font=("Arial", 11)).pack(pady=3)
+        self.type_dropdown = ttk.Combobox(form, values=["Hex", "Rect"], state="readonly")
+        self.type_dropdown.set("Hex")
+        self.type_dropdown.pack(pady=3)
+        self.type_dropdown.bind("<<ComboboxSelected>>", lambda e: self.change_type())
+
+        tk.Label(form, text="Pitch (comma-separated):", font=("Arial", 11)).pack(pady=3)
+        self.pitch_entry = tk.Entry(form, width=30)
         self.pitch_entry.insert(0, "1.275")
-        self.pitch_entry.pack(pady=5)
+        self.pitch_entry.pack(pady=3)
+
+        tk.Label(form, text="Outer Universe:", font=("Arial", 11)).pack(pady=3)
+        self.outer_dropdown = ttk.Combobox(form, values=[""] + self.universes, state="readonly")
+        self.outer_dropdown.pack(pady=3)
 
-        tk.Label(self.top, text="Orientation:", font=("Arial", 11)).pack(pady=5)
-        self.orientation_dropdown = ttk.Combobox(self.top, values=["x", "y", "z"], state="readonly")
+        # ===== Hex: orientation and rings =====
+        self.hex_frame = tk.Frame(form)
+        tk.Label(self.hex_frame, text="Orientation:", font=("Arial", 11)).pack(pady=3)
+        self.orientation_dropdown = ttk.Combobox(self.hex_frame, values=["x", "y"], state="readonly")
         self.orientation_dropdown.set("y")
-        self.orientation_dropdown.pack(pady=5)
+        self.orientation_dropdown.pack(pady=3)
+        self.orientation_dropdown.bind("<<ComboboxSelected>>", lambda e: self.draw_map())
+
+        tk.Label(self.hex_frame, text="Number of Rings:", font=("Arial", 11)).pack(pady=3)
+        self.num_rings_spin = tk.Spinbox(self.hex_frame, from_=1, to=MAX_RINGS, width=5, command=self.resize_map)
+        self.num_rings_spin.delete(0, tk.END)
+        self.num_rings_spin.insert(0, "3")
+        self.num_rings_spin.bind("<Return>", lambda e: self.resize_map())
+        self.num_rings_spin.pack(pady=3)
 
-        tk.Label(self.top, text="Outer Universe:", font=("Arial", 11)).pack(pady=5)
-        self.outer_dropdown = ttk.Combobox(self.top, values=self.universes, state="readonly")
-        self.outer_dropdown.pack(pady=5)
+        # ===== Rect: dimensions, layer and placement =====
+        self.rect_frame = tk.Frame(form)
+        dims = tk.Frame(self.rect_frame)
+        dims.pack(pady=3)
+        self.dim_entries = []
+        for col, (label, default) in enumerate((("Nx", "17"), ("Ny", "17"), ("Nz", "1"))):
+            tk.Label(dims, text=label).grid(row=0, column=2 * col)
+            entry = tk.Entry(dims, width=5)
+            entry.insert(0, default)
+            entry.grid(row=0, column=2 * col + 1, padx=2)
+            entry.bind("<Return>", lambda e: self.resize_map())
+            self.dim_entries.append(entry)
+        tk.Button(self.rect_frame, text="Resize", command=self.resize_map).pack(pady=2)
+        layer_row = tk.Frame(self.rect_frame)
+        layer_row.pack(pady=3)
+        tk.Label(layer_row, text="Layer (0 = bottom):").pack(side="left")
+        self.layer_spin = tk.Spinbox(layer_row, from_=0, to=0, width=5, command=self.draw_map)
+        self.layer_spin.bind("<Return>", lambda e: self.draw_map())
+        self.layer_spin.pack(side="left")
+        self.all_layers_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.rect_frame, text="Edit all layers", variable=self.all_layers_var).pack()
+        tk.Label(self.rect_frame, text="Lower Left (blank = centred):", font=("Arial", 11)).pack(pady=3)
+        self.lower_left_entry = tk.Entry(self.rect_frame, width=30)
+        self.lower_left_entry.pack(pady=3)
 
-        # ===== Rings Section =====
-        tk.Label(self.top, text="Number of Rings:", font=("Arial", 11)).pack(pady=5)
-        self.num_rings_spin = tk.Spinbox(self.top, from_=1, to=10, width=5, command=self.create_ring_inputs)
-        self.num_rings_spin.pack(pady=5)
+        self.type_anchor = tk.Frame(form)
+        self.type_anchor.pack()
+        self.hex_frame.pack(in_=self.type_anchor)
 
-        self.rings_frame = tk.Frame(self.top)
-        self.rings_frame.pack(pady=10, fill="x")
+        # ===== Brush =====
+        tk.Label(form, text="Paint with Universe:", font=("Arial", 11)).pack(pady=3)
+        self.brush_list = tk.Listbox(form, height=8, exportselection=False)
+        for i, name in enumerate(self.universes):
+            self.brush_list.insert(tk.END, name)
+            self.brush_list.itemconfig(i, bg=self.colors[i])
+        if self.universes:
+            self.brush_list.selection_set(0)
+        self.brush_list.pack(pady=3, fill="x")
+        self.help_label = tk.Label(form, font=("Arial", 9), fg="gray")
+        self.help_label.pack()
+        tk.Button(form, text="Fill All", command=self.fill_all).pack(pady=3)
 
         # ===== Save Button =====
-        save_btn = tk.Button(self.top, text="Save Lattice", command=self.save_lattice)
-        save_btn.pack(pady=10)
+        save_btn = tk.Button(form, text="Save Lattice", command=self.save_lattice)
+        save_btn.pack(pady=8)
+        tk.Button(form, text="Plot Lattice", command=self.plot_lattice).pack(pady=3)
 
+        # ===== Hex map =====
+        right = tk.Frame(self.top)
+        right.pack(side="left", fill="both", expand=True, padx=6, pady=10)
+        self.canvas = tk.Canvas(right, width=MAP_SIZE, height=MAP_SIZE, bg="white")
+        self.canvas.pack()
+        self.status = tk.Label(right, text="", anchor="w")
+        self.status.pack(fill="x")
+        self.canvas.bind("<Button-1>", self.paint)
+        self.canvas.bind("<B1-Motion>", self.paint)
+        self.canvas.bind("<Shift-Button-1>", self.shift_click)
+        self.canvas.bind("<Shift-B1-Motion>", self.extend_selection)
+        self.canvas.bind("<Control-Button-1>", self.paste)
+        self.canvas.bind("<Button-3>", self.pick)
+        self.canvas.bind("<Motion>", self.show_position)
+
+        # ===== Rect pattern tools =====
+        self.rect_tools = tk.Frame(right)
+        tk.Label(self.rect_tools, text="Replace:").grid(row=0, column=0, padx=2)
+        self.replace_dropdown = ttk.Combobox(self.rect_tools, values=self.universes, state="readonly", width=14)
+        self.replace_dropdown.grid(row=0, column=1, padx=2)
+        tk.Button(self.rect_tools, text="with Brush", command=self.replace_universe).grid(row=0, column=2, padx=2)
+        tk.Button(self.rect_tools, text="Fill Selection", command=self.fill_selection).grid(row=0, column=3, padx=2)
+        tk.Button(self.rect_tools, text="Mirror 1/4", command=lambda: self.mirror("quarter")).grid(
+            row=1, column=0, padx=2, pady=3)
+        tk.Button(self.rect_tools, text="Mirror 1/8", command=lambda: self.mirror("eighth")).grid(
+            row=1, column=1, padx=2, pady=3)
+        tk.Button(self.rect_tools, text="Copy Selection", command=self.copy_selection).grid(
+            row=1, column=2, padx=2, pady=3)
 
         #credit
         tk.Label(
@@ -55,44 +156,356 @@ class LatticeBuilder:
             justify="right"
         ).place(relx=0.98, rely=0.98, anchor="se")
 
+        self.show_type_widgets()
+        self.draw_map()
 
-        
-
-    # -------- Load universes from JSON --------
+    # -------- Load universes from the project --------
     def load_universes(self):
-        path = os.path.join("output", "universes.json")
-        if not os.path.exists(path):
-            return []
+        return list(get_project().universes.keys())
+
+    def is_rect(self):
+        return isinstance(self.lattice, RectLatticeMap)
+
+    def change_type(self):
+        """Switch the editor between hex and rect maps, starting from an empty map."""
+        rect = self.type_dropdown.get() == "Rect"
+        if rect == self.is_rect():
+            return
+        self.selection = None
+        if rect:
+            self.lattice = RectLatticeMap(self.rect_shape() or (1, 17, 17))
+        else:
+            self.lattice = HexLatticeMap(int(self.num_rings_spin.get()))
+        self.show_type_widgets()
+        self.draw_map()
+
+    def show_type_widgets(self):
+        rect = self.is_rect()
+        self.type_dropdown.set("Rect" if rect else "Hex")
+        (self.hex_frame if rect else self.rect_frame).pack_forget()
+        (self.rect_frame if rect else self.hex_frame).pack(in_=self.type_anchor)
+        if rect:
+            self.layer_spin.config(to=self.lattice.shape[0] - 1)
+            self.rect_tools.pack(pady=4)
+            self.help_label.config(text="Click/drag: paint   Shift+drag: select\n"
+                                        "Ctrl+click: paste copy   Right click: pick universe")
+        else:
+            self.rect_tools.pack_forget()
+            self.help_label.config(text="Click/drag: paint   Shift+click: whole ring\nRight click: pick universe")
+
+    def load_lattice(self, name):
+        data = self.project.lattices.get(name)
+        if not data:
+            return
+        try:
+            if data.get("type") == "rect":
+                self.lattice = RectLatticeMap.from_record(data)
+            else:
+                self.lattice = HexLatticeMap.from_record(data)
+        except (ValueError, KeyError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.selection = None
+        self.pitch_entry.delete(0, tk.END)
+        self.pitch_entry.insert(0, str(data.get("pitch", "")))
+        self.outer_dropdown.set(data.get("outer") or "")
+        if self.is_rect():
+            for entry, n in zip(self.dim_entries, data["dimension"]):
+                entry.delete(0, tk.END)
+                entry.insert(0, str(n))
+            self.lower_left_entry.delete(0, tk.END)
+            if data.get("lower_left"):
+                self.lower_left_entry.insert(0, ",".join(str(v) for v in data["lower_left"]))
+        else:
+            self.orientation_dropdown.set(data.get("orientation", "y"))
+            self.num_rings_spin.delete(0, tk.END)
+            self.num_rings_spin.insert(0, str(self.lattice.n_rings))
+        self.show_type_widgets()
+        self.draw_map()
+
+    # -------- Hex map drawing --------
+    def tile_color(self, k):
+        index = self.lattice.indices[k]
+        if index == EMPTY:
+            return EMPTY_COLOR
+        name = self.lattice.palette[index]
+        return self.colors[self.universes.index(name)] if name in self.universes else EMPTY_COLOR
+
+    def draw_map(self):
+        """Redraw every tile (after a change in ring count or orientation)."""
+        if self.is_rect():
+            self.draw_rect_map()
+            return
+        self.canvas.delete("all")
+        self.tile_items, self.item_index = [], {}
+        n = self.lattice.n_rings
+        ij = hex_positions(n).astype(float)
+        # Tile centres in units of pitch; 'y' lattices stack tiles along y
+        cx, cy = ij[:, 0] * SQRT3 / 2, ij[:, 0] / 2 + ij[:, 1]
+        angles = np.radians(np.arange(0, 360, 60))
+        if self.orientation_dropdown.get() == "x":
+            cx, cy = cy, cx
+            angles = angles + np.pi / 6
+        scale = (MAP_SIZE / 2 - 10) / (n - 0.5 + 1 / SQRT3)
+        corners = np.stack([np.cos(angles), np.sin(angles)], axis=1) / SQRT3 * scale
+
+        for k in range(len(ij)):
+            x, y = MAP_SIZE / 2 + cx[k] * scale, MAP_SIZE / 2 - cy[k] * scale
+            points = (corners + [x, y]).ravel().tolist()
+            item = self.canvas.create_polygon(points, fill=self.tile_color(k), outline="gray40")
+            self.tile_items.append(item)
+            self.item_index[item] = k
+
+    def update_tile(self, k):
+        self.canvas.itemconfig(self.tile_items[k], fill=self.tile_color(k))
+
+    def tile_at(self, event):
+        for item in self.canvas.find_overlapping(event.x, event.y, event.x, event.y):
+            if item in self.item_index:
+                return self.item_index[item]
+        return None
+
+    def ring_of(self, k):
+        """(ring radius, position in ring) for flat index k."""
+        for r in range(self.lattice.n_rings):
+            s = self.lattice.ring_slice(r)
+            if s.start <= k < s.stop:
+                return r, k - s.start
+        return None, None
+
+    # -------- Rect map drawing --------
+    def layer(self):
+        """Current layer index, clamped to the map."""
+        try:
+            z = int(self.layer_spin.get())
+        except ValueError:
+            z = 0
+        return max(0, min(z, self.lattice.shape[0] - 1))
+
+    def edit_layer(self):
+        """Layer argument for RectLatticeMap operations (None = every layer)."""
+        return None if self.all_layers_var.get() else self.layer()
+
+    def draw_rect_map(self):
+        """Render the current layer as one image: one colour block per position."""
+        _, ny, nx = self.lattice.shape
+        self.cell_px = max(1, MAP_SIZE // max(nx, ny))
+        # palette index -> universe colour row; unknown names and EMPTY use the last (grey) row
+        n = len(self.universes)
+        lookup = np.array([self.universes.index(u) if u in self.universes else -1 for u in self.lattice.palette] + [-1])
+        indices = lookup[self.lattice.indices[self.layer()]]
+        indices = np.repeat(np.repeat(indices, self.cell_px, axis=0), self.cell_px, axis=1)
+        if self.cell_px >= 6:
+            indices[::self.cell_px, :] = n
+            indices[:, ::self.cell_px] = n
+        colors = np.vstack([palette(n)[:-1], [GRID_RGB], [[int(EMPTY_COLOR[i:i + 2], 16) for i in (1, 3, 5)]]])
+        self.map_image = tile_image(indices, colors.astype(np.uint8))
+        self.canvas.delete("all")
+        self.canvas.create_image(0, 0, image=self.map_image, anchor="nw")
+        self.draw_selection()
+
+    def draw_selection(self):
+        self.canvas.delete("selection")
+        if self.selection:
+            r0, c0, r1, c1 = self.selection
+            s = self.cell_px
+            self.canvas.create_rectangle(c0 * s, r0 * s, (c1 + 1) * s, (r1 + 1) * s,
+                                         outline="red", width=2, tags="selection")
+
+    def cell_at(self, event):
+        """(row, col) under the pointer, row 0 at the top, or None."""
+        _, ny, nx = self.lattice.shape
+        row, col = event.y // self.cell_px, event.x // self.cell_px
+        return (row, col) if 0 <= row < ny and 0 <= col < nx else None
+
+    def rect_shape(self):
+        """(nz, ny, nx) from the dimension entries, or None if invalid."""
+        try:
+            nx, ny, nz = (int(e.get()) for e in self.dim_entries)
+        except ValueError:
+            return None
+        if min(nx, ny, nz) < 1 or max(nx, ny) > MAP_SIZE:
+            return None
+        return nz, ny, nx
+
+    # -------- Editing --------
+    def brush(self):
+        selection = self.brush_list.curselection()
+        if not selection:
+            messagebox.showerror("Error", "Select a universe to paint with.")
+            return None
+        return self.lattice.palette_index(self.universes[selection[0]])
+
+    def paint(self, event):
+        if self.is_rect():
+            cell = self.cell_at(event)
+            value = self.brush() if cell is not None else None
+            if value is not None:
+                layer = self.edit_layer()
+                z = slice(None) if layer is None else layer
+                if (self.lattice.indices[z, cell[0], cell[1]] != value).any():
+                    self.lattice.indices[z, cell[0], cell[1]] = value
+                    self.draw_rect_map()
+            self.show_position(event)
+            return
+        k = self.tile_at(event)
+        if k is None:
+            return
+        value = self.brush()
+        if value is not None and self.lattice.indices[k] != value:
+            self.lattice.indices[k] = value
+            self.update_tile(k)
+        self.show_position(event)
+
+    def shift_click(self, event):
+        if self.is_rect():
+            cell = self.cell_at(event)
+            self.selection = cell + cell if cell else None
+            self.selection_anchor = cell
+            self.draw_selection()
+        else:
+            self.paint_ring(event)
+
+    def extend_selection(self, event):
+        if not self.is_rect() or not self.selection:
+            return
+        cell = self.cell_at(event)
+        if cell:
+            r0, c0 = self.selection_anchor
+            self.selection = (min(r0, cell[0]), min(c0, cell[1]), max(r0, cell[0]), max(c0, cell[1]))
+            self.draw_selection()
+
+    def paint_ring(self, event):
+        k = self.tile_at(event)
+        value = self.brush() if k is not None else None
+        if value is None:
+            return
+        ring = self.lattice.ring_slice(self.ring_of(k)[0])
+        for j in range(ring.start, ring.stop):
+            if self.lattice.indices[j] != value:
+                self.lattice.indices[j] = value
+                self.update_tile(j)
 
+    def pick(self, event):
+        if self.is_rect():
+            cell = self.cell_at(event)
+            if cell is None:
+                return
+            index = self.lattice.indices[self.layer(), cell[0], cell[1]]
+        else:
+            k = self.tile_at(event)
+            if k is None:
+                return
+            index = self.lattice.indices[k]
+        if index == EMPTY:
+            return
+        name = self.lattice.palette[index]
+        if name in self.universes:
+            i = self.universes.index(name)
+            self.brush_list.selection_clear(0, tk.END)
+            self.brush_list.selection_set(i)
+            self.brush_list.see(i)
+            self.replace_dropdown.set(name)
+
+    def fill_all(self):
+        value = self.brush()
+        if value is None:
+            return
+        if self.is_rect():
+            self.lattice.fill(value, layer=self.edit_layer())
+            self.draw_rect_map()
+            return
+        self.lattice.indices[:] = value
+        for k in range(len(self.tile_items)):
+            self.update_tile(k)
+
+    # -------- Rect pattern tools --------
+    def fill_selection(self):
+        if not self.selection:
+            messagebox.showerror("Error", "Shift+drag on the map to select a block first.")
+            return
+        value = self.brush()
+        if value is None:
+            return
+        r0, c0, r1, c1 = self.selection
+        self.lattice.fill(value, slice(r0, r1 + 1), slice(c0, c1 + 1), layer=self.edit_layer())
+        self.draw_rect_map()
+
+    def replace_universe(self):
+        old = self.replace_dropdown.get()
+        if old not in self.lattice.palette:
+            messagebox.showerror("Error", "Pick a universe used in the map to replace.")
+            return
+        value = self.brush()
+        if value is None:
+            return
+        self.lattice.replace(self.lattice.palette.index(old), value, layer=self.edit_layer())
+        self.draw_rect_map()
+
+    def mirror(self, symmetry):
         try:
-            with open(path, "r") as f:
-                data = json.load(f)
-            if isinstance(data, dict):
-                return list(data.keys())
-            elif isinstance(data, list):
-                return [u.get("name", f"Universe_{i}") for i, u in enumerate(data)]
-            return []
-        except Exception as e:
-            print(f"Failed to load universes.json: {e}")
-            return []
-
-    # -------- Create ring dropdowns dynamically --------
-    def create_ring_inputs(self):
-        # Clear existing entries
-        for widget in self.rings_frame.winfo_children():
-            widget.destroy()
-        self.ring_entries = []
+            self.lattice.mirror(symmetry, layer=self.edit_layer())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.draw_rect_map()
 
+    def copy_selection(self):
+        if not self.selection:
+            messagebox.showerror("Error", "Shift+drag on the map to select a block first.")
+            return
+        r0, c0, r1, c1 = self.selection
+        self.clipboard = self.lattice.indices[self.layer(), r0:r1 + 1, c0:c1 + 1].copy()
+        self.status.config(text=f"Copied {self.clipboard.shape[0]}x{self.clipboard.shape[1]} block; "
+                                "Ctrl+click to paste")
+
+    def paste(self, event):
+        if not self.is_rect() or self.clipboard is None:
+            return
+        cell = self.cell_at(event)
+        if cell:
+            self.lattice.stamp(self.clipboard, cell[0], cell[1], layer=self.edit_layer())
+            self.draw_rect_map()
+
+    def resize_map(self):
+        if self.is_rect():
+            shape = self.rect_shape()
+            if shape is None:
+                messagebox.showerror("Error", f"Nx, Ny and Nz must be positive integers (Nx, Ny at most {MAP_SIZE}).")
+                return
+            if shape != self.lattice.shape:
+                self.lattice = self.lattice.resized(shape)
+                self.selection = None
+                self.layer_spin.config(to=shape[0] - 1)
+            self.draw_map()
+            return
         try:
-            num_rings = int(self.num_rings_spin.get())
+            n = int(self.num_rings_spin.get())
         except ValueError:
-            num_rings = 1
+            return
+        n = max(1, min(n, MAX_RINGS))
+        if n != self.lattice.n_rings:
+            self.lattice = self.lattice.resized(n)
+            self.draw_map()
 
-        for i in range(num_rings, 0, -1):  # outer to inner
-            tk.Label(self.rings_frame, text=f"Ring {i} universes (comma-separated names):", font=("Arial", 10)).pack(anchor="w", pady=2)
-            entry = tk.Entry(self.rings_frame, width=50)
-            entry.pack(pady=2)
-            self.ring_entries.append(entry)
+    def show_position(self, event):
+        if self.is_rect():
+            cell = self.cell_at(event)
+            if cell is None:
+                self.status.config(text="")
+                return
+            index = self.lattice.indices[self.layer(), cell[0], cell[1]]
+            name = self.lattice.palette[index] if index != EMPTY else "(empty)"
+            self.status.config(text=f"Row {cell[0]} (0 = top), column {cell[1]}, layer {self.layer()}: {name}")
+            return
+        k = self.tile_at(event)
+        if k is None:
+            self.status.config(text="")
+            return
+        r, pos = self.ring_of(k)
+        index = self.lattice.indices[k]
+        name = self.lattice.palette[index] if index != EMPTY else "(empty)"
+        self.status.config(text=f"Ring {r} (0 = centre), position {pos}: {name}")
 
     # -------- Save lattice to lattice.py and lattices.json --------
     def save_lattice(self):
@@ -101,72 +514,66 @@ class LatticeBuilder:
         orientation = self.orientation_dropdown.get().strip()
         outer = self.outer_dropdown.get().strip()
 
-        if not name or not pitch or not orientation or not outer:
+        # rect lattices may leave the outer universe unset; hex lattices always had one
+        if not name or not pitch or not (outer or self.is_rect()):
             messagebox.showerror("Error", "Please fill in all lattice fields.")
             return
-
-        # Collect rings
-        rings = []
-        for entry in self.ring_entries:
-            text = entry.get().strip()
-            if not text:
-                messagebox.showerror("Error", "Please fill in all ring fields.")
+        if not name.isidentifier():
+            messagebox.showerror("Error", "Lattice name must be a valid Python identifier.")
+            return
+        if self.is_rect():
+            record = {"name": name, "file": "", "pitch": pitch, "outer": outer, **self.lattice.to_record()}
+            lower_left = self.lower_left_entry.get().strip()
+            try:
+                rect_pitch(record)
+                if lower_left:
+                    record["lower_left"] = [float(v) for v in lower_left.split(",")]
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid pitch or lower left: {e}")
                 return
-
+            if lower_left and len(record["lower_left"]) != len(rect_pitch(record)):
+                messagebox.showerror("Error", "Lower left needs one value per pitch (x,y or x,y,z).")
+                return
+        else:
             try:
-                # Replace universe names with universes['name']
-                safe_text = text
-                for uni in self.universes:
-                    safe_text = safe_text.replace(uni, f"universes['{uni}']")
-
-                # Evaluate using eval with a safe environment where 'universes' is defined
-                ring_obj = eval(safe_text, {"universes": {u: f"universes['{u}']" for u in self.universes}})
-                rings.append(ring_obj)
-
-            except Exception as e:
-                messagebox.showerror("Error", f"Invalid ring format: {text}\n{e}")
+                [float(p) for p in pitch.split(",")]
+            except ValueError:
+                messagebox.showerror("Error", f"Invalid pitch: {pitch}")
                 return
+            record = {"name": name, "file": "", "pitch": pitch, "orientation": orientation, "outer": outer}
 
-        # Ensure output folder exists
+        empty = int((self.lattice.indices == EMPTY).sum())
+        if empty:
+            messagebox.showerror("Error", f"{empty} lattice positions have no universe; paint them first.")
+            return
+        self.lattice.compact()
+        unknown = [u for u in self.lattice.palette if u not in self.universes]
+        if unknown:
+            messagebox.showerror("Error", f"Unknown universes in lattice: {', '.join(unknown)}")
+            return
+
+        # ---- Update lattices.json ----
         os.makedirs("output", exist_ok=True)
         output_path = os.path.join("output", "lattice.py")
+        lattices = self.project.lattices
+        record["file"] = output_path
+        record.update(self.lattice.to_record())
+        lattices[name] = record
+        self.project.mark_dirty("lattices")
+        self.project.save(["lattices"])
 
-        # Generate Python code
-        code_lines = [
-            "import openmc\n",
-            "from geometry import universes\n\n",
-            f"{name} = openmc.HexLattice(name='{name}')\n",
-            f"{name}.center = (0., 0.)\n",
-            f"{name}.pitch = ({pitch},)\n",
-            f"{name}.orientation = '{orientation}'\n",
-            f"{name}.outer = universes['{outer}']\n\n",
-            f"{name}.universes = [\n"
-        ]
-        for r in rings:
-            code_lines.append(f"    {r},\n")
-        code_lines.append("]\n")
-
+        # lattice.py defines every lattice from its palette and index map (no eval)
         with open(output_path, "w") as f:
-            f.writelines(code_lines)
-
-        # ---- Update lattices.json ----
-        lattices_json_path = os.path.join("output", "lattices.json")
-        if os.path.exists(lattices_json_path):
-            with open(lattices_json_path, "r") as f:
-                try:
-                    lattices = json.load(f)
-                except Exception:
-                    lattices = {}
-        else:
-            lattices = {}
-
-        lattices[name] = {
-            "name": name,
-            "file": output_path
-        }
-
-        with open(lattices_json_path, "w") as f:
-            json.dump(lattices, f, indent=4)
+            f.writelines(lattices_python(lattices))
 
+        self.name_entry.config(values=list(lattices))
         messagebox.showinfo("Success", f"Lattice saved to {output_path} and recorded in lattices.json")
-        self.top.destroy()
+
+    def plot_lattice(self):
+        """Slice plot of the saved lattice named in the entry."""
+        name = self.name_entry.get().strip()
+        if name not in get_project().lattices:
+            messagebox.showerror("Error", "Save the lattice before plotting it.")
+            return
+        from .slice_plotter import SlicePlotter
+        SlicePlotter(self.top, lattice=name, title=f"Lattice {name}")
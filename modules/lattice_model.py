@@ -0,0 +1,283 @@
+"""Compact storage for lattice maps.
+
+A lattice is stored in lattices.json as a palette of universe names plus
+one flat integer array with an index into the palette for every position.
+Hex lattices list positions ring by ring from the outermost ring inwards,
+each ring in OpenMC's HexLattice order; rectangular lattices are a
+C-ordered (nz, ny, nx) array laid out like RectLattice.universes (z from
+the bottom, rows from the top). A 17-ring core is then 817 small integers
+instead of 817 repeated names, and edits only touch array elements.
+"""
+import numpy as np
+
+# Axial steps around a hex ring, starting at the top and going clockwise
+# (orientation 'y'; 'x' lattices are the same with x and y swapped)
+RING_STEPS = ((1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1), (1, 0))
+EMPTY = -1
+MAX_RINGS = 60
+
+
+def hex_ring_positions(r):
+    """Axial (i, j) indices of ring r in OpenMC's HexLattice order."""
+    if r == 0:
+        return [(0, 0)]
+    positions = []
+    i, j = 0, r
+    for di, dj in RING_STEPS:
+        for _ in range(r):
+            positions.append((i, j))
+            i, j = i + di, j + dj
+    return positions
+
+
+def ring_size(r):
+    return 6 * r if r else 1
+
+
+def hex_positions(n_rings):
+    """Axial (i, j) for every flat map index, outermost ring first."""
+    positions = []
+    for r in range(n_rings - 1, -1, -1):
+        positions.extend(hex_ring_positions(r))
+    return np.array(positions, dtype=np.int64).reshape(-1, 2)
+
+
+class HexLatticeMap:
+    def __init__(self, n_rings, palette=None, indices=None):
+        self.n_rings = n_rings
+        self.palette = list(palette or [])
+        size = 3 * n_rings * (n_rings - 1) + 1
+        self.indices = np.full(size, EMPTY, dtype=np.int32) if indices is None else np.asarray(indices, dtype=np.int32)
+        if len(self.indices) != size:
+            raise ValueError(f"Lattice map has {len(self.indices)} entries, expected {size} for {n_rings} rings")
+
+    @classmethod
+    def from_record(cls, data):
+        """Read a lattices.json record (palette/map, or the older list of ring name lists)."""
+        if "map" in data:
+            return cls(int(data["n_rings"]), data["palette"], data["map"])
+        if "rings" in data:
+            palette = list(dict.fromkeys(u for ring in data["rings"] for u in ring))
+            index = {u: i for i, u in enumerate(palette)}
+            flat = [index[u] for ring in data["rings"] for u in ring]
+            return cls(len(data["rings"]), palette, flat)
+        raise ValueError(f"Lattice '{data.get('name', '')}' has no map; re-save it in the Lattice Builder")
+
+    def to_record(self):
+        return {"n_rings": self.n_rings, "palette": self.palette, "map": self.indices.tolist()}
+
+    def ring_slice(self, r):
+        """Flat index range of ring r (0 = centre)."""
+        # rings outside r hold 3 * (R(R+1) - r(r+1)) entries, R = n_rings - 1
+        R = self.n_rings - 1
+        start = 3 * (R * (R + 1) - r * (r + 1))
+        return slice(start, start + ring_size(r))
+
+    def palette_index(self, universe):
+        """Index of universe in the palette, adding it if new."""
+        if universe not in self.palette:
+            self.palette.append(universe)
+        return self.palette.index(universe)
+
+    def rings(self):
+        """Universe names ring by ring, outermost first (OpenMC HexLattice.universes layout)."""
+        if (self.indices < 0).any():
+            raise ValueError(f"{int((self.indices < 0).sum())} lattice positions have no universe")
+        names = np.array(self.palette, dtype=object)[self.indices]
+        return [names[self.ring_slice(r)].tolist() for r in range(self.n_rings - 1, -1, -1)]
+
+    def used_universes(self):
+        return [self.palette[i] for i in np.unique(self.indices[self.indices >= 0]).tolist()]
+
+    def resized(self, n_rings):
+        """Copy with n_rings rings; rings keep their radius, new outer rings are empty."""
+        new = HexLatticeMap(n_rings, self.palette)
+        for r in range(min(n_rings, self.n_rings)):
+            new.indices[new.ring_slice(r)] = self.indices[self.ring_slice(r)]
+        return new
+
+    def compact(self):
+        """Drop palette entries no position uses."""
+        used = np.unique(self.indices[self.indices >= 0])
+        remap = np.full(len(self.palette) + 1, EMPTY, dtype=np.int32)
+        remap[used] = np.arange(len(used))
+        self.indices = np.where(self.indices >= 0, remap[self.indices], EMPTY).astype(np.int32)
+        self.palette = [self.palette[i] for i in used.tolist()]
+
+
+class RectLatticeMap:
+    """(nz, ny, nx) palette-index array; every operation is a NumPy slice or mask."""
+
+    def __init__(self, shape, palette=None, indices=None):
+        self.shape = tuple(int(n) for n in shape)
+        self.palette = list(palette or [])
+        if indices is None:
+            self.indices = np.full(self.shape, EMPTY, dtype=np.int32)
+        else:
+            self.indices = np.asarray(indices, dtype=np.int32).reshape(self.shape)
+
+    @classmethod
+    def from_record(cls, data):
+        nx, ny, nz = data["dimension"]
+        return cls((nz, ny, nx), data["palette"], data["map"])
+
+    def to_record(self):
+        nz, ny, nx = self.shape
+        return {"type": "rect", "dimension": [nx, ny, nz], "palette": self.palette, "map": self.indices.ravel().tolist()}
+
+    def palette_index(self, universe):
+        if universe not in self.palette:
+            self.palette.append(universe)
+        return self.palette.index(universe)
+
+    def used_universes(self):
+        return [self.palette[i] for i in np.unique(self.indices[self.indices >= 0]).tolist()]
+
+    def _layers(self, layer):
+        return self.indices if layer is None else self.indices[layer:layer + 1]
+
+    # ---------------- Bulk operations ----------------
+    def fill(self, value, rows=slice(None), cols=slice(None), layer=None):
+        self._layers(layer)[:, rows, cols] = value
+
+    def replace(self, old, new, layer=None):
+        layers = self._layers(layer)
+        layers[layers == old] = new
+
+    def mirror(self, symmetry="quarter", layer=None):
+        """Copy the top-left quadrant (for 'eighth', its upper triangle) to the rest of the map."""
+        layers = self._layers(layer)
+        _, ny, nx = layers.shape
+        h, w = (ny + 1) // 2, (nx + 1) // 2
+        if symmetry == "eighth":
+            if ny != nx:
+                raise ValueError("1/8 symmetry needs a square lattice")
+            quad = layers[:, :h, :w]
+            # reflect about the quadrant diagonal through the lattice centre: (i, j) <- (j, i)
+            lower = np.tril(np.ones((h, w), dtype=bool), -1)
+            quad[:, lower] = np.swapaxes(quad, 1, 2)[:, lower]
+        layers[:, :h, nx - w:] = layers[:, :h, :w][:, :, ::-1]
+        layers[:, ny - h:, :] = layers[:, :h, :][:, ::-1, :]
+
+    def stamp(self, pattern, row, col, layer=None):
+        """Paste a 2-D index pattern with its top-left corner at (row, col); EMPTY entries are transparent."""
+        pattern = np.asarray(pattern, dtype=np.int32)
+        layers = self._layers(layer)
+        _, ny, nx = layers.shape
+        r0, c0 = max(row, 0), max(col, 0)
+        r1, c1 = min(row + pattern.shape[0], ny), min(col + pattern.shape[1], nx)
+        if r1 <= r0 or c1 <= c0:
+            return
+        piece = pattern[r0 - row:r1 - row, c0 - col:c1 - col]
+        target = layers[:, r0:r1, c0:c1]
+        target[:] = np.where(piece >= 0, piece, target)
+
+    def resized(self, shape):
+        """Copy with a new (nz, ny, nx); the overlapping top-left block is kept."""
+        new = RectLatticeMap(shape, self.palette)
+        nz, ny, nx = (min(a, b) for a, b in zip(shape, self.shape))
+        new.indices[:nz, :ny, :nx] = self.indices[:nz, :ny, :nx]
+        return new
+
+    def compact(self):
+        used = np.unique(self.indices[self.indices >= 0])
+        remap = np.full(len(self.palette) + 1, EMPTY, dtype=np.int32)
+        remap[used] = np.arange(len(used))
+        self.indices = np.where(self.indices >= 0, remap[self.indices], EMPTY).astype(np.int32)
+        self.palette = [self.palette[i] for i in used.tolist()]
+
+
+def lattice_from_record(data):
+    """HexLatticeMap or RectLatticeMap for a lattices.json record."""
+    if data.get("type") == "rect":
+        return RectLatticeMap.from_record(data)
+    return HexLatticeMap.from_record(data)
+
+
+def rect_pitch(data):
+    """(px, py[, pz]) of a rect lattice record; a single value means square tiles."""
+    pitch = [float(p) for p in str(data["pitch"]).split(",")]
+    if len(pitch) == 1:
+        pitch = pitch * 2
+    nz = data["dimension"][2]
+    if nz > 1 and len(pitch) < 3:
+        raise ValueError(f"Lattice '{data.get('name', '')}' has {nz} axial layers but no z pitch")
+    return tuple(pitch[:3] if nz > 1 else pitch[:2])
+
+
+def rect_lower_left(data):
+    """Saved lower_left, or the corner that centres the lattice on the origin."""
+    if data.get("lower_left"):
+        return tuple(float(v) for v in data["lower_left"])
+    pitch = rect_pitch(data)
+    return tuple(-n * p / 2 for n, p in zip(data["dimension"], pitch))
+
+
+def lattice_rings(data):
+    """Ring lists of universe names for a hex lattices.json record."""
+    return HexLatticeMap.from_record(data).rings()
+
+
+def lattice_universes(data):
+    """Names of the universes a lattices.json record uses (outer excluded)."""
+    try:
+        return lattice_from_record(data).used_universes()
+    except (ValueError, KeyError):
+        return []
+
+
+# ---------------- Python output ----------------
+def rect_lattice_python(name, data):
+    """Code lines defining one RectLattice; the map is reshaped with NumPy."""
+    lattice = RectLatticeMap.from_record(data)
+    nz, ny, nx = lattice.shape
+    lines = [
+        f"{name} = openmc.RectLattice(name='{name}')\n",
+        f"{name}.pitch = {rect_pitch(data)}\n",
+        f"{name}.lower_left = {rect_lower_left(data)}\n",
+    ]
+    if data.get("outer"):
+        lines.append(f"{name}.outer = universes['{data['outer']}']\n")
+    lines.append(f"_palette = np.array([{', '.join(f'universes[{u!r}]' for u in lattice.palette)}], dtype=object)\n")
+    lines.append("_map = np.array([\n")
+    flat = lattice.indices.ravel().tolist()
+    for start in range(0, len(flat), nx):
+        lines.append("    " + ", ".join(map(str, flat[start:start + nx])) + ",\n")
+    shape = (ny, nx) if nz == 1 else (nz, ny, nx)
+    lines.append(f"]).reshape{shape}\n")
+    lines.append(f"{name}.universes = _palette[_map]\n\n")
+    return lines
+
+
+def lattice_python(name, data, per_line=30):
+    """Code lines defining one lattice from its palette and index map, without name lookups per position."""
+    if data.get("type") == "rect":
+        return rect_lattice_python(name, data)
+    lattice = HexLatticeMap.from_record(data)
+    pitch = str(data["pitch"]).strip()
+    lines = [
+        f"{name} = openmc.HexLattice(name='{name}')\n",
+        f"{name}.center = (0., 0.)\n",
+        f"{name}.pitch = ({pitch},)\n",
+        f"{name}.orientation = '{data['orientation']}'\n",
+    ]
+    if data.get("outer"):
+        lines.append(f"{name}.outer = universes['{data['outer']}']\n")
+    lines.append(f"_palette = [{', '.join(f'universes[{u!r}]' for u in lattice.palette)}]\n")
+    lines.append("_map = [\n")
+    flat = lattice.indices.tolist()
+    for start in range(0, len(flat), per_line):
+        lines.append("    " + ", ".join(map(str, flat[start:start + per_line])) + ",\n")
+    lines.append("]\n")
+    bounds = [lattice.ring_slice(r) for r in range(lattice.n_rings - 1, -1, -1)]
+    lines.append(f"_rings = {[(b.start, b.stop) for b in bounds]}\n")
+    lines.append(f"{name}.universes = [[_palette[i] for i in _map[a:b]] for a, b in _rings]\n\n")
+    return lines
+
+
+def lattices_python(lattices):
+    """Full lattice.py for every lattice in lattices.json."""
+    lines = ["import numpy as np\n", "import openmc\n", "from geometry import universes\n\n"]
+    for name, data in lattices.items():
+        lines.extend(lattice_python(name, data))
+    return lines
@@ -0,0 +1,174 @@
+"""How OpenMC is launched on this machine: MPI ranks x OpenMP threads.
+
+The CPU layout is read from Linux sysfs (physical cores and NUMA nodes),
+falling back to os.cpu_count() elsewhere. The suggested layout is one MPI
+rank per NUMA node (when an mpiexec is available) with one thread per
+physical core of that node, so tally and cross-section memory stays local
+to each node. Threads are bound with OMP_PROC_BIND / OMP_PLACES.
+
+Profiles are stored per host name in ~/.openmc_gui/launch_profiles.json, so
+a project moved between a laptop and a cluster node uses each machine's
+own layout.
+"""
+import os
+import glob
+import shutil
+import socket
+import subprocess
+
+from .project import load_json, atomic_write_json
+
+PROFILE_PATH = os.path.join(os.path.expanduser("~"), ".openmc_gui", "launch_profiles.json")
+BIND_OPTIONS = ["close", "spread", "master", "false"]
+PLACES_OPTIONS = ["cores", "threads", "sockets"]
+
+
+# ---------------- Topology ----------------
+def _parse_cpulist(text):
+    """CPU numbers of a sysfs list such as '0-3,8-11'."""
+    cpus = set()
+    for part in text.strip().split(","):
+        if "-" in part:
+            lo, hi = part.split("-")
+            cpus.update(range(int(lo), int(hi) + 1))
+        elif part:
+            cpus.add(int(part))
+    return cpus
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def detect_topology():
+    """{'logical', 'physical', 'numa_nodes': [[cpu, ...], ...]} for the CPUs this process may use."""
+    try:
+        allowed = set(os.sched_getaffinity(0))
+    except AttributeError:
+        allowed = set(range(os.cpu_count() or 1))
+
+    cores = set()
+    for cpu in allowed:
+        base = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        try:
+            cores.add((_read(f"{base}/physical_package_id").strip(), _read(f"{base}/core_id").strip()))
+        except OSError:
+            cores.add(("0", str(cpu)))   # no sysfs: count every logical CPU as a core
+
+    nodes = []
+    for path in sorted(glob.glob("/sys/devices/system/node/node[0-9]*/cpulist"),
+                       key=lambda p: int(p.split("node")[-1].split("/")[0])):
+        try:
+            cpus = sorted(_parse_cpulist(_read(path)) & allowed)
+        except (OSError, ValueError):
+            continue
+        if cpus:
+            nodes.append(cpus)
+    if not nodes:
+        nodes = [sorted(allowed)]
+    return {"logical": len(allowed), "physical": len(cores), "numa_nodes": nodes}
+
+
+def format_topology(topology):
+    nodes = topology["numa_nodes"]
+    smt = topology["logical"] // max(topology["physical"], 1)
+    text = f"{topology['physical']} physical cores, {topology['logical']} logical CPUs"
+    if smt > 1:
+        text += f" ({smt} threads per core)"
+    return text + f", {len(nodes)} NUMA node{'s' if len(nodes) != 1 else ''}"
+
+
+def find_mpiexec():
+    for name in ("mpiexec", "mpirun"):
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def mpi_flavor(mpiexec):
+    """'openmpi', 'mpich' (Hydra) or None, from `mpiexec --version`."""
+    try:
+        out = subprocess.run([mpiexec, "--version"], capture_output=True, text=True, timeout=5).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if "Open MPI" in out or "OpenRTE" in out:
+        return "openmpi"
+    if "HYDRA" in out or "MPICH" in out or "Intel" in out:
+        return "mpich"
+    return None
+
+
+def binding_args(flavor, threads):
+    """mpiexec options that give every rank its own block of threads cores."""
+    if flavor == "openmpi":
+        return f"--map-by numa:PE={threads} --bind-to core"
+    if flavor == "mpich":
+        return "-bind-to numa"
+    return ""
+
+
+# ---------------- Profiles ----------------
+def suggest_profile(topology=None, mpiexec=None):
+    """One rank per NUMA node with an mpiexec available, one thread per physical core."""
+    topology = topology or detect_topology()
+    mpiexec = mpiexec if mpiexec is not None else find_mpiexec()
+    nodes = len(topology["numa_nodes"])
+    ranks = nodes if mpiexec and nodes > 1 else 1
+    threads = max(1, topology["physical"] // ranks)
+    return {
+        "ranks": ranks,
+        "threads": threads,
+        "bind": "close",
+        "places": "cores",
+        "mpiexec": mpiexec or "",
+        "mpi_args": binding_args(mpi_flavor(mpiexec), threads) if ranks > 1 else "",
+        "openmc_exec": "openmc",
+    }
+
+
+def host_name():
+    return socket.gethostname()
+
+
+def load_profile(host=None, path=PROFILE_PATH):
+    """The saved profile of this host, or None."""
+    return load_json(path, {}).get(host or host_name())
+
+
+def save_profile(profile, host=None, path=PROFILE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profiles = load_json(path, {})
+    profiles[host or host_name()] = profile
+    atomic_write_json(path, profiles)
+
+
+def check_profile(profile):
+    ranks, threads = int(profile["ranks"]), int(profile["threads"])
+    if ranks < 1 or threads < 1:
+        raise ValueError("MPI ranks and OpenMP threads must be at least 1")
+    if ranks > 1 and not profile.get("mpiexec"):
+        raise ValueError("More than one MPI rank needs an mpiexec (OpenMC must be built with MPI)")
+    if profile.get("bind") not in BIND_OPTIONS or profile.get("places") not in PLACES_OPTIONS:
+        raise ValueError("Unknown thread binding or places setting")
+    return ranks, threads
+
+
+# ---------------- Command ----------------
+def build_command(profile, openmc_exec=None, args=()):
+    """(argv, environment overrides) that launch OpenMC with a profile."""
+    ranks, threads = check_profile(profile)
+    command = [openmc_exec or profile.get("openmc_exec") or "openmc", "--threads", str(threads), *args]
+    if ranks > 1:
+        command = [profile["mpiexec"], "-n", str(ranks), *profile.get("mpi_args", "").split(), *command]
+    env = {"OMP_NUM_THREADS": str(threads)}
+    if profile["bind"] != "false":
+        env["OMP_PROC_BIND"] = profile["bind"]
+        env["OMP_PLACES"] = profile["places"]
+    return command, env
+
+
+def format_command(profile, openmc_exec=None, args=()):
+    command, env = build_command(profile, openmc_exec, args)
+    return " ".join(f"{k}={v}" for k, v in env.items()) + " " + " ".join(command)
@@ -1,9 +1,9 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import openmc
+from tkinter import ttk, messagebox, filedialog
 import os
-import re
-import json
+from .project import get_project
+from .material_store import MaterialStore
+from .nuclide_catalog import NuclideCatalog, get_catalog
 
 
 
@@ -63,8 +63,11 @@ class MaterialBuilder(tk.Toplevel):
 
 
         # Variables
-        self.available_nuclides = COMMON_NUCLIDES
-        self.available_elements = ELEMENTS
+        # Nuclides/elements/S(a,b) from the selected cross_sections.xml, else the built-in lists
+        self.catalog = get_catalog() or NuclideCatalog(COMMON_NUCLIDES, ELEMENTS, THERMAL_SCATTERING[1:])
+        self.available_nuclides = self.catalog.nuclides
+        self.available_elements = self.catalog.elements
+        self.available_thermal = [""] + self.catalog.thermal
         self.input_type_var = tk.StringVar(value="nuclide")
         self.material_name_var = tk.StringVar()
         self.density_var = tk.StringVar()
@@ -107,8 +110,9 @@ class MaterialBuilder(tk.Toplevel):
 
         self.dropdown_label = tk.Label(f, text="Select Nuclide:", bg=BG_COLOR, fg=FG_COLOR)
         self.dropdown_label.pack(anchor='w', padx=80)
-        self.nuclide_combo = ttk.Combobox(f, values=self.available_nuclides, state='readonly')
+        self.nuclide_combo = ttk.Combobox(f, values=self.available_nuclides)
         self.nuclide_combo.pack(fill='x', padx=80)
+        self.nuclide_combo.bind("<KeyRelease>", self.filter_dropdown)
 
         self.enrichment_label = tk.Label(f, text="Enrichment (%) [optional]:", bg=BG_COLOR, fg=FG_COLOR)
         self.enrichment_entry = tk.Entry(f, textvariable=self.enrichment_var)
@@ -121,7 +125,7 @@ class MaterialBuilder(tk.Toplevel):
         self.nuclide_listbox.pack(fill='both', padx=80, pady=5, expand=True)
 
         tk.Label(f, text="Thermal Scattering (S(α,β)) [optional]:", bg=BG_COLOR, fg=FG_COLOR).pack(anchor='w', padx=80, pady=(5,0))
-        ttk.Combobox(f, textvariable=self.sab_var, values=THERMAL_SCATTERING, state="readonly").pack(fill='x', padx=80)
+        ttk.Combobox(f, textvariable=self.sab_var, values=self.available_thermal, state="readonly").pack(fill='x', padx=80)
         tk.Checkbutton(f, text="Depletable", variable=self.depletable_var).pack(anchor='w', padx=80, pady=3)
 
         # Mix materials
@@ -135,6 +139,7 @@ class MaterialBuilder(tk.Toplevel):
         self.mix_fractions_entry.pack(fill='x', padx=80)
 
         tk.Button(f, text="Save Material to XML and Python", command=self.save_material, bg=BTN_BG, fg=BTN_FG, activebackground="#50fa7b").pack(pady=5)
+        tk.Button(f, text="Import Compositions (CSV/NPZ)", command=self.import_compositions, bg=BTN_BG, fg=BTN_FG, activebackground="#50fa7b").pack(pady=5)
 
         self.update_dropdown()
 
@@ -152,23 +157,21 @@ class MaterialBuilder(tk.Toplevel):
             self.enrichment_entry.pack(fill='x', padx=80)
             self.dropdown_label.config(text="Select Element:")
 
+    def filter_dropdown(self, event=None):
+        """Narrow the nuclide/element list to names matching what was typed."""
+        if event is not None and event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        kind = "nuclides" if self.input_type_var.get() == "nuclide" else "elements"
+        self.nuclide_combo['values'] = self.catalog.search(self.nuclide_combo.get(), kind)
+
     def toggle_mix_options(self):
         if self.mix_var.get():
             self.prev_materials_listbox.config(state='normal')
             self.mix_fractions_entry.config(state='normal')
             # populate previous materials
-            py_file = "output/materials.py"
-            if os.path.exists(py_file):
-                with open(py_file, "r") as f:
-                    lines = f.readlines()
-                materials = []
-                for line in lines:
-                    if line.startswith("# Material:"):
-                        mat_name = line.split(":")[1].strip()
-                        materials.append(mat_name)
-                self.prev_materials_listbox.delete(0, tk.END)
-                for m in materials:
-                    self.prev_materials_listbox.insert(tk.END, m)
+            self.prev_materials_listbox.delete(0, tk.END)
+            for m in get_project().materials:
+                self.prev_materials_listbox.insert(tk.END, m)
         else:
             self.prev_materials_listbox.config(state='disabled')
             self.mix_fractions_entry.config(state='disabled')
@@ -182,6 +185,10 @@ class MaterialBuilder(tk.Toplevel):
         if not name:
             messagebox.showwarning("Input Error", f"Please select a {input_type}.")
             return
+        available = self.available_nuclides if input_type == "nuclide" else self.available_elements
+        if name not in available:
+            messagebox.showerror("Input Error", f"'{name}' is not an available {input_type}.")
+            return
         if not amount_str:
             messagebox.showwarning("Input Error", "Please enter the fraction amount.")
             return
@@ -214,6 +221,35 @@ class MaterialBuilder(tk.Toplevel):
         self.nuclide_combo.set('')
         self.nuclide_amount_var.set('')
         self.enrichment_var.set('')
+    def import_compositions(self):
+        """Bulk-add materials from a material x nuclide fraction table."""
+        path = filedialog.askopenfilename(
+            title="Select Composition Table",
+            filetypes=[("Composition tables", "*.csv *.npz"), ("All Files", "*.*")]
+        )
+        if not path:
+            return
+
+        # The Density field is used for rows that do not give their own density
+        density_str = self.density_var.get().strip()
+        try:
+            default_density = float(density_str) if density_str else None
+        except ValueError:
+            messagebox.showerror("Input Error", "Density must be a number.")
+            return
+
+        from .material_import import import_compositions
+        try:
+            # check nuclide names against the library when one is configured
+            catalog = get_catalog()
+            names = import_compositions(path, default_density=default_density, depletable=self.depletable_var.get(),
+                                        known_nuclides=set(catalog.nuclides) if catalog else None)
+        except Exception as e:
+            messagebox.showerror("Import Error", f"Could not import {os.path.basename(path)}:\n{e}")
+            return
+        messagebox.showinfo("Imported", f"{len(names)} materials imported from {os.path.basename(path)}\n"
+                            "Saved to output/materials.json and output/materials.xml")
+
     def save_material(self):
         name = self.material_name_var.get().strip()
         density_str = self.density_var.get().strip()
@@ -261,107 +297,10 @@ class MaterialBuilder(tk.Toplevel):
                 messagebox.showerror("Input Error", "Fractions must sum to 1.")
                 return
 
-        # Create OpenMC material
-        mat = openmc.Material(name=name)
-        mat.set_density('g/cm3', density)
-        if temperature is not None:
-            mat.temperature = temperature
-
-        if not is_mix:
-            # Normal material: add nuclides/elements
-            for entry in self.nuclide_list:
-                if entry['type'] == 'nuclide':
-                    mat.add_nuclide(entry['name'], entry['amount'])
-                else:
-                    if entry['enrichment'] is not None:
-                        mat.add_element(entry['name'], entry['amount'], enrichment=entry['enrichment'])
-                    else:
-                        mat.add_element(entry['name'], entry['amount'])
-
-        # Thermal scattering
-        if self.sab_var.get() and not is_mix:
-            mat.add_s_alpha_beta(self.sab_var.get())
-
-        # Depletable
-        mat.depletable = self.depletable_var.get()
-
-        # Save to XML
-        os.makedirs("output", exist_ok=True)
-        material_file = os.path.join("output", "materials.xml")
-        mats = openmc.Materials.from_xml(material_file) if os.path.exists(material_file) else openmc.Materials()
-
-        if is_mix:
-            # Add fractions for mix materials using the previous Python materials
-            #mat.add_nuclide("dummy", 0.0)  # placeholder to allow export
-            # Custom attribute to store mix info
-            mat.mix = {"materials": mixed_materials, "fractions": fractions}
-        
-        existing_ids = [m.id for m in mats]
-        mat.id = max(existing_ids) + 1 if existing_ids else 1
-        
-        mats.append(mat)
-        mats.export_to_xml(path=material_file)
-
         # -----------------------------
-        # Generate Python code
-        py_file = os.path.join("output", "materials.py")
-
-        existing_code = ""
-        material_names = []
-        if os.path.exists(py_file):
-            with open(py_file, 'r') as f:
-                existing_code = f.read()
-            material_names = re.findall(r'^(\w+)\s*=', existing_code, re.MULTILINE)
-
-        lines = []
-        lines.append(f"# Material: {name}")
-        lines.append(f"{name} = openmc.Material(name='{name}')")
-        lines.append(f"{name}.set_density('g/cm3', {density})")
-
-        if not is_mix:
-            for entry in self.nuclide_list:
-                if entry['type'] == 'nuclide':
-                    lines.append(f"{name}.add_nuclide('{entry['name']}', {entry['amount']})")
-                else:
-                    if entry['enrichment'] is not None:
-                        lines.append(f"{name}.add_element('{entry['name']}', {entry['amount']}, enrichment={entry['enrichment']})")
-                    else:
-                        lines.append(f"{name}.add_element('{entry['name']}', {entry['amount']})")
-            if self.sab_var.get():
-                lines.append(f"{name}.add_s_alpha_beta('{self.sab_var.get()}')")
-        else:
-            # Mix material: store materials and fractions
-            mix_list_str = ", ".join(mixed_materials)
-            frac_list_str = ", ".join([str(f) for f in fractions])
-            lines.append(f"# Mixed material: {name}")
-            lines.append(f"{name}.mix = {{'materials': [{mix_list_str}], 'fractions': [{frac_list_str}]}}")
-
-        lines.append(f"{name}.depletable = {self.depletable_var.get()}")
-
-        material_names.append(name)
-
-        with open(py_file, 'w') as f:
-            f.write("import openmc\n\n")
-            f.write("# Generated OpenMC materials file\n\n")
-            if existing_code:
-                prev_materials = re.split(r'materials_file\s*=\s*openmc\.Materials.*', existing_code)[0]
-                f.write(prev_materials.strip() + "\n\n")
-            f.write("\n".join(lines) + "\n\n")
-            f.write(f"materials_file = openmc.Materials([{', '.join([m for m in material_names if m != 'materials_file'])}])\n")
-            f.write(f"#materials_file.export_to_xml('output/materials.xml')\n")
-
-
-                # -----------------------------
-        # Save also to JSON for CellBuilder
-        json_file = os.path.join("output", "materials.json")
-        try:
-            if os.path.exists(json_file):
-                with open(json_file, "r") as f:
-                    materials_data = json.load(f)
-            else:
-                materials_data = {}
-        except:
-            materials_data = {}
+        # Update materials.json data (CellBuilder and the headless builder read this)
+        project = get_project()
+        materials_data = dict(project.materials)
 
         # Store basic info (no need to store full OpenMC object)
         materials_data[name] = {
@@ -370,13 +309,27 @@ class MaterialBuilder(tk.Toplevel):
             "depletable": self.depletable_var.get(),
             "is_mix": is_mix,
             "components": self.nuclide_list if not is_mix else None,
+            "sab": (self.sab_var.get() or None) if not is_mix else None,
             "mix": {"materials": mixed_materials, "fractions": fractions} if is_mix else None
         }
+        # Volumes come from the geometry (Calculate Volumes); keep them across edits
+        if project.materials.get(name, {}).get("volume"):
+            materials_data[name]["volume"] = project.materials[name]["volume"]
 
-        with open(json_file, "w") as f:
-            json.dump(materials_data, f, indent=2)
-
+        # -----------------------------
+        # Serialize only this material; materials.xml and materials.py are
+        # streamed from the store when a build or run needs them
+        try:
+            MaterialStore(project.project_dir).update(name, materials_data)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not build material '{name}':\n{e}")
+            return
 
+        project.materials[name] = materials_data[name]
+        project.mark_dirty("materials")
+        project.save(["materials"])
 
-        messagebox.showinfo("Success", f"Material '{name}' saved!\nFile: output/materials.xml\nPython code updated at output/materials.py")
+        messagebox.showinfo("Success", f"Material '{name}' saved!\n"
+                            "materials.xml and materials.py are regenerated from output/materials.json "
+                            "when you build or run the model.")
         self.destroy()
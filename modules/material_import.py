@@ -0,0 +1,180 @@
+"""Bulk import of material compositions from CSV or NPZ tables.
+
+Supported layouts:
+
+* wide CSV  - one row per material: ``material,density,U235,U238,O16,...``
+* long CSV  - one row per entry:    ``material,nuclide,fraction[,density]``
+* NPZ       - arrays ``materials``, ``nuclides``, ``fractions`` (materials x
+  nuclides) and optionally ``densities``
+
+All fractions are validated and normalized with NumPy in one pass.
+"""
+import re
+import csv
+import keyword
+import numpy as np
+
+from .project import get_project
+from .material_store import ensure_material_files
+
+ELEMENT_SYMBOLS = (
+    "H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn Ga Ge As Se Br Kr "
+    "Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb "
+    "Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr "
+    "Rf Db Sg Bh Hs Mt Ds Rg Cn Nh Fl Mc Lv Ts Og"
+).split()
+NUCLIDE_RE = re.compile(r"^([A-Z][a-z]?)(\d{1,3})(_m\d)?$")
+MAX_REPORTED = 10
+# names materials.py already uses for itself
+RESERVED_NAMES = {"openmc", "materials_file"}
+
+
+def is_valid_nuclide_name(name, known=None):
+    """Check GNDS-style names such as 'U235' or 'Am242_m1'."""
+    if known is not None:
+        return name in known
+    m = NUCLIDE_RE.match(name)
+    return bool(m) and m.group(1) in ELEMENT_SYMBOLS and 0 < int(m.group(2)) < 300
+
+
+def is_valid_material_name(name):
+    """Material names become variable names in the generated materials.py."""
+    return name.isidentifier() and not keyword.iskeyword(name) and name not in RESERVED_NAMES
+
+
+# ---------------- Readers ----------------
+def read_csv_table(path):
+    """Return (materials, nuclides, fractions, densities) from a wide or long CSV."""
+    with open(path, newline="") as f:
+        rows = [row for row in csv.reader(f) if row and not row[0].startswith("#")]
+    if len(rows) < 2:
+        raise ValueError(f"{path}: no data rows")
+    header = [h.strip() for h in rows[0]]
+    lower = [h.lower() for h in header]
+    body = [[c.strip() for c in row] for row in rows[1:]]
+
+    if "nuclide" in lower:
+        # Long layout: accumulate (material, nuclide) pairs into the matrix
+        i_mat, i_nuc = lower.index("material"), lower.index("nuclide")
+        i_frac = lower.index("fraction")
+        i_den = lower.index("density") if "density" in lower else None
+        materials = list(dict.fromkeys(row[i_mat] for row in body))
+        nuclides = list(dict.fromkeys(row[i_nuc] for row in body))
+        mat_index = {m: i for i, m in enumerate(materials)}
+        nuc_index = {n: i for i, n in enumerate(nuclides)}
+        rows_idx = np.array([mat_index[row[i_mat]] for row in body])
+        cols_idx = np.array([nuc_index[row[i_nuc]] for row in body])
+        values = np.array([row[i_frac] or "nan" for row in body], dtype=float)
+        fractions = np.zeros((len(materials), len(nuclides)))
+        np.add.at(fractions, (rows_idx, cols_idx), values)
+        densities = None
+        if i_den is not None:
+            densities = np.full(len(materials), np.nan)
+            for row in body:
+                if row[i_den]:
+                    densities[mat_index[row[i_mat]]] = float(row[i_den])
+        return materials, nuclides, fractions, densities
+
+    # Wide layout: first column material name, optional density column
+    i_den = lower.index("density") if "density" in lower else None
+    nuclide_cols = [i for i in range(1, len(header)) if i != i_den]
+    materials = [row[0] for row in body]
+    nuclides = [header[i] for i in nuclide_cols]
+    table = np.array([[row[i] if i < len(row) and row[i] else "0" for i in nuclide_cols] for row in body], dtype=float)
+    densities = None
+    if i_den is not None:
+        densities = np.array([row[i_den] or "nan" for row in body], dtype=float)
+    return materials, nuclides, table, densities
+
+
+def read_npz_table(path):
+    data = np.load(path, allow_pickle=False)
+    materials = [str(m) for m in data["materials"]]
+    nuclides = [str(n) for n in data["nuclides"]]
+    fractions = np.asarray(data["fractions"], dtype=float)
+    densities = np.asarray(data["densities"], dtype=float) if "densities" in data else None
+    return materials, nuclides, fractions, densities
+
+
+def read_composition_table(path):
+    if path.lower().endswith(".npz"):
+        return read_npz_table(path)
+    return read_csv_table(path)
+
+
+# ---------------- Validation ----------------
+def validate_compositions(materials, nuclides, fractions, known_nuclides=None, normalize=True, tol=1e-6):
+    """Validate a materials x nuclides fraction matrix; return it normalized.
+
+    Raises ValueError listing invalid material names, negative or missing
+    entries, rows that do not sum to one (when normalize is False) and
+    unknown nuclide names.
+    """
+    errors = []
+    fractions = np.asarray(fractions, dtype=float)
+    if fractions.shape != (len(materials), len(nuclides)):
+        raise ValueError(f"Fraction matrix has shape {fractions.shape}, expected ({len(materials)}, {len(nuclides)})")
+    if len(set(materials)) != len(materials):
+        errors.append("Duplicate material names in table")
+    invalid = [m for m in materials if not is_valid_material_name(m)]
+    if invalid:
+        errors.append("Material names must be valid Python identifiers (letters, digits and _): "
+                      + ", ".join(invalid[:MAX_REPORTED]))
+
+    unknown = [n for n in nuclides if not is_valid_nuclide_name(n, known_nuclides)]
+    if unknown:
+        errors.append(f"Unknown nuclides: {', '.join(unknown[:MAX_REPORTED])}")
+
+    for label, mask in (("Missing", ~np.isfinite(fractions)), ("Negative", fractions < 0)):
+        rows, cols = np.nonzero(mask)
+        if rows.size:
+            cells = ", ".join(f"{materials[r]}/{nuclides[c]}" for r, c in zip(rows[:MAX_REPORTED], cols[:MAX_REPORTED]))
+            errors.append(f"{label} fractions ({rows.size}): {cells}")
+
+    totals = np.nansum(np.where(fractions > 0, fractions, 0.0), axis=1)
+    bad = np.nonzero(totals <= 0)[0] if normalize else np.nonzero(np.abs(totals - 1.0) > tol)[0]
+    if bad.size:
+        what = "have no positive fractions" if normalize else "do not sum to 1"
+        errors.append(f"{bad.size} materials {what}: {', '.join(materials[i] for i in bad[:MAX_REPORTED])}")
+
+    if errors:
+        raise ValueError("\n".join(errors))
+    return fractions / totals[:, None] if normalize else fractions
+
+
+# ---------------- Import ----------------
+def import_compositions(path, project_dir="output", normalize=True, default_density=None,
+                        depletable=False, known_nuclides=None):
+    """Read a composition table and add/replace its materials in the project.
+
+    Returns the list of imported material names.
+    """
+    materials, nuclides, fractions, densities = read_composition_table(path)
+    fractions = validate_compositions(materials, nuclides, fractions, known_nuclides, normalize)
+
+    if densities is None:
+        densities = np.full(len(materials), np.nan)
+    if default_density is not None:
+        densities = np.where(np.isfinite(densities), densities, default_density)
+    missing = np.nonzero(~np.isfinite(densities) | (densities <= 0))[0]
+    if missing.size:
+        raise ValueError("Missing or non-positive density for: " + ", ".join(materials[i] for i in missing[:MAX_REPORTED]))
+
+    project = get_project(project_dir)
+    nonzero = fractions > 0
+    for i, name in enumerate(materials):
+        cols = np.nonzero(nonzero[i])[0]
+        project.materials[name] = {
+            "density": float(densities[i]),
+            "temperature": None,
+            "depletable": depletable,
+            "is_mix": False,
+            "components": [{"type": "nuclide", "name": nuclides[c], "amount": a, "enrichment": None}
+                           for c, a in zip(cols.tolist(), fractions[i, cols].tolist())],
+            "sab": None,
+            "mix": None
+        }
+    project.mark_dirty("materials")
+    project.save(["materials"])
+    ensure_material_files(project_dir)
+    return materials
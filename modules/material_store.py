@@ -0,0 +1,197 @@
+"""Append-optimized store behind materials.xml and materials.py.
+
+materials.json stays the source of truth. A small SQLite index next to it
+keeps, per material, a digest of its JSON record and the serialized
+``<material>`` element. Saving one material re-serializes only that
+material; materials.xml is streamed from the cached fragments when a build
+needs it, so adding thousands of materials stays linear.
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import tempfile
+import xml.etree.ElementTree as ET
+
+from .project import get_project, default_file_mode
+
+INDEX_FILE = "materials_index.db"
+
+
+def record_digest(name, record, position, materials_data):
+    """Digest of everything that affects a material's XML (mixes include their parts)."""
+    payload = {"name": name, "id": position + 1, "record": record}
+    if record.get("is_mix") and record.get("mix"):
+        payload["parts"] = mix_parts(record, materials_data)
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def mix_parts(record, materials_data, parts=None):
+    """{name: record} of every material a mix is made of, through nested mixes."""
+    parts = {} if parts is None else parts
+    if record.get("is_mix") and record.get("mix"):
+        for m in record["mix"]["materials"]:
+            if m not in parts:
+                parts[m] = materials_data.get(m)
+                mix_parts(parts[m] or {}, materials_data, parts)
+    return parts
+
+
+def atomic_write_text(path, chunks):
+    """Write an iterable of strings to a temp file, then rename over path."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        os.chmod(tmp_path, default_file_mode())
+        with os.fdopen(fd, "w") as f:
+            f.writelines(chunks)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class MaterialStore:
+    def __init__(self, project_dir="output"):
+        self.project_dir = project_dir
+        os.makedirs(project_dir, exist_ok=True)
+        self.db_path = os.path.join(project_dir, INDEX_FILE)
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS materials ("
+                       "name TEXT PRIMARY KEY, position INTEGER, digest TEXT, xml TEXT)")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    # ---------------- Fragments ----------------
+    @staticmethod
+    def serialize(name, record, position, materials_data):
+        """Serialize one material to its <material> XML fragment."""
+        from .xml_exporter import build_material
+
+        parts = {}
+
+        def build_part(part, stack):
+            # parts of nested mixes are built first, into the same dict
+            if part in stack:
+                raise ValueError(f"Material mix '{part}' contains itself")
+            if part not in materials_data:
+                raise ValueError(f"Mix part '{part}' is not a saved material")
+            if part not in parts:
+                data = materials_data[part]
+                if data.get("is_mix") and data.get("mix"):
+                    for m in data["mix"]["materials"]:
+                        build_part(m, stack + (part,))
+                parts[part] = build_material(part, data, materials_by_name=parts)
+
+        if record.get("is_mix") and record.get("mix"):
+            for m in record["mix"]["materials"]:
+                build_part(m, (name,))
+        mat = build_material(name, record, material_id=position + 1, materials_by_name=parts)
+        return ET.tostring(mat.to_xml_element(), encoding="unicode")
+
+    def sync(self, materials_data):
+        """Re-serialize only new or changed materials; returns how many were written."""
+        with self._connect() as db:
+            cached = {row[0]: row[1] for row in db.execute("SELECT name, digest FROM materials")}
+            changed = 0
+            for position, (name, record) in enumerate(materials_data.items()):
+                digest = record_digest(name, record, position, materials_data)
+                if cached.get(name) == digest:
+                    continue
+                xml = self.serialize(name, record, position, materials_data)
+                db.execute("INSERT OR REPLACE INTO materials VALUES (?, ?, ?, ?)", (name, position, digest, xml))
+                changed += 1
+
+            removed = [name for name in cached if name not in materials_data]
+            db.executemany("DELETE FROM materials WHERE name = ?", [(name,) for name in removed])
+        return changed + len(removed)
+
+    def update(self, name, materials_data):
+        """Cache the fragment for one saved material without touching the others."""
+        position = list(materials_data).index(name)
+        record = materials_data[name]
+        digest = record_digest(name, record, position, materials_data)
+        xml = self.serialize(name, record, position, materials_data)
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO materials VALUES (?, ?, ?, ?)", (name, position, digest, xml))
+
+    # ---------------- Output files ----------------
+    def write_xml(self, path):
+        """Stream materials.xml from the cached fragments in material ID order."""
+        with self._connect() as db:
+            rows = db.execute("SELECT xml FROM materials ORDER BY position")
+            chunks = ["<?xml version='1.0' encoding='utf-8'?>\n<materials>\n"]
+            chunks.extend("  " + xml + "\n" for (xml,) in rows)
+        chunks.append("</materials>\n")
+        atomic_write_text(path, chunks)
+
+    def get_meta(self, key):
+        with self._connect() as db:
+            row = db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+
+def materials_python(materials_data):
+    """Generate materials.py from materials.json in one pass."""
+    lines = ["import openmc\n\n", "# Generated OpenMC materials file\n\n"]
+    for i, (name, data) in enumerate(materials_data.items(), start=1):
+        lines.append(f"# Material: {name}\n")
+        if data.get("is_mix") and data.get("mix"):
+            mix = data["mix"]
+            lines.append(f"{name} = openmc.Material.mix_materials([{', '.join(mix['materials'])}], "
+                         f"{mix['fractions']}, 'vo', material_id={i}, name='{name}')\n")
+        else:
+            lines.append(f"{name} = openmc.Material(material_id={i}, name='{name}')\n")
+            lines.append(f"{name}.set_density('g/cm3', {data['density']})\n")
+            for entry in data.get("components") or []:
+                if entry["type"] == "nuclide":
+                    lines.append(f"{name}.add_nuclide('{entry['name']}', {entry['amount']})\n")
+                elif entry.get("enrichment") is not None:
+                    lines.append(f"{name}.add_element('{entry['name']}', {entry['amount']}, enrichment={entry['enrichment']})\n")
+                else:
+                    lines.append(f"{name}.add_element('{entry['name']}', {entry['amount']})\n")
+            if data.get("sab"):
+                lines.append(f"{name}.add_s_alpha_beta('{data['sab']}')\n")
+        if data.get("temperature") is not None:
+            lines.append(f"{name}.temperature = {data['temperature']}\n")
+        if data.get("volume"):
+            lines.append(f"{name}.volume = {data['volume']}\n")
+        lines.append(f"{name}.depletable = {bool(data.get('depletable'))}\n\n")
+
+    lines.append(f"materials_file = openmc.Materials([{', '.join(materials_data)}])\n")
+    lines.append("#materials_file.export_to_xml('output/materials.xml')\n")
+    return lines
+
+
+def ensure_material_files(project_dir="output", materials_data=None, out_dir=None):
+    """Bring materials.xml and materials.py up to date with materials.json.
+
+    Called at build time; does nothing if neither the materials nor the
+    output files changed since the last call.
+    """
+    if materials_data is None:
+        materials_data = get_project(project_dir).materials
+    out_dir = out_dir or project_dir
+    xml_path = os.path.join(out_dir, "materials.xml")
+    py_path = os.path.join(out_dir, "materials.py")
+
+    store = MaterialStore(project_dir)
+    changed = store.sync(materials_data)
+    digest = hashlib.sha1(json.dumps(materials_data, sort_keys=True).encode()).hexdigest()
+    up_to_date = (not changed and store.get_meta(xml_path) == digest
+                  and os.path.exists(xml_path) and os.path.exists(py_path))
+    if up_to_date:
+        return False
+
+    os.makedirs(out_dir, exist_ok=True)
+    store.write_xml(xml_path)
+    atomic_write_text(py_path, materials_python(materials_data))
+    store.set_meta(xml_path, digest)
+    return True
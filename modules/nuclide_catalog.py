@@ -0,0 +1,122 @@
+"""Nuclide, element and S(a,b) catalog read from a cross_sections.xml library.
+
+The library is parsed once; the result is cached on disk keyed by the file
+path and its mtime/size, and kept in memory for the session. Lookups use a
+sorted index with bisect, so filtering hundreds of nuclides on every
+keystroke costs microseconds.
+"""
+import os
+import re
+import json
+import bisect
+import hashlib
+import xml.etree.ElementTree as ET
+
+from .project import get_project
+
+SYMBOL_RE = re.compile(r"^([A-Z][a-z]?)\d")
+_catalogs = {}
+
+
+def cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "openmc_gui")
+
+
+def default_library_path():
+    """cross_sections.xml chosen in the Settings window, else $OPENMC_CROSS_SECTIONS."""
+    path = get_project().settings.get("cross_sections") or os.environ.get("OPENMC_CROSS_SECTIONS")
+    return path if path and os.path.exists(path) else None
+
+
+def parse_cross_sections(path):
+    """Return {'nuclides': [...], 'elements': [...], 'thermal': [...]} from cross_sections.xml."""
+    nuclides, thermal, photon = set(), set(), set()
+    for _, elem in ET.iterparse(path):
+        if elem.tag == "library":
+            names = elem.get("materials", "").split()
+            kind = elem.get("type", "")
+            if kind == "neutron":
+                nuclides.update(names)
+            elif kind == "thermal":
+                thermal.update(names)
+            elif kind == "photon":
+                photon.update(names)
+        elem.clear()
+
+    elements = {m.group(1) for m in map(SYMBOL_RE.match, nuclides) if m} | photon
+    return {"nuclides": sorted(nuclides), "elements": sorted(elements), "thermal": sorted(thermal)}
+
+
+class NuclideCatalog:
+    def __init__(self, nuclides, elements, thermal):
+        self.nuclides = list(nuclides)
+        self.elements = list(elements)
+        self.thermal = list(thermal)
+        self._index = {}
+
+    def _sorted_keys(self, kind):
+        # (lowercase name, name) pairs sorted once per list for bisect prefix lookups
+        if kind not in self._index:
+            self._index[kind] = sorted((n.lower(), n) for n in getattr(self, kind))
+        return self._index[kind]
+
+    def search(self, text, kind="nuclides", limit=None):
+        """Names starting with text (case-insensitive), then names containing it."""
+        text = text.strip().lower()
+        if not text:
+            return getattr(self, kind)[:limit] if limit else list(getattr(self, kind))
+        keys = self._sorted_keys(kind)
+        start = bisect.bisect_left(keys, (text,))
+        matches = []
+        for key, name in keys[start:]:
+            if not key.startswith(text) or (limit and len(matches) >= limit):
+                break
+            matches.append(name)
+        if not limit or len(matches) < limit:
+            seen = set(matches)
+            matches.extend(name for key, name in keys if text in key and name not in seen)
+        return matches[:limit] if limit else matches
+
+
+def load_catalog(path):
+    """Parse path, using the on-disk cache when its mtime and size still match."""
+    stat = os.stat(path)
+    stamp = {"path": os.path.abspath(path), "mtime": stat.st_mtime, "size": stat.st_size}
+    cache_file = os.path.join(cache_dir(), "catalog_" + hashlib.sha1(stamp["path"].encode()).hexdigest() + ".json")
+
+    data = None
+    try:
+        with open(cache_file, "r") as f:
+            cached = json.load(f)
+        if all(cached.get(k) == v for k, v in stamp.items()):
+            data = cached
+    except (OSError, ValueError):
+        pass
+
+    if data is None:
+        data = dict(stamp, **parse_cross_sections(path))
+        try:
+            os.makedirs(cache_dir(), exist_ok=True)
+            with open(cache_file, "w") as f:
+                json.dump(data, f)
+        except OSError as e:
+            print(f"Could not write nuclide catalog cache: {e}")
+
+    return NuclideCatalog(data["nuclides"], data["elements"], data["thermal"])
+
+
+def get_catalog(path=None):
+    """Catalog for path (default: the project's library), or None if there is no library."""
+    path = path or default_library_path()
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+    if key not in _catalogs:
+        try:
+            _catalogs[key] = load_catalog(path)
+        except (OSError, ET.ParseError) as e:
+            print(f"Failed to read cross sections library {path}: {e}")
+            return None
+    return _catalogs[key]
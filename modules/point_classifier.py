@@ -0,0 +1,380 @@
+"""Vectorized point-in-cell classification over the JSON geometry model.
+
+Surfaces, cells, universes and hex lattices are compiled once; ``classify``
+then finds the material-filled (leaf) cell for an (N, 3) array of points in
+chunks, so memory stays bounded however many points are asked for. Nothing
+here needs OpenMC, so previews and checks work without it.
+"""
+import numpy as np
+
+from .project import find_root_universe
+from .region import compile_region
+from .lattice_model import HexLatticeMap, RectLatticeMap, hex_positions, rect_pitch, rect_lower_left
+
+CHUNK_SIZE = 1_000_000
+SQRT3 = np.sqrt(3.0)
+ROOT = "__root__"   # implicit root universe when no universes are defined
+
+def surface_sense(info, xyz):
+    """True where points are on the positive side of a surfaces.json entry."""
+    stype, params = info["type"], info["params"]
+    x, y, z = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+    if stype == "XPlane":
+        return x > float(params[0])
+    if stype == "YPlane":
+        return y > float(params[0])
+    if stype == "ZPlane":
+        return z > float(params[0])
+    if stype == "ZCylinder":
+        return x * x + y * y > float(params[0]) ** 2
+    if stype == "HexagonalPrism":
+        edge = float(params[0])
+        u, v = (np.abs(x), np.abs(y)) if params[1] == "y" else (np.abs(y), np.abs(x))
+        return ~((u <= SQRT3 / 2 * edge) & (u / SQRT3 + v <= edge))
+    raise ValueError(f"Unsupported surface type '{stype}'")
+
+
+def bounding_box(surfaces, margin=1.05):
+    """(lower_left, upper_right) enclosing the model, from its boundary surfaces.
+
+    Axes not closed by boundary planes, cylinders or prisms fall back to the
+    largest surface coordinate in the model.
+    """
+    lo, hi = np.full(3, -np.inf), np.full(3, np.inf)
+    planes = {0: [], 1: [], 2: []}
+    for info in surfaces.values():
+        if not info.get("boundary_type"):
+            continue
+        stype, params = info["type"], info["params"]
+        if stype in ("XPlane", "YPlane", "ZPlane"):
+            planes["XYZ".index(stype[0])].append(float(params[0]))
+        elif stype == "ZCylinder":
+            r = float(params[0])
+            lo[:2], hi[:2] = np.maximum(lo[:2], -r), np.minimum(hi[:2], r)
+        elif stype == "HexagonalPrism":
+            edge = float(params[0])
+            half = np.array([SQRT3 / 2 * edge, edge]) if params[1] == "y" else np.array([edge, SQRT3 / 2 * edge])
+            lo[:2], hi[:2] = np.maximum(lo[:2], -half), np.minimum(hi[:2], half)
+    for axis, values in planes.items():
+        if len(values) >= 2:
+            lo[axis], hi[axis] = max(lo[axis], min(values)), min(hi[axis], max(values))
+
+    fallback = max([abs(float(info["params"][0])) for info in surfaces.values()] + [1.0])
+    lo = np.where(np.isfinite(lo), lo, -fallback)
+    hi = np.where(np.isfinite(hi), hi, fallback)
+    center, half = (lo + hi) / 2, (hi - lo) / 2 * margin
+    return center - half, center + half
+
+
+def inside_boundary(surfaces, xyz):
+    """True for points on the same side of every boundary surface as the model centre."""
+    lo, hi = bounding_box(surfaces, margin=1.0)
+    center = ((lo + hi) / 2).reshape(1, 3)
+    inside = np.ones(len(xyz), dtype=bool)
+    for info in surfaces.values():
+        if info.get("boundary_type"):
+            inside &= surface_sense(info, xyz) == surface_sense(info, center)[0]
+    return inside
+
+
+class _Senses(dict):
+    """Surface senses for one batch of points, computed on first use."""
+
+    def __init__(self, surfaces, xyz):
+        super().__init__()
+        self.surfaces = surfaces
+        self.xyz = xyz
+
+    def __missing__(self, name):
+        value = self[name] = surface_sense(self.surfaces[name], self.xyz)
+        return value
+
+
+class HexLatticeModel:
+    axial = False
+
+    def __init__(self, name, data, universe_index):
+        lattice = HexLatticeMap.from_record(data)
+        self.name = name
+        self.pitch = float(str(data["pitch"]).split(",")[0])
+        self.orientation = data.get("orientation", "y")
+        self.outer = universe_index[data["outer"]] if data.get("outer") else -1
+
+        unknown = [u for u in lattice.used_universes() if u not in universe_index]
+        if unknown:
+            raise ValueError(f"Lattice '{name}' uses unknown universes: {', '.join(unknown)}")
+        if (lattice.indices < 0).any():
+            raise ValueError(f"Lattice '{name}' has positions without a universe")
+        self.n_rings = lattice.n_rings
+        R = self.n_rings - 1
+        palette = np.array([universe_index[u] if u in universe_index else -1 for u in lattice.palette] + [-1],
+                           dtype=np.int32)
+        self.table = np.full((2 * R + 1, 2 * R + 1), -1, dtype=np.int32)
+        ij = hex_positions(self.n_rings)
+        self.table[ij[:, 0] + R, ij[:, 1] + R] = palette[lattice.indices]
+
+    def locate(self, xyz):
+        """Return (universe index per point, coordinates local to its lattice tile)."""
+        swap = self.orientation == "x"
+        x, y = (xyz[:, 1], xyz[:, 0]) if swap else (xyz[:, 0], xyz[:, 1])
+        p = self.pitch
+        step = SQRT3 / 2 * p
+
+        # Fractional axial coordinates, then cube rounding to the nearest tile centre
+        q = x / step
+        r = y / p - q / 2
+        s = -q - r
+        rq, rr, rs = np.rint(q), np.rint(r), np.rint(s)
+        dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+        fix_q = (dq > dr) & (dq > ds)
+        fix_r = ~fix_q & (dr > ds)
+        rq = np.where(fix_q, -rr - rs, rq)
+        rr = np.where(fix_r, -rq - rs, rr)
+
+        local = xyz.copy()
+        lx, ly = x - rq * step, y - (rq / 2 + rr) * p
+        local[:, 0], local[:, 1] = (ly, lx) if swap else (lx, ly)
+
+        R = self.n_rings - 1
+        i, j = rq.astype(np.int64), rr.astype(np.int64)
+        inside = np.maximum(np.maximum(np.abs(i), np.abs(j)), np.abs(i + j)) <= R
+        universes = np.full(len(xyz), self.outer, dtype=np.int32)
+        universes[inside] = self.table[i[inside] + R, j[inside] + R]
+        return universes, local
+
+    def tile_shape(self):
+        """Tile cross-section as a volume_calc shape; 'y' lattices have flat-topped tiles."""
+        return ("hex", self.pitch / SQRT3, "x" if self.orientation == "y" else "y")
+
+    def tile_centers(self):
+        """xy centres of the filled positions."""
+        R = self.n_rings - 1
+        i, j = (np.argwhere(self.table >= 0) - R).T
+        cx, cy = i * SQRT3 / 2 * self.pitch, (i / 2 + j) * self.pitch
+        return np.stack([cy, cx] if self.orientation == "x" else [cx, cy], axis=1)
+
+
+class RectLatticeModel:
+    axial = False
+
+    def __init__(self, name, data, universe_index):
+        lattice = RectLatticeMap.from_record(data)
+        self.name = name
+        pitch = rect_pitch(data)
+        self.outer = universe_index[data["outer"]] if data.get("outer") else -1
+        unknown = [u for u in lattice.used_universes() if u not in universe_index]
+        if unknown:
+            raise ValueError(f"Lattice '{name}' uses unknown universes: {', '.join(unknown)}")
+        if (lattice.indices < 0).any():
+            raise ValueError(f"Lattice '{name}' has positions without a universe")
+        palette = np.array([universe_index.get(u, -1) for u in lattice.palette] + [-1], dtype=np.int32)
+        self.table = palette[lattice.indices]            # (nz, ny, nx), rows from the top
+        self.shape = lattice.shape
+        self.axial = len(pitch) == 3
+        self.pitch3 = np.array(pitch + (1.0,) * (3 - len(pitch)))
+        self.lower_left = np.array(rect_lower_left(data) + (0.0,) * (3 - len(pitch)))
+        self.pitch = float(np.hypot(*self.pitch3[:2]))   # tiles reach at most this far from their centre
+
+    def locate(self, xyz):
+        nz, ny, nx = self.shape
+        axes = 3 if self.axial else 2
+        index = np.floor((xyz[:, :axes] - self.lower_left[:axes]) / self.pitch3[:axes]).astype(np.int64)
+        local = xyz.copy()
+        local[:, :axes] -= self.lower_left[:axes] + (index + 0.5) * self.pitch3[:axes]
+
+        ix, iy = index[:, 0], index[:, 1]
+        iz = index[:, 2] if self.axial else np.zeros(len(xyz), dtype=np.int64)
+        inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny) & (iz >= 0) & (iz < nz)
+        universes = np.full(len(xyz), self.outer, dtype=np.int32)
+        universes[inside] = self.table[iz[inside], ny - 1 - iy[inside], ix[inside]]
+        return universes, local
+
+    def tile_shape(self):
+        px, py = self.pitch3[:2]
+        return ("box", -px / 2, px / 2, -py / 2, py / 2)
+
+    def tile_centers(self):
+        _, ny, _ = self.shape
+        _, rows, cols = np.nonzero(self.table >= 0)
+        return np.stack([self.lower_left[0] + (cols + 0.5) * self.pitch3[0],
+                         self.lower_left[1] + (ny - 1 - rows + 0.5) * self.pitch3[1]], axis=1)
+
+
+class GeometryModel:
+    """Compiled cells/universes/lattices for fast point classification."""
+
+    def __init__(self, project, root=None):
+        self.surfaces = project["surfaces"]
+        self.cells = project["cells"]
+        self.cell_names = [c["name"] for c in self.cells]
+        cell_index = {name: i for i, name in enumerate(self.cell_names)}
+        material_index = {name: i for i, name in enumerate(project["materials"])}
+
+        self.regions = []
+        for cell in self.cells:
+            region = compile_region(cell["region"])
+            missing = region.unknown_surfaces(self.surfaces)
+            if missing:
+                raise ValueError(f"Cell '{cell['name']}' uses unknown surfaces: {', '.join(missing)}")
+            self.regions.append(region)
+
+        # Universes -> lists of cell indices
+        if project["universes"]:
+            self.universe_names = list(project["universes"])
+            self.universe_cells = []
+            for name in self.universe_names:
+                members = project["universes"][name].get("cells", [])
+                unknown = [c for c in members if c not in cell_index]
+                if unknown:
+                    raise ValueError(f"Universe '{name}' uses unknown cells: {', '.join(unknown)}")
+                self.universe_cells.append([cell_index[c] for c in members])
+            try:
+                root = root or project["geometry"].get("root_universe") or find_root_universe(project)
+            except ValueError as e:
+                root, self.root_error = None, str(e)   # still usable with an explicit universe/lattice
+        else:
+            self.universe_names = [ROOT]
+            self.universe_cells = [list(range(len(self.cells)))]
+            root = ROOT
+        universe_index = {name: i for i, name in enumerate(self.universe_names)}
+        if root is not None and root not in universe_index:
+            raise ValueError(f"Unknown root universe '{root}'")
+        self.root = universe_index.get(root)
+
+        self.lattices = {}
+        for name, data in project["lattices"].items():
+            kind = RectLatticeModel if data.get("type") == "rect" else HexLatticeModel
+            self.lattices[name] = kind(name, data, universe_index)
+
+        # Per cell: ("material", index) / ("universe", index) / ("lattice", model)
+        self.fills = []
+        self.cell_material = np.full(len(self.cells), -1, dtype=np.int32)
+        for i, cell in enumerate(self.cells):
+            if "lattice" in cell:
+                if cell["lattice"] not in self.lattices:
+                    raise ValueError(f"Cell '{cell['name']}' is filled with unknown lattice '{cell['lattice']}'")
+                self.fills.append(("lattice", self.lattices[cell["lattice"]]))
+            elif "universe" in cell:
+                if cell["universe"] not in universe_index:
+                    raise ValueError(f"Cell '{cell['name']}' is filled with unknown universe '{cell['universe']}'")
+                self.fills.append(("universe", universe_index[cell["universe"]]))
+            else:
+                if cell.get("material") not in material_index:
+                    raise ValueError(f"Cell '{cell['name']}' is filled with unknown material '{cell.get('material')}'")
+                self.fills.append(("material", material_index[cell["material"]]))
+                self.cell_material[i] = material_index[cell["material"]]
+
+        self.material_names = list(project["materials"])
+        self._check_cycles()
+
+    def _check_cycles(self):
+        state = {}
+
+        def visit(u):
+            if state.get(u) == 1:
+                raise ValueError(f"Circular fill reference through universe '{self.universe_names[u]}'")
+            if state.get(u) == 2:
+                return
+            state[u] = 1
+            for ci in self.universe_cells[u]:
+                kind, target = self.fills[ci]
+                if kind == "universe":
+                    visit(target)
+                elif kind == "lattice":
+                    for child in set(np.unique(target.table).tolist()) | {target.outer}:
+                        if child >= 0:
+                            visit(child)
+            state[u] = 2
+
+        for u in range(len(self.universe_names)):
+            visit(u)
+
+    # ---------------- Classification ----------------
+    def classify(self, points, chunk_size=CHUNK_SIZE, count=False, universe=None, lattice=None):
+        """Leaf cell index for every point (-1 where no cell is defined).
+
+        universe or lattice (by name) start the search somewhere other than
+        the root universe. With count=True also returns how many cells
+        claimed each point at the level where it was resolved (0 =
+        undefined, >1 = overlap).
+        """
+        if universe is not None and universe not in self.universe_names:
+            raise ValueError(f"Unknown universe '{universe}'")
+        if lattice is not None and lattice not in self.lattices:
+            raise ValueError(f"Unknown lattice '{lattice}'")
+        if universe is None and lattice is None and self.root is None:
+            raise ValueError(self.root_error)
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        cells = np.full(len(points), -1, dtype=np.int32)
+        hits = np.zeros(len(points), dtype=np.int16)
+        for start in range(0, len(points), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            xyz, idx = points[chunk], np.arange(len(points[chunk]))
+            if lattice is not None:
+                self._fill_lattice(self.lattices[lattice], xyz, idx, cells[chunk], hits[chunk])
+            else:
+                u = self.root if universe is None else self.universe_names.index(universe)
+                self._fill_universe(u, xyz, idx, cells[chunk], hits[chunk])
+        return (cells, hits) if count else cells
+
+    def trace(self, point, universe=None):
+        """Walk one point down the fill hierarchy.
+
+        Returns [(universe or lattice name, [claiming cell names]), ...]; the
+        walk stops at a material cell or at the first level where zero or
+        several cells claim the point.
+        """
+        xyz = np.asarray(point, dtype=float).reshape(1, 3)
+        u = self.root if universe is None else self.universe_names.index(universe)
+        path = []
+        while True:
+            senses = _Senses(self.surfaces, xyz)
+            claimed = [ci for ci in self.universe_cells[u] if self.regions[ci].evaluate(senses)[0]]
+            path.append((self.universe_names[u], [self.cell_names[ci] for ci in claimed]))
+            if len(claimed) != 1:
+                return path
+            kind, target = self.fills[claimed[0]]
+            if kind == "material":
+                return path
+            if kind == "universe":
+                u = target
+                continue
+            universes, xyz = target.locate(xyz)
+            if universes[0] < 0:
+                path.append((target.name, []))
+                return path
+            u = int(universes[0])
+
+    def materials(self, points, chunk_size=CHUNK_SIZE):
+        """Material index (materials.json order) for every point, -1 for void/undefined."""
+        cells = self.classify(points, chunk_size)
+        return np.where(cells >= 0, self.cell_material[cells], -1)
+
+    def _fill_universe(self, u, xyz, idx, cells, hits):
+        senses = _Senses(self.surfaces, xyz)
+        owner = np.full(len(idx), -1, dtype=np.int32)
+        claimed = np.zeros(len(idx), dtype=np.int16)
+        for ci in self.universe_cells[u]:
+            inside = self.regions[ci].evaluate(senses)
+            claimed += inside
+            owner[(owner < 0) & inside] = ci
+        hits[idx] = np.where(claimed == 0, 0, np.maximum(hits[idx], claimed))
+
+        for ci in np.unique(owner[owner >= 0]).tolist():
+            mask = owner == ci
+            kind, target = self.fills[ci]
+            if kind == "material":
+                cells[idx[mask]] = ci
+            elif kind == "universe":
+                self._fill_universe(target, xyz[mask], idx[mask], cells, hits)
+            else:
+                self._fill_lattice(target, xyz[mask], idx[mask], cells, hits)
+
+    def _fill_lattice(self, lattice, xyz, idx, cells, hits):
+        universes, local = lattice.locate(xyz)
+        for child in np.unique(universes).tolist():
+            sel = universes == child
+            if child < 0:
+                hits[idx[sel]] = 0
+            else:
+                self._fill_universe(child, local[sel], idx[sel], cells, hits)
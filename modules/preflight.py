@@ -0,0 +1,224 @@
+"""Pre-flight cost estimate for an OpenMC run.
+
+Tally memory is counted from the tallies.xml that will actually be run:
+bins = filter bins x nuclides x scores per tally, at BYTES_PER_BIN each.
+Every MPI rank holds its own copy of the tally arrays, while OpenMC's
+threads share one copy (they add into it atomically), so the per-node
+total scales with the ranks on a node rather than the threads.
+
+Wall time is extrapolated from a short calibration run: the same inputs
+with a few hundred particles per batch, timed from OpenMC's own
+"Calculation Rate" and initialization lines.
+"""
+import os
+import re
+import shutil
+import time
+import xml.etree.ElementTree as ET
+
+from .run_engine import OpenMCRunner
+from .tally_spec import BYTES_PER_BIN, physical_memory, format_bytes
+
+DEFAULT_THRESHOLDS = {"max_bins": 10_000_000, "max_memory_fraction": 0.5}
+CALIBRATION_DIR = "preflight"
+# filters whose <bins> are edges rather than one value per bin
+EDGE_FILTERS = {"energy", "energyout", "mu", "polar", "azimuthal", "time"}
+
+RATE_RE = re.compile(r"Calculation Rate \((inactive|active)\)\s*=\s*([-+.\deE]+)")
+INIT_RE = re.compile(r"Total time for initialization\s*=\s*([-+.\deE]+)")
+
+
+# ---------------- Tally bins ----------------
+def _tokens(node):
+    return node.text.split() if node is not None and node.text else []
+
+
+def xml_tally_bins(tallies_path):
+    """[(tally name or id, bins)] for every tally in a tallies.xml."""
+    root = ET.parse(tallies_path).getroot()
+    meshes = {}
+    for mesh in root.iter("mesh"):
+        dims = [int(d) for d in _tokens(mesh.find("dimension"))]
+        if not dims:
+            # rectilinear / cylindrical / spherical meshes list their grids
+            grids = [_tokens(mesh.find(g)) for g in ("x_grid", "y_grid", "z_grid", "r_grid", "phi_grid")]
+            dims = [len(g) - 1 for g in grids if g]
+        meshes[mesh.get("id")] = dims
+
+    filters = {}
+    for flt in root.iter("filter"):
+        kind, bins = flt.get("type"), _tokens(flt.find("bins"))
+        if kind in ("mesh", "meshsurface"):
+            n = 1
+            for d in meshes.get(bins[0] if bins else None, []):
+                n *= d
+            if kind == "meshsurface":
+                n *= 4 * len(meshes.get(bins[0], []))
+        elif kind in EDGE_FILTERS:
+            n = max(len(bins) - 1, 0)
+        elif kind == "cellinstance":
+            n = len(bins) // 2
+        else:
+            n = len(bins) or 1
+        filters[flt.get("id")] = n
+
+    rows = []
+    for tally in root.iter("tally"):
+        n = 1
+        for fid in _tokens(tally.find("filters")):
+            n *= filters.get(fid, 1)
+        n *= max(1, len(_tokens(tally.find("nuclides"))))
+        n *= max(1, len(_tokens(tally.find("scores"))))
+        rows.append((tally.get("name") or f"tally {tally.get('id')}", n))
+    return rows
+
+
+def load_thresholds(settings):
+    """Warning thresholds, from the "preflight" entry of settings.json where set."""
+    return {**DEFAULT_THRESHOLDS, **((settings or {}).get("preflight") or {})}
+
+
+def check_tallies(rows, ranks_per_node=1, thresholds=None):
+    """Memory summary and warnings for xml_tally_bins rows."""
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    total_bins = sum(n for _, n in rows)
+    per_process = total_bins * BYTES_PER_BIN
+    per_node = per_process * max(1, ranks_per_node)
+    ram = physical_memory()
+    warnings = [f"Tally '{name}' has {n:,} bins (limit {thresholds['max_bins']:,})"
+                for name, n in rows if n > thresholds["max_bins"]]
+    if len(rows) > 1 and total_bins > thresholds["max_bins"] and not warnings:
+        warnings.append(f"All tallies together have {total_bins:,} bins (limit {thresholds['max_bins']:,})")
+    if ram and per_node > thresholds["max_memory_fraction"] * ram:
+        warnings.append(f"Tallies need {format_bytes(per_node)} per node, over "
+                        f"{thresholds['max_memory_fraction']:.0%} of the {format_bytes(ram)} RAM")
+    return {"rows": rows, "total_bins": total_bins, "per_process": per_process,
+            "per_node": per_node, "ram": ram, "ranks_per_node": ranks_per_node, "warnings": warnings}
+
+
+def format_tally_report(summary):
+    lines = [f"{'Tally':<30}{'Bins':>16}{'Memory':>12}"]
+    for name, n in summary["rows"]:
+        lines.append(f"{name[:29]:<30}{n:>16,}{format_bytes(n * BYTES_PER_BIN):>12}")
+    lines.append(f"{'Total':<30}{summary['total_bins']:>16,}{format_bytes(summary['per_process']):>12}")
+    ranks = summary["ranks_per_node"]
+    if ranks > 1:
+        lines.append(f"x {ranks} MPI ranks per node = {format_bytes(summary['per_node'])} per node "
+                     "(threads share one copy)")
+    if summary["ram"]:
+        lines.append(f"Installed RAM: {format_bytes(summary['ram'])}")
+    lines.extend(f"WARNING: {w}" for w in summary["warnings"])
+    return "\n".join(lines)
+
+
+# ---------------- Calibration run ----------------
+def read_run_size(settings_path):
+    """(particles, batches, inactive) from settings.xml."""
+    root = ET.parse(settings_path).getroot()
+    get = lambda tag, default: int(root.findtext(tag) or default)
+    return get("particles", 0), get("batches", 0), get("inactive", 0)
+
+
+def prepare_calibration(run_dir, particles=500, batches=5, inactive=2):
+    """Copy run_dir's inputs into run_dir/preflight with a tiny particle count."""
+    cal_dir = os.path.join(run_dir, CALIBRATION_DIR)
+    os.makedirs(cal_dir, exist_ok=True)
+    for name in ("geometry.xml", "materials.xml", "tallies.xml", "plots.xml"):
+        src = os.path.join(run_dir, name)
+        if os.path.exists(src):
+            shutil.copy(src, os.path.join(cal_dir, name))
+    tree = ET.parse(os.path.join(run_dir, "settings.xml"))
+    root = tree.getroot()
+    eigenvalue = (root.findtext("run_mode") or "eigenvalue").strip() == "eigenvalue"
+    for tag, value in (("particles", particles), ("batches", batches), ("inactive", inactive if eigenvalue else None)):
+        node = root.find(tag)
+        if value is None:
+            if node is not None:
+                root.remove(node)
+            continue
+        if node is None:
+            node = ET.SubElement(root, tag)
+        node.text = str(value)
+    # statepoint/sourcepoint batch lists may name batches the short run never reaches
+    for tag in ("state_point", "source_point"):
+        for node in root.findall(tag):
+            root.remove(node)
+    # the calibration only needs timings, not output files
+    output = root.find("output")
+    if output is None:
+        output = ET.SubElement(root, "output")
+    for tag in ("summary", "tallies"):
+        node = output.find(tag)
+        if node is None:
+            node = ET.SubElement(output, tag)
+        node.text = "false"
+    tree.write(os.path.join(cal_dir, "settings.xml"))
+    return cal_dir
+
+
+def parse_timings(lines):
+    """{'init': s, 'inactive': particles/s, 'active': particles/s} from OpenMC output."""
+    timings = {}
+    for line in lines:
+        m = RATE_RE.search(line)
+        if m:
+            timings[m.group(1)] = float(m.group(2))
+        m = INIT_RE.search(line)
+        if m:
+            timings["init"] = float(m.group(1))
+    return timings
+
+
+def extrapolate(timings, particles, batches, inactive, ranks=1):
+    """Estimated wall time in seconds of the full run.
+
+    The calibration runs as a single process; with several MPI ranks the
+    transport time is divided among them (ideal scaling, so a lower bound).
+    """
+    active_rate = timings.get("active")
+    if not active_rate:
+        raise ValueError("The calibration run reported no calculation rate")
+    inactive_rate = timings.get("inactive", active_rate)
+    return (timings.get("init", 0.0) + (inactive * particles / inactive_rate
+                                        + (batches - inactive) * particles / active_rate) / max(1, int(ranks)))
+
+
+def calibrate(run_dir, particles=500, batches=5, inactive=2, cross_sections=None, threads=None,
+              openmc_exec="openmc", cancel=None, ranks=1):
+    """Run the tiny calibration and return (estimated seconds, timings, output lines).
+
+    threads are per rank; the estimate is for ranks MPI ranks (see extrapolate).
+    """
+    full = read_run_size(os.path.join(run_dir, "settings.xml"))
+    cal_dir = prepare_calibration(run_dir, particles, batches, inactive)
+    args = ["-s", str(threads)] if threads else []
+    runner = OpenMCRunner(cal_dir, cross_sections=cross_sections, openmc_exec=openmc_exec, args=args)
+    lines = []
+    runner.start()
+    while not runner.finished():
+        if cancel is not None and cancel.is_set():
+            runner.cancel()
+        lines.extend(runner.poll_lines())
+        time.sleep(0.1)
+    lines.extend(runner.poll_lines())
+    if runner.cancelled:
+        raise InterruptedError("Calibration cancelled")
+    if runner.returncode != 0:
+        tail = "\n".join(lines[-10:])
+        raise ValueError(f"Calibration run failed (exit code {runner.returncode}):\n{tail}")
+    timings = parse_timings(lines)
+    return extrapolate(timings, *full, ranks=ranks), timings, lines
+
+
+def ranks_note(ranks):
+    """What a calibrated estimate assumes about MPI ranks, for reports."""
+    if ranks > 1:
+        return f"{ranks} MPI ranks, assuming ideal scaling of the single-rank calibration"
+    return "a single MPI rank"
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}h {m:02d}m {s:02d}s" if h else f"{m}m {s:02d}s"
@@ -0,0 +1,159 @@
+import os
+import threading
+import tkinter as tk
+from tkinter import messagebox
+
+from .project import get_project
+from .preflight import (xml_tally_bins, check_tallies, format_tally_report, load_thresholds, read_run_size,
+                        calibrate, format_duration, ranks_note)
+
+POLL_MS = 200
+
+
+class PreflightWindow:
+    """Tally memory and run time estimate for the inputs staged in run_dir."""
+
+    def __init__(self, master, run_dir="output", cross_sections=None, launch=None):
+        self.master = tk.Toplevel(master)
+        self.master.title("Pre-flight Estimate")
+        self.master.geometry("720x560")
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.run_dir = run_dir
+        self.cross_sections = cross_sections
+        self.thread = None
+        self.cancel = threading.Event()
+        self.result = None
+
+        limits = load_thresholds(get_project().settings)
+        options = tk.LabelFrame(self.master, text="Limits")
+        options.pack(fill="x", padx=8, pady=6)
+        tk.Label(options, text="Max bins per tally:").grid(row=0, column=0, sticky="w", padx=4)
+        self.max_bins_entry = tk.Entry(options, width=14)
+        self.max_bins_entry.insert(0, str(limits["max_bins"]))
+        self.max_bins_entry.grid(row=0, column=1, padx=4)
+        tk.Label(options, text="Max fraction of RAM:").grid(row=0, column=2, sticky="w", padx=4)
+        self.fraction_entry = tk.Entry(options, width=8)
+        self.fraction_entry.insert(0, str(limits["max_memory_fraction"]))
+        self.fraction_entry.grid(row=0, column=3, padx=4)
+        tk.Label(options, text="MPI ranks per node:").grid(row=1, column=0, sticky="w", padx=4)
+        self.ranks_spin = tk.Spinbox(options, from_=1, to=1024, width=6)
+        self.ranks_spin.grid(row=1, column=1, sticky="w", padx=4)
+        if launch:
+            # every rank of the launch profile runs on this host
+            self.ranks_spin.delete(0, tk.END)
+            self.ranks_spin.insert(0, str(launch["ranks"]))
+        tk.Button(options, text="Save Limits", command=self.save_limits).grid(row=1, column=2, padx=4, pady=4)
+        tk.Button(options, text="Estimate", command=self.estimate).grid(row=1, column=3, padx=4, pady=4)
+
+        calib = tk.LabelFrame(self.master, text="Run time (short calibration run)")
+        calib.pack(fill="x", padx=8, pady=4)
+        tk.Label(calib, text="Particles per batch:").pack(side="left", padx=4)
+        self.particles_entry = tk.Entry(calib, width=8)
+        self.particles_entry.insert(0, "500")
+        self.particles_entry.pack(side="left")
+        tk.Label(calib, text="Threads:").pack(side="left", padx=4)
+        self.threads_entry = tk.Entry(calib, width=5)
+        self.threads_entry.pack(side="left")
+        if launch:
+            self.threads_entry.insert(0, str(launch["threads"]))
+        self.calib_button = tk.Button(calib, text="Calibrate", command=self.start_calibration)
+        self.calib_button.pack(side="left", padx=6, pady=4)
+
+        self.report_text = tk.Text(self.master, font=("Courier", 9), wrap="none")
+        self.report_text.pack(fill="both", expand=True, padx=8, pady=6)
+        self.status = tk.Label(self.master, text="", anchor="w")
+        self.status.pack(fill="x", padx=8, pady=(0, 6))
+
+        self.estimate()
+
+    def limits(self):
+        try:
+            return {"max_bins": int(self.max_bins_entry.get()),
+                    "max_memory_fraction": float(self.fraction_entry.get())}
+        except ValueError:
+            raise ValueError("Limits must be a whole number of bins and a fraction such as 0.5")
+
+    def save_limits(self):
+        project = get_project()
+        if not project.settings:
+            messagebox.showerror("Error", "No settings.json yet; save the simulation settings first")
+            return
+        try:
+            project.settings["preflight"] = self.limits()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        project.mark_dirty("settings")
+        project.save(["settings"])
+        self.status.config(text="Limits saved to settings.json")
+
+    # ---------------- Tally memory ----------------
+    def estimate(self):
+        self.report_text.delete("1.0", tk.END)
+        tallies = os.path.join(self.run_dir, "tallies.xml")
+        lines = []
+        if os.path.exists(tallies):
+            try:
+                summary = check_tallies(xml_tally_bins(tallies), int(self.ranks_spin.get()), self.limits())
+                lines.append(format_tally_report(summary))
+            except Exception as e:
+                lines.append(f"Could not read {tallies}: {e}")
+        else:
+            lines.append("No tallies.xml in the run directory.")
+        try:
+            particles, batches, inactive = read_run_size(os.path.join(self.run_dir, "settings.xml"))
+            lines.append(f"\n{particles:,} particles x {batches} batches ({inactive} inactive) "
+                         f"= {particles * batches:,} histories")
+        except Exception as e:
+            lines.append(f"\nCould not read settings.xml: {e}")
+        self.report_text.insert(tk.END, "\n".join(lines))
+
+    # ---------------- Calibration ----------------
+    def start_calibration(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        try:
+            particles = int(self.particles_entry.get())
+            threads = int(self.threads_entry.get()) if self.threads_entry.get().strip() else None
+            ranks = int(self.ranks_spin.get())
+        except ValueError:
+            messagebox.showerror("Error", "Particles, threads and ranks must be whole numbers.")
+            return
+        self.cancel.clear()
+        self.result = None
+        self.calibrated_ranks = ranks
+        self.calib_button.config(state="disabled")
+        self.status.config(text="Running calibration...")
+
+        def run():
+            try:
+                self.result = calibrate(self.run_dir, particles=particles, cross_sections=self.cross_sections,
+                                        threads=threads, cancel=self.cancel, ranks=ranks)
+            except Exception as e:
+                self.result = e
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        self.master.after(POLL_MS, self.poll)
+
+    def poll(self):
+        if not self.master.winfo_exists():
+            return
+        if self.thread.is_alive():
+            self.master.after(POLL_MS, self.poll)
+            return
+        self.calib_button.config(state="normal")
+        if isinstance(self.result, Exception):
+            self.status.config(text="Calibration failed")
+            messagebox.showerror("Error", str(self.result))
+            return
+        seconds, timings, _ = self.result
+        rates = ", ".join(f"{k} {timings[k]:.4g} particles/s" for k in ("inactive", "active") if k in timings)
+        self.report_text.insert(tk.END, f"\nCalibration: {rates}; initialization {timings.get('init', 0):.1f} s"
+                                        f"\nEstimated wall time of the full run: {format_duration(seconds)}"
+                                        f" ({ranks_note(self.calibrated_ranks)})")
+        self.status.config(text=f"Estimated wall time: {format_duration(seconds)}")
+
+    def on_close(self):
+        self.cancel.set()
+        self.master.destroy()
@@ -0,0 +1,170 @@
+"""In-memory project model shared by every builder window.
+
+Each output/*.json file is read once, on first use. Windows edit the loaded
+objects in place and call ``mark_dirty``; ``save(keys)`` then rewrites the
+changed files among keys, each through a temporary file and an atomic rename.
+Windows save only their own key, so unsaved edits in other open builders stay
+in memory until those builders are saved.
+"""
+import os
+import json
+import tempfile
+
+from .lattice_model import lattice_universes
+
+PROJECT_FILES = {
+    "materials": ("materials.json", dict),
+    "surfaces": ("surfaces.json", dict),
+    "cells": ("cells.json", list),
+    "universes": ("universes.json", dict),
+    "lattices": ("lattices.json", dict),
+    "tallies": ("tallies.json", list),
+    "settings": ("settings.json", dict),
+    "geometry": ("geometry.json", dict),
+}
+
+
+def load_json(path, default=None):
+    """Load a JSON file, returning default if it does not exist."""
+    if not os.path.exists(path):
+        return default
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def default_file_mode():
+    """Permissions a newly created file gets under the current umask (mkstemp uses 0600)."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def atomic_write_json(path, data, indent=2):
+    """Write JSON to a temp file in the same directory, then rename over path."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        os.chmod(tmp_path, default_file_mode())
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class Project:
+    def __init__(self, project_dir="output"):
+        self.project_dir = project_dir
+        self.dirty = set()
+        self.revision = 0   # bumped on every change; caches key on it
+        self._data = {}
+
+    def path(self, key):
+        return os.path.join(self.project_dir, PROJECT_FILES[key][0])
+
+    def get(self, key):
+        """Return the loaded data for key, reading its file on first access."""
+        if key not in self._data:
+            filename, kind = PROJECT_FILES[key]
+            try:
+                data = load_json(self.path(key), kind())
+            except Exception as e:
+                print(f"Error loading {filename}: {e}")
+                data = kind()
+            self._data[key] = data if isinstance(data, kind) else kind()
+        return self._data[key]
+
+    def set(self, key, data):
+        self._data[key] = data
+        self.mark_dirty(key)
+
+    def mark_dirty(self, key):
+        self.dirty.add(key)
+        self.revision += 1
+
+    def save(self, keys=None):
+        """Flush the changed files among keys (default: all); returns the list of paths written."""
+        written = []
+        for key in sorted(self.dirty if keys is None else self.dirty & set(keys)):
+            atomic_write_json(self.path(key), self._data[key])
+            written.append(self.path(key))
+            self.dirty.discard(key)
+        return written
+
+    def as_dict(self):
+        return {key: self.get(key) for key in PROJECT_FILES}
+
+    # Convenience accessors
+    materials = property(lambda self: self.get("materials"))
+    surfaces = property(lambda self: self.get("surfaces"))
+    cells = property(lambda self: self.get("cells"))
+    universes = property(lambda self: self.get("universes"))
+    lattices = property(lambda self: self.get("lattices"))
+    tallies = property(lambda self: self.get("tallies"))
+    settings = property(lambda self: self.get("settings"))
+    geometry = property(lambda self: self.get("geometry"))
+
+
+def find_root_universe(project):
+    """Pick the universe that is not used as a fill anywhere else."""
+    universes = project["universes"]
+    used = {c["universe"] for c in project["cells"] if "universe" in c}
+    for lat in project["lattices"].values():
+        used.add(lat.get("outer"))
+        used.update(lattice_universes(lat))
+    candidates = [name for name in universes if name not in used]
+    if len(candidates) != 1:
+        raise ValueError("Cannot determine the root universe; select one in the Final Geometry window "
+                         f"or pass --root (candidates: {', '.join(candidates) or 'none'})")
+    return candidates[0]
+
+
+def reachable_cells(project, root=None):
+    """Names of the cells geometry.xml will contain, in cells.json order.
+
+    The exporter builds the geometry from the root universe only, so cells
+    that no fill path reaches from it are left out. Without universes every
+    cell is in the root universe.
+    """
+    if not project["universes"]:
+        return [c["name"] for c in project["cells"]]
+    root = root or project["geometry"].get("root_universe") or find_root_universe(project)
+    cells = {c["name"]: c for c in project["cells"]}
+    seen_cells, seen = set(), set()
+    pending = [("universe", root)]
+    while pending:
+        key = pending.pop()
+        if key in seen:
+            continue
+        seen.add(key)
+        kind, name = key
+        if kind == "universe":
+            for c in project["universes"].get(name, {}).get("cells", []):
+                if c in cells and c not in seen_cells:
+                    seen_cells.add(c)
+                    if "lattice" in cells[c]:
+                        pending.append(("lattice", cells[c]["lattice"]))
+                    elif "universe" in cells[c]:
+                        pending.append(("universe", cells[c]["universe"]))
+        elif name in project["lattices"]:
+            lat = project["lattices"][name]
+            pending.extend(("universe", u) for u in lattice_universes(lat))
+            if lat.get("outer"):
+                pending.append(("universe", lat["outer"]))
+    return [c["name"] for c in project["cells"] if c["name"] in seen_cells]
+
+
+_projects = {}
+
+
+def get_project(project_dir="output"):
+    """Return the shared Project for project_dir, creating it on first use."""
+    key = os.path.abspath(project_dir)
+    if key not in _projects:
+        _projects[key] = Project(project_dir)
+    return _projects[key]
@@ -0,0 +1,208 @@
+"""Parser and compiled form for cell region expressions.
+
+Grammar (same precedence as Python, so expressions keep meaning the same
+thing in the generated geometry.py)::
+
+    expr    := and ('|' and)*
+    and     := unary ('&' unary)*
+    unary   := '~' unary | '(' expr ')' | ('+' | '-') NAME
+    NAME    := letter or '_', then letters, digits or '_'
+
+Every surface needs a sign: '+s1' is the positive half-space, '-s1' the
+negative one. '~' complements a region, so '~(+s3)' (the same as '-s3') is
+valid while a bare '~s3' is rejected. '&' binds tighter than '|', e.g.
+'+s1 & -s2 | ~(+s3)' means '(+s1 & -s2) | ~(+s3)'.
+
+Expressions are compiled once into postfix code and memoized by string.
+The compiled form can build an openmc.Region, print canonical Python, or
+evaluate a whole batch of points from precomputed surface senses.
+"""
+import re
+from functools import lru_cache
+import numpy as np
+
+TOKEN_RE = re.compile(r"\s*(?:([A-Za-z_]\w*)|(.))")
+
+# Postfix opcodes
+HALF, AND, OR, NOT = "half", "and", "or", "not"
+
+
+class RegionSyntaxError(ValueError):
+    def __init__(self, message, position):
+        super().__init__(f"{message} at position {position + 1}")
+        self.position = position
+
+
+def tokenize(expression):
+    tokens = []
+    pos = 0
+    while pos < len(expression):
+        m = TOKEN_RE.match(expression, pos)
+        if m.group(1) is None and m.group(2) is None:
+            break   # trailing whitespace
+        start = m.start(1) if m.group(1) is not None else m.start(2)
+        if m.group(1) is not None:
+            tokens.append(("name", m.group(1), start))
+        elif m.group(2) in "+-~&|()":
+            tokens.append((m.group(2), m.group(2), start))
+        else:
+            raise RegionSyntaxError(f"Unexpected character '{m.group(2)}'", start)
+        pos = m.end()
+    tokens.append(("end", "", len(expression)))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, expression):
+        self.tokens = tokenize(expression)
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i]
+
+    def take(self, kind):
+        tok = self.tokens[self.i]
+        if tok[0] != kind:
+            expected = "a surface name" if kind == "name" else f"'{kind}'"
+            found = "end of expression" if tok[0] == "end" else f"'{tok[1]}'"
+            raise RegionSyntaxError(f"Expected {expected}, found {found}", tok[2])
+        self.i += 1
+        return tok
+
+    def parse(self):
+        node = self.expr()
+        self.take("end")
+        return node
+
+    def expr(self):
+        children = [self.and_expr()]
+        while self.peek()[0] == "|":
+            self.i += 1
+            children.append(self.and_expr())
+        return children[0] if len(children) == 1 else _flatten(OR, children)
+
+    def and_expr(self):
+        children = [self.unary()]
+        while self.peek()[0] == "&":
+            self.i += 1
+            children.append(self.unary())
+        return children[0] if len(children) == 1 else _flatten(AND, children)
+
+    def unary(self):
+        kind, _, pos = self.peek()
+        if kind == "~":
+            self.i += 1
+            return (NOT, self.unary())
+        if kind == "(":
+            self.i += 1
+            node = self.expr()
+            self.take(")")
+            return node
+        if kind in ("+", "-"):
+            self.i += 1
+            return (HALF, self.take("name")[1], kind == "+")
+        if kind == "name":
+            raise RegionSyntaxError(f"Surface '{self.peek()[1]}' needs a sign (+ or -)", pos)
+        found = "end of expression" if kind == "end" else f"'{self.peek()[1]}'"
+        raise RegionSyntaxError(f"Expected +surface, -surface, ~ or '(', found {found}", pos)
+
+
+def _flatten(op, children):
+    flat = []
+    for child in children:
+        flat.extend(child[1] if child[0] == op else [child])
+    return (op, flat)
+
+
+class CompiledRegion:
+    """Postfix form of a region expression."""
+
+    def __init__(self, expression, ast):
+        self.expression = expression
+        self.ast = ast
+        code = []
+        self._emit(ast, code)
+        self.code = tuple(code)
+        self.surfaces = tuple(dict.fromkeys(op[1] for op in self.code if op[0] == HALF))
+
+    def _emit(self, node, code):
+        if node[0] == HALF:
+            code.append(node)
+        elif node[0] == NOT:
+            self._emit(node[1], code)
+            code.append((NOT,))
+        else:
+            for child in node[1]:
+                self._emit(child, code)
+            code.append((node[0], len(node[1])))
+
+    def _run(self, half, and_, or_, not_):
+        stack = []
+        for op in self.code:
+            if op[0] == HALF:
+                stack.append(half(op[1], op[2]))
+            elif op[0] == NOT:
+                stack.append(not_(stack.pop()))
+            else:
+                args = stack[-op[1]:]
+                del stack[-op[1]:]
+                stack.append(and_(args) if op[0] == AND else or_(args))
+        return stack[0]
+
+    def unknown_surfaces(self, surfaces):
+        return [name for name in self.surfaces if name not in surfaces]
+
+    def to_openmc(self, surfaces):
+        """Build an openmc.Region from {name: openmc surface}."""
+        import openmc
+
+        missing = self.unknown_surfaces(surfaces)
+        if missing:
+            raise ValueError(f"Unknown surfaces in region '{self.expression}': {', '.join(missing)}")
+        return self._run(lambda name, pos: +surfaces[name] if pos else -surfaces[name],
+                         openmc.Intersection, openmc.Union, lambda r: ~r)
+
+    def evaluate(self, senses):
+        """Vectorized membership test; senses maps surface name -> bool array (True = positive side)."""
+        return self._run(lambda name, pos: senses[name] if pos else ~senses[name],
+                         lambda a: np.logical_and.reduce(a), lambda a: np.logical_or.reduce(a), np.logical_not)
+
+    def halfspaces(self):
+        """[(surface, positive), ...] if the region is a plain intersection of halfspaces, else None."""
+        if self.ast[0] == HALF:
+            return [self.ast[1:]]
+        if self.ast[0] == AND and all(child[0] == HALF for child in self.ast[1]):
+            return [child[1:] for child in self.ast[1]]
+        return None
+
+    def to_python(self):
+        """Canonical Python expression with explicit grouping."""
+        def fmt(node, parent=None):
+            if node[0] == HALF:
+                return ("+" if node[2] else "-") + node[1]
+            if node[0] == NOT:
+                inner = fmt(node[1], NOT)
+                return "~" + inner
+            text = (" & " if node[0] == AND else " | ").join(fmt(c, node[0]) for c in node[1])
+            return f"({text})" if parent is not None else text
+        return fmt(self.ast)
+
+
+@lru_cache(maxsize=4096)
+def compile_region(expression):
+    """Parse and compile a region expression (memoized by string)."""
+    if not expression.strip():
+        raise RegionSyntaxError("Region expression is empty", 0)
+    return CompiledRegion(expression, _Parser(expression).parse())
+
+
+def check_region(expression, surfaces):
+    """Return an error message for the expression, or None if it is valid."""
+    try:
+        compiled = compile_region(expression)
+    except RegionSyntaxError as e:
+        return str(e)
+    missing = compiled.unknown_surfaces(surfaces)
+    if missing:
+        return f"Unknown surfaces: {', '.join(missing)}"
+    return None
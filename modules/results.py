@@ -0,0 +1,288 @@
+"""Lazy access to tally results in OpenMC statepoint files.
+
+Opening a statepoint reads only tally metadata: filters, nuclides, scores
+and the shape of each results dataset. Values are read on request for the
+filter bins selected, in blocks of CHUNK_BINS, straight from the file (a
+memory map when the dataset is stored contiguously, HDF5 hyperslab reads
+otherwise). The CSV and NPZ exporters stream the same blocks, so a 10^8-bin
+mesh tally is never held in memory at once.
+
+A tally's filter bins are addressed as a list of axes in C order. Each
+filter is one axis, except a mesh filter, which is split into its z, y and
+x axes (OpenMC numbers mesh bins with x fastest).
+"""
+import glob
+import os
+import zipfile
+import numpy as np
+import h5py
+
+CHUNK_BINS = 1_000_000
+
+
+def latest_statepoint(run_dir="output"):
+    """Most recently written statepoint.*.h5 in run_dir, or None."""
+    paths = glob.glob(os.path.join(run_dir, "statepoint.*.h5"))
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def latest_source(run_dir="output"):
+    """Most recently written source bank in run_dir (source*.h5, surface_source.h5 or a statepoint), or None."""
+    paths = glob.glob(os.path.join(run_dir, "source*.h5")) + glob.glob(os.path.join(run_dir, "surface_source.h5"))
+    if paths:
+        return max(paths, key=os.path.getmtime)
+    # statepoints carry the source bank unless it was written separately
+    for path in sorted(glob.glob(os.path.join(run_dir, "statepoint.*.h5")), key=os.path.getmtime, reverse=True):
+        with h5py.File(path, "r") as f:
+            if "source_bank" in f:
+                return path
+    return None
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+class Axis:
+    """One selectable dimension of a tally's filter bins."""
+
+    def __init__(self, name, size, labels=None):
+        self.name = name
+        self.size = int(size)
+        self._labels = labels
+
+    def label(self, i):
+        if self._labels is not None:
+            return self._labels(i)
+        return str(i)
+
+
+def _filter_axes(sp, group):
+    """Axes for one filter group; bin values are read here, results are not."""
+    kind = _text(group["type"][()])
+    n_bins = int(group["n_bins"][()])
+    if kind == "mesh":
+        mesh_id = int(np.ravel(group["bins"][()])[0])
+        dims = sp.mesh_dimension(mesh_id)
+        if dims is not None and int(np.prod(dims)) == n_bins:
+            names = ("x", "y", "z")[:len(dims)]
+            return [Axis(f"mesh {mesh_id} {n}", d) for n, d in zip(names, dims)][::-1]
+        return [Axis(f"mesh {mesh_id}", n_bins)]
+
+    bins = group["bins"][()]
+    if kind.startswith("energy") or kind in ("mu", "polar", "azimuthal", "time"):
+        edges = np.ravel(bins)
+        if len(edges) == n_bins + 1:
+            return [Axis(kind, n_bins, lambda i: f"{edges[i]:.4g} - {edges[i + 1]:.4g}")]
+    if len(bins) == n_bins:
+        return [Axis(kind, n_bins, lambda i: f"{kind} {' '.join(map(str, np.ravel(bins[i])))}")]
+    return [Axis(kind, n_bins)]
+
+
+class TallyInfo:
+    def __init__(self, sp, tally_id, group):
+        self.sp = sp
+        self.id = tally_id
+        self.name = _text(group["name"][()]) if "name" in group else ""
+        self.n_realizations = int(group["n_realizations"][()])
+        self.nuclides = [_text(n) for n in group["nuclides"][()]] if "nuclides" in group else ["total"]
+        self.scores = [_text(s) for s in group["score_bins"][()]]
+        self.filters = []
+        self.axes = []
+        if int(group["n_filters"][()]) > 0:
+            for filter_id in np.ravel(group["filters"][()]):
+                fgroup = sp.file[f"tallies/filters/filter {int(filter_id)}"]
+                axes = _filter_axes(sp, fgroup)
+                self.filters.append((_text(fgroup["type"][()]), int(fgroup["n_bins"][()]), axes))
+                self.axes.extend(axes)
+        self.dataset = group["results"]
+        self.n_bins = self.dataset.shape[0]
+        if int(np.prod([a.size for a in self.axes])) != self.n_bins:
+            # filters we could not interpret: fall back to one flat axis
+            self.axes = [Axis("bin", self.n_bins)]
+
+    @property
+    def title(self):
+        return f"Tally {self.id}" + (f": {self.name}" if self.name else "")
+
+    @property
+    def shape(self):
+        return tuple(a.size for a in self.axes)
+
+    def column(self, score, nuclide="total"):
+        """Results column of a (nuclide, score) pair; OpenMC stores nuclides outermost."""
+        try:
+            return self.nuclides.index(nuclide) * len(self.scores) + self.scores.index(score)
+        except ValueError:
+            raise ValueError(f"{self.title} has no score '{score}' for nuclide '{nuclide}'") from None
+
+    # ---------------- Reading ----------------
+    def selection_shape(self, selection):
+        """Shape of the result for selection (per axis: a bin index, or None for all bins)."""
+        return tuple(a.size for a, s in zip(self.axes, selection) if s is None)
+
+    def runs(self, selection):
+        """(start, count, step) flat-bin runs covering selection, in C order."""
+        selection = list(selection)
+        if len(selection) != len(self.axes):
+            raise ValueError(f"{self.title} has {len(self.axes)} filter axes, got {len(selection)}")
+        for a, s in zip(self.axes, selection):
+            if s is not None and not 0 <= s < a.size:
+                raise ValueError(f"Bin {s} is outside {a.name} (0-{a.size - 1})")
+        shape = self.shape
+        strides = [int(np.prod(shape[k + 1:])) for k in range(len(shape))]
+        # The last group of consecutive 'all' axes is read as one evenly strided
+        # run (fixed axes after it only shift the start); earlier axes are looped.
+        last = max((k for k, s in enumerate(selection) if s is None), default=-1)
+        first = last
+        while first > 0 and selection[first - 1] is None:
+            first -= 1
+        offset = sum(s * strides[k] for k, s in enumerate(selection) if s is not None and k > last)
+        count = int(np.prod(shape[first:last + 1])) if last >= 0 else 1
+        step = strides[last] if last >= 0 else 1
+        first = max(first, 0)
+        outer = [range(a.size) if s is None else (s,) for a, s in zip(self.axes[:first], selection[:first])]
+        for index in np.ndindex(*[len(r) for r in outer]):
+            start = offset + sum(r[i] * strides[k] for k, (r, i) in enumerate(zip(outer, index)))
+            yield start, count, step
+
+    def blocks(self, selection, score, nuclide="total", chunk=CHUNK_BINS):
+        """Yield (mean, std. dev.) arrays of at most chunk bins, in selection order."""
+        col = self.column(score, nuclide)
+        data = self.sp.results_array(self)
+        n = self.n_realizations
+        for start, count, step in self.runs(selection):
+            for j in range(0, count, chunk):
+                a = start + j * step
+                m = min(chunk, count - j)
+                raw = np.asarray(data[a:a + (m - 1) * step + 1:step, col, :], dtype=float)
+                if n == 0:
+                    yield np.full(m, np.nan), np.full(m, np.nan)
+                    continue
+                mean = raw[:, 0] / n
+                var = np.maximum(raw[:, 1] / n - mean * mean, 0.0) / max(n - 1, 1)
+                yield mean, np.sqrt(var)
+
+    def read(self, selection, score, nuclide="total", max_bins=None):
+        """(mean, std. dev.) arrays shaped like the selection."""
+        shape = self.selection_shape(selection)
+        size = int(np.prod(shape))
+        if max_bins is not None and size > max_bins:
+            raise ValueError(f"Selection has {size:,} bins (limit {max_bins:,}); fix more filter bins or export it")
+        mean, std = np.empty(size), np.empty(size)
+        pos = 0
+        for m, s in self.blocks(selection, score, nuclide):
+            mean[pos:pos + len(m)], std[pos:pos + len(m)] = m, s
+            pos += len(m)
+        return mean.reshape(shape), std.reshape(shape)
+
+
+class Statepoint:
+    """Open statepoint file; use as a context manager or call close()."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = h5py.File(path, "r")
+        if _text(self.file.attrs.get("filetype", b"statepoint")) != "statepoint":
+            self.file.close()
+            raise ValueError(f"{path} is not an OpenMC statepoint file")
+        self._mmaps = {}
+        self.tallies = {}
+        if "tallies" in self.file:
+            ids = self.file["tallies"].attrs.get("ids", [])
+            for tally_id in np.ravel(ids):
+                group = self.file[f"tallies/tally {int(tally_id)}"]
+                if "internal" in group and group["internal"][()]:
+                    continue
+                self.tallies[int(tally_id)] = TallyInfo(self, int(tally_id), group)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mmaps.clear()
+        self.file.close()
+
+    def mesh_dimension(self, mesh_id):
+        """Bins per axis (x, y, z order) of a mesh, or None if unknown."""
+        path = f"tallies/meshes/mesh {mesh_id}"
+        if path not in self.file:
+            return None
+        mesh = self.file[path]
+        if "dimension" in mesh:
+            return [int(d) for d in np.ravel(mesh["dimension"][()])]
+        grids = [g for g in ("x_grid", "y_grid", "z_grid", "r_grid", "phi_grid") if g in mesh]
+        if grids:
+            return [len(mesh[g]) - 1 for g in grids]
+        return None
+
+    def results_array(self, tally):
+        """Results as a read-only memory map when stored contiguously, else the h5py dataset."""
+        if tally.id not in self._mmaps:
+            ds = tally.dataset
+            offset = ds.id.get_offset()
+            if offset is not None and ds.chunks is None and ds.compression is None:
+                self._mmaps[tally.id] = np.memmap(self.path, dtype=ds.dtype, mode="r", offset=offset, shape=ds.shape)
+            else:
+                self._mmaps[tally.id] = ds
+        return self._mmaps[tally.id]
+
+    def describe(self):
+        """Text listing of the tallies, from metadata only."""
+        lines = []
+        for tally in self.tallies.values():
+            lines.append(f"{tally.title}  ({tally.n_bins:,} filter bins, {tally.n_realizations} realizations)")
+            for kind, n_bins, axes in tally.filters:
+                detail = " x ".join(str(a.size) for a in axes[::-1]) if len(axes) > 1 else ""
+                lines.append(f"  filter {kind}: {n_bins:,} bins" + (f" ({detail})" if detail else ""))
+            lines.append(f"  nuclides: {', '.join(tally.nuclides)}")
+            lines.append(f"  scores: {', '.join(tally.scores)}")
+        return "\n".join(lines) if lines else "No tallies."
+
+
+# ---------------- Streaming export ----------------
+def export_csv(tally, selection, score, nuclide, path, progress=None, cancel=None):
+    """Write one row per selected bin: free-axis indices, mean, std. dev."""
+    free = [k for k, s in enumerate(selection) if s is None]
+    shape = tally.selection_shape(selection)
+    total = int(np.prod(shape))
+    done = 0
+    with open(path, "w") as f:
+        f.write(",".join([tally.axes[k].name for k in free] + ["mean", "std_dev"]) + "\n")
+        for mean, std in tally.blocks(selection, score, nuclide):
+            index = np.unravel_index(np.arange(done, done + len(mean)), shape) if shape else ()
+            columns = [np.asarray(i, dtype=float) for i in index] + [mean, std]
+            fmt = ["%d"] * len(index) + ["%.8e", "%.8e"]
+            np.savetxt(f, np.column_stack(columns), fmt=fmt, delimiter=",")
+            done += len(mean)
+            if progress:
+                progress(done, total)
+            if cancel is not None and cancel.is_set():
+                raise InterruptedError("Export cancelled")
+    return total
+
+
+def export_npz(tally, selection, score, nuclide, path, progress=None, cancel=None):
+    """Write mean and std_dev arrays (selection shape) into an .npz, block by block."""
+    shape = tally.selection_shape(selection)
+    total = int(np.prod(shape))
+    header = {"descr": np.lib.format.dtype_to_descr(np.dtype("<f8")), "fortran_order": False, "shape": shape}
+    done = 0
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for name, pick in (("mean", 0), ("std_dev", 1)):
+            with zf.open(f"{name}.npy", "w", force_zip64=True) as fp:
+                np.lib.format.write_array_header_2_0(fp, header)
+                for block in tally.blocks(selection, score, nuclide):
+                    fp.write(block[pick].astype("<f8").tobytes())
+                    done += len(block[pick])
+                    if progress:
+                        progress(done, 2 * total)
+                    if cancel is not None and cancel.is_set():
+                        raise InterruptedError("Export cancelled")
+        axes = np.array([a.name for a, s in zip(tally.axes, selection) if s is None], dtype=str)
+        with zf.open("axes.npy", "w") as fp:
+            np.lib.format.write_array(fp, axes)
+    return total
@@ -0,0 +1,332 @@
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import numpy as np
+
+from .results import Statepoint, latest_statepoint, export_csv, export_npz
+from .slice_plotter import tile_image
+
+POLL_MS = 100
+MAX_VIEW_BINS = 4_000_000   # larger selections can only be exported
+MAX_ROWS = 500
+IMAGE_SIZE = 420
+# viridis-like anchors; colour table row -1 (grey) marks NaN / non-positive values on a log scale
+ANCHORS = np.array([[68, 1, 84], [59, 82, 139], [33, 145, 140], [94, 201, 98], [253, 231, 37]], dtype=float)
+COLORS = np.vstack([
+    np.stack([np.interp(np.linspace(0, 4, 256), np.arange(5), ANCHORS[:, c]) for c in range(3)], axis=1),
+    [[200, 200, 200]],
+]).astype(np.uint8)
+
+
+class ResultsBrowser:
+    def __init__(self, master, path=None):
+        self.master = tk.Toplevel(master)
+        self.master.title("Results Browser")
+        self.master.geometry("1000x720")
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.sp = None
+        self.tally = None
+        self.axis_vars = []         # per axis: (all BooleanVar, Spinbox)
+        self.thread = None
+        self.cancel = threading.Event()
+        self.result = None
+        self.progress = (0, 0)
+        self.values = None          # last loaded (mean, std. dev., selection, tally)
+        self.image = None
+
+        top = tk.Frame(self.master)
+        top.pack(fill="x", padx=8, pady=6)
+        tk.Label(top, text="Statepoint:").pack(side="left")
+        self.path_var = tk.StringVar(value=path or latest_statepoint("output") or "")
+        tk.Entry(top, textvariable=self.path_var, width=70).pack(side="left", padx=4)
+        tk.Button(top, text="Browse", command=self.browse).pack(side="left", padx=2)
+        tk.Button(top, text="Open", command=self.open_file).pack(side="left", padx=2)
+
+        body = tk.Frame(self.master)
+        body.pack(fill="both", expand=True, padx=8)
+
+        # ===== Tally list (metadata only) =====
+        self.tree = ttk.Treeview(body, show="tree", selectmode="browse")
+        self.tree.pack(side="left", fill="y")
+        self.tree.column("#0", width=300)
+        self.tree.bind("<<TreeviewSelect>>", self.select_tally)
+
+        right = tk.Frame(body)
+        right.pack(side="left", fill="both", expand=True, padx=8)
+
+        controls = tk.Frame(right)
+        controls.pack(fill="x")
+        tk.Label(controls, text="Score:").grid(row=0, column=0, sticky="e")
+        self.score_dropdown = ttk.Combobox(controls, state="readonly", width=16)
+        self.score_dropdown.grid(row=0, column=1, padx=4)
+        tk.Label(controls, text="Nuclide:").grid(row=0, column=2, sticky="e")
+        self.nuclide_dropdown = ttk.Combobox(controls, state="readonly", width=12)
+        self.nuclide_dropdown.grid(row=0, column=3, padx=4)
+        self.log_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(controls, text="Log colour scale", variable=self.log_var, command=self.draw_image).grid(
+            row=0, column=4, padx=4)
+
+        self.axes_frame = tk.LabelFrame(right, text="Filter bins (tick 'All' to view a whole axis)")
+        self.axes_frame.pack(fill="x", pady=4)
+
+        btn_frame = tk.Frame(right)
+        btn_frame.pack(pady=2)
+        self.load_button = tk.Button(btn_frame, text="Load", command=self.load)
+        self.load_button.grid(row=0, column=0, padx=4)
+        tk.Button(btn_frame, text="Export CSV", command=lambda: self.export("csv")).grid(row=0, column=1, padx=4)
+        tk.Button(btn_frame, text="Export NPZ", command=lambda: self.export("npz")).grid(row=0, column=2, padx=4)
+        tk.Button(btn_frame, text="Stop", command=self.cancel.set).grid(row=0, column=3, padx=4)
+        self.status = tk.Label(right, text="", anchor="w")
+        self.status.pack(fill="x")
+
+        view = tk.Frame(right)
+        view.pack(fill="both", expand=True)
+        self.canvas = tk.Canvas(view, width=IMAGE_SIZE, height=IMAGE_SIZE, bg="white")
+        self.canvas.pack(side="left", anchor="n")
+        self.canvas.bind("<Motion>", self.show_value)
+        self.table = ttk.Treeview(view, columns=("mean", "std", "rel"), show="tree headings")
+        self.table.heading("#0", text="Bin")
+        self.table.heading("mean", text="Mean")
+        self.table.heading("std", text="Std. dev.")
+        self.table.heading("rel", text="Rel. err.")
+        self.table.column("#0", width=160)
+        for col in ("mean", "std", "rel"):
+            self.table.column(col, width=90, anchor="e")
+        self.table.pack(side="left", fill="both", expand=True, padx=4)
+
+        if self.path_var.get():
+            self.open_file()
+
+    # ---------------- File and metadata ----------------
+    def browse(self):
+        path = filedialog.askopenfilename(title="Select statepoint", filetypes=[("HDF5 files", "*.h5")],
+                                          initialdir="output" if os.path.isdir("output") else None)
+        if path:
+            self.path_var.set(path)
+            self.open_file()
+
+    def open_file(self):
+        if self.busy():
+            return
+        path = self.path_var.get().strip()
+        try:
+            sp = Statepoint(path)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Error", f"Could not open {path}:\n{e}")
+            return
+        if self.sp is not None:
+            self.sp.close()
+        self.sp, self.tally, self.values = sp, None, None
+        self.tree.delete(*self.tree.get_children())
+        for tally in sp.tallies.values():
+            node = self.tree.insert("", tk.END, iid=str(tally.id), text=f"{tally.title} ({tally.n_bins:,} bins)")
+            for kind, n_bins, axes in tally.filters:
+                dims = " x ".join(str(a.size) for a in axes[::-1])
+                self.tree.insert(node, tk.END, text=f"{kind}: {dims if len(axes) > 1 else n_bins} bins")
+            self.tree.insert(node, tk.END, text="nuclides: " + ", ".join(tally.nuclides))
+            self.tree.insert(node, tk.END, text="scores: " + ", ".join(tally.scores))
+        self.status.config(text=f"{len(sp.tallies)} tallies in {os.path.basename(path)}")
+
+    def select_tally(self, event=None):
+        selection = self.tree.selection()
+        if not selection or self.sp is None:
+            return
+        item = selection[0]
+        while self.tree.parent(item):
+            item = self.tree.parent(item)
+        tally = self.sp.tallies[int(item)]
+        if tally is self.tally:
+            return
+        self.tally = tally
+        self.score_dropdown.config(values=tally.scores)
+        self.score_dropdown.set(tally.scores[0] if tally.scores else "")
+        self.nuclide_dropdown.config(values=tally.nuclides)
+        self.nuclide_dropdown.set("total" if "total" in tally.nuclides else tally.nuclides[0])
+
+        for widget in self.axes_frame.winfo_children():
+            widget.destroy()
+        self.axis_vars = []
+        # Default view: an x-y plane through the middle of a mesh, otherwise the
+        # last two axes; every other axis starts at its middle (mesh) or first bin
+        mesh = [k for k, a in enumerate(tally.axes) if a.name.startswith("mesh")]
+        free = mesh[-2:] if mesh else list(range(len(tally.axes)))[-2:]
+        while len(free) > 1 and np.prod([tally.axes[k].size for k in free]) > MAX_VIEW_BINS:
+            free.pop(0)
+        defaults = [None if k in free else (a.size // 2 if k in mesh else 0) for k, a in enumerate(tally.axes)]
+
+        for row, (axis, default) in enumerate(zip(tally.axes, defaults)):
+            tk.Label(self.axes_frame, text=f"{axis.name} ({axis.size})").grid(row=row, column=0, sticky="w", padx=4)
+            all_var = tk.BooleanVar(value=default is None)
+            tk.Checkbutton(self.axes_frame, text="All", variable=all_var).grid(row=row, column=1)
+            spin = tk.Spinbox(self.axes_frame, from_=0, to=axis.size - 1, width=8)
+            spin.delete(0, tk.END)
+            spin.insert(0, str(default or 0))
+            spin.grid(row=row, column=2, padx=4)
+            label = tk.Label(self.axes_frame, text="", fg="gray")
+            label.grid(row=row, column=3, sticky="w")
+            spin.config(command=lambda a=axis, s=spin, lbl=label: self.show_bin_label(a, s, lbl))
+            self.show_bin_label(axis, spin, label)
+            self.axis_vars.append((all_var, spin))
+
+    def show_bin_label(self, axis, spin, label):
+        try:
+            label.config(text=axis.label(int(spin.get())))
+        except (ValueError, IndexError):
+            label.config(text="")
+
+    def selection(self):
+        """Per axis: None for all bins or the chosen bin index."""
+        selection = []
+        for (all_var, spin), axis in zip(self.axis_vars, self.tally.axes):
+            if all_var.get():
+                selection.append(None)
+                continue
+            try:
+                selection.append(int(spin.get()))
+            except ValueError:
+                raise ValueError(f"Bin for {axis.name} must be an integer") from None
+        return selection
+
+    # ---------------- Background loading ----------------
+    def busy(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, work, on_done):
+        self.cancel.clear()
+        self.result = None
+        self.progress = (0, 0)
+        self.load_button.config(state="disabled")
+
+        def run():
+            try:
+                self.result = work()
+            except Exception as e:
+                self.result = e
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        self.master.after(POLL_MS, lambda: self.poll(on_done))
+
+    def set_progress(self, done, total):
+        self.progress = (done, total)
+
+    def poll(self, on_done):
+        if not self.master.winfo_exists():
+            return
+        if self.thread.is_alive():
+            done, total = self.progress
+            self.status.config(text=f"Working... {100 * done / total:.0f}%" if total else "Working...")
+            self.master.after(POLL_MS, lambda: self.poll(on_done))
+            return
+        self.load_button.config(state="normal")
+        if isinstance(self.result, Exception):
+            self.status.config(text="Failed")
+            messagebox.showerror("Error", str(self.result))
+            return
+        on_done(self.result)
+
+    def request(self):
+        """(tally, selection, score, nuclide) for the current controls, or None after an error."""
+        if self.tally is None:
+            messagebox.showerror("Error", "Select a tally first.")
+            return None
+        if self.busy():
+            return None
+        try:
+            selection = self.selection()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return None
+        return self.tally, selection, self.score_dropdown.get(), self.nuclide_dropdown.get()
+
+    def load(self):
+        request = self.request()
+        if request is None:
+            return
+        tally, selection, score, nuclide = request
+        size = int(np.prod(tally.selection_shape(selection)))
+        if size > MAX_VIEW_BINS:
+            messagebox.showerror("Error", f"The selection has {size:,} bins; fix more filter bins "
+                                          f"(at most {MAX_VIEW_BINS:,} can be viewed) or export it.")
+            return
+        # the tally travels with the result: another one may be selected while this loads
+        self.start(lambda: tally.read(selection, score, nuclide) + (selection, tally), self.show_values)
+
+    def export(self, kind):
+        request = self.request()
+        if request is None:
+            return
+        tally, selection, score, nuclide = request
+        path = filedialog.asksaveasfilename(defaultextension=f".{kind}", filetypes=[(kind.upper(), f"*.{kind}")],
+                                            initialfile=f"tally{tally.id}_{score}.{kind}")
+        if not path:
+            return
+        writer = export_csv if kind == "csv" else export_npz
+        self.start(lambda: writer(tally, selection, score, nuclide, path, self.set_progress, self.cancel),
+                   lambda n: self.status.config(text=f"Exported {n:,} bins to {path}"))
+
+    # ---------------- Display ----------------
+    def show_values(self, values):
+        self.values = values
+        mean, std, selection, tally = values
+        free = [a for a, s in zip(tally.axes, selection) if s is None]
+        self.table.delete(*self.table.get_children())
+        flat_mean, flat_std = mean.ravel(), std.ravel()
+        shown = min(len(flat_mean), MAX_ROWS)
+        for k in range(shown):
+            index = np.unravel_index(k, mean.shape) if mean.shape else ()
+            label = ", ".join(a.label(i) for a, i in zip(free, index)) or "(single bin)"
+            m, s = flat_mean[k], flat_std[k]
+            rel = f"{s / abs(m):.3g}" if m else "-"
+            self.table.insert("", tk.END, text=label, values=(f"{m:.5g}", f"{s:.3g}", rel))
+        more = f", first {shown} listed" if shown < len(flat_mean) else ""
+        self.status.config(text=f"Loaded {len(flat_mean):,} bins{more}")
+        self.draw_image()
+
+    def draw_image(self):
+        self.canvas.delete("all")
+        if self.values is None or self.values[0].ndim != 2:
+            self.image = None
+            return
+        mean = self.values[0]
+        # Thin out rows/columns of planes larger than the canvas, then enlarge small ones
+        step = int(np.ceil(max(mean.shape) / IMAGE_SIZE))
+        shown = mean[::step, ::step]
+        if self.log_var.get():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                shown = np.where(shown > 0, np.log10(shown), np.nan)
+        finite = np.isfinite(shown)
+        indices = np.full(shown.shape, -1, dtype=np.int64)
+        if finite.any():
+            lo, hi = shown[finite].min(), shown[finite].max()
+            scaled = (shown[finite] - lo) / (hi - lo) if hi > lo else np.zeros(finite.sum())
+            indices[finite] = np.round(scaled * 255).astype(np.int64)
+        # first axis runs upwards (mesh y or z), second to the right
+        indices = indices[::-1]
+        self.pixel = max(1, IMAGE_SIZE // max(indices.shape))
+        self.step = step
+        indices = np.repeat(np.repeat(indices, self.pixel, axis=0), self.pixel, axis=1)
+        self.image = tile_image(indices, COLORS)
+        self.canvas.create_image(0, 0, image=self.image, anchor="nw")
+
+    def show_value(self, event):
+        if self.image is None:
+            return
+        mean, std, selection, tally = self.values
+        rows, cols = mean.shape
+        shown_rows = -(-rows // self.step)
+        i = (shown_rows - 1 - event.y // self.pixel) * self.step
+        j = (event.x // self.pixel) * self.step
+        if not (0 <= i < rows and 0 <= j < cols):
+            return
+        free = [a for a, s in zip(tally.axes, selection) if s is None]
+        self.status.config(text=f"{free[0].name} {free[0].label(i)}, {free[1].name} {free[1].label(j)}: "
+                                f"{mean[i, j]:.5g} +/- {std[i, j]:.3g}")
+
+    def on_close(self):
+        self.cancel.set()
+        if self.sp is not None and not self.busy():
+            self.sp.close()
+        self.master.destroy()
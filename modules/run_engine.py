@@ -0,0 +1,117 @@
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+
+from .launch_config import build_command
+
+
+class OpenMCRunner:
+    """Run the OpenMC executable as a managed subprocess.
+
+    Output lines are collected by a reader thread into a queue so that the
+    Tk main loop can drain them with ``after()`` polling and never blocks.
+    With a launch profile (see launch_config) OpenMC is started under
+    mpiexec with the profile's ranks, threads and binding.
+    """
+
+    def __init__(self, run_dir, cross_sections=None, openmc_exec="openmc", args=None, launch=None):
+        self.run_dir = run_dir
+        self.cross_sections = cross_sections
+        self.openmc_exec = openmc_exec
+        self.args = list(args or [])
+        self.launch = launch
+
+        self.process = None
+        self.paused = False
+        self.cancelled = False
+        self._lines = queue.Queue()
+        self._reader = None
+
+    # ---------------- Lifecycle ----------------
+    def start(self):
+        env = dict(os.environ)
+        if self.cross_sections:
+            env["OPENMC_CROSS_SECTIONS"] = os.path.abspath(self.cross_sections)
+        command = [self.openmc_exec] + self.args
+        if self.launch:
+            command, launch_env = build_command(self.launch, args=self.args)
+            env.update(launch_env)
+
+        # Own process group on POSIX so pause/cancel reach every child (e.g. mpiexec ranks)
+        self.process = subprocess.Popen(
+            command,
+            cwd=self.run_dir,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+            start_new_session=(os.name == "posix"),
+        )
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+
+    def _read_output(self):
+        # lines are timestamped here, when OpenMC printed them, not when the GUI drains the queue
+        for line in self.process.stdout:
+            self._lines.put((time.monotonic(), line.rstrip("\n")))
+        self.process.stdout.close()
+
+    def poll_timed_lines(self, max_lines=1000):
+        """Return up to max_lines of new (monotonic time, line) pairs without blocking."""
+        lines = []
+        while len(lines) < max_lines:
+            try:
+                lines.append(self._lines.get_nowait())
+            except queue.Empty:
+                break
+        return lines
+
+    def poll_lines(self, max_lines=1000):
+        """Return up to max_lines of new output without blocking."""
+        return [line for _, line in self.poll_timed_lines(max_lines)]
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def finished(self):
+        """True once the process has exited and all of its output was read."""
+        if self.process is None or self.process.poll() is None:
+            return False
+        return not self._reader.is_alive() and self._lines.empty()
+
+    @property
+    def returncode(self):
+        return self.process.poll() if self.process is not None else None
+
+    # ---------------- Controls ----------------
+    def _signal(self, sig):
+        if os.name == "posix":
+            os.killpg(self.process.pid, sig)
+        else:
+            self.process.send_signal(sig)
+
+    def can_pause(self):
+        return os.name == "posix"
+
+    def pause(self):
+        if self.is_running() and not self.paused and self.can_pause():
+            self._signal(signal.SIGSTOP)
+            self.paused = True
+
+    def resume(self):
+        if self.is_running() and self.paused:
+            self._signal(signal.SIGCONT)
+            self.paused = False
+
+    def cancel(self):
+        if not self.is_running():
+            return
+        self.cancelled = True
+        if self.paused:
+            self.resume()
+        self._signal(signal.SIGTERM)
@@ -0,0 +1,80 @@
+import re
+import time
+import numpy as np
+
+# "  12/1    1.04226    1.03534 +/- 0.00692" (optionally with a Shannon entropy column)
+BATCH_RE = re.compile(r"^\s*(\d+)/(\d+)\s+(.*\S)\s*$")
+COMBINED_RE = re.compile(r"Combined k-effective\s*=\s*([-+.\deE]+)\s*\+/-\s*([-+.\deE]+)")
+
+
+def parse_batch_line(line):
+    """Parse an OpenMC batch line into (batch, k, entropy, k_mean, k_std) or return None."""
+    m = BATCH_RE.match(line)
+    if not m:
+        return None
+    tokens = m.group(3).split()
+    try:
+        if "+/-" in tokens:
+            i = tokens.index("+/-")
+            k_mean, k_std = float(tokens[i - 1]), float(tokens[i + 1])
+            head = tokens[:i - 1]
+        else:
+            k_mean = k_std = np.nan
+            head = tokens
+        if not head or len(head) > 2:
+            return None
+        k = float(head[0])
+        entropy = float(head[1]) if len(head) == 2 else np.nan
+    except (ValueError, IndexError):
+        return None
+    return int(m.group(1)), k, entropy, k_mean, k_std
+
+
+def parse_combined_keff(line):
+    """Return (k, sigma) from the final 'Combined k-effective' line, or None."""
+    m = COMBINED_RE.search(line)
+    if not m:
+        return None
+    return float(m.group(1)), float(m.group(2))
+
+
+class BatchSeries:
+    """Per-batch results stored in a preallocated array that doubles when full."""
+
+    FIELDS = ("batch", "k", "entropy", "k_mean", "k_std", "rate")
+
+    def __init__(self, particles=None, capacity=1024):
+        self.particles = particles
+        self.size = 0
+        self._data = np.full((capacity, len(self.FIELDS)), np.nan)
+        self._last_time = None
+
+    def __len__(self):
+        return self.size
+
+    def append(self, batch, k, entropy, k_mean, k_std, now=None):
+        if self.size == len(self._data):
+            grown = np.full((2 * len(self._data), len(self.FIELDS)), np.nan)
+            grown[:self.size] = self._data
+            self._data = grown
+
+        # Particles/second from the wall time between consecutive batch lines
+        now = time.monotonic() if now is None else now
+        rate = np.nan
+        if self.particles and self._last_time is not None and now > self._last_time:
+            rate = self.particles / (now - self._last_time)
+        self._last_time = now
+
+        self._data[self.size] = (batch, k, entropy, k_mean, k_std, rate)
+        self.size += 1
+
+    def column(self, name):
+        return self._data[:self.size, self.FIELDS.index(name)]
+
+    def feed(self, line, now=None):
+        """Parse one line of solver output; return True if it was a batch line."""
+        parsed = parse_batch_line(line)
+        if parsed is None:
+            return False
+        self.append(*parsed, now=now)
+        return True
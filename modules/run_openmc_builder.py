@@ -1,16 +1,110 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
-import openmc
+from tkinter import ttk, filedialog, messagebox
 import os
+import xml.etree.ElementTree as ET
+import numpy as np
+
+from .material_store import ensure_material_files
+from .project import get_project
+from .nuclide_catalog import default_library_path
+from .run_engine import OpenMCRunner
+from .build_cache import stage_file
+from .launch_config import (BIND_OPTIONS, PLACES_OPTIONS, detect_topology, format_topology, suggest_profile,
+                            load_profile, save_profile, check_profile, format_command, host_name)
+from .run_monitor import BatchSeries, parse_combined_keff
+
+POLL_MS = 100
+LOG_MAX_LINES = 2000   # solver log pane keeps only the most recent lines
+
+
+def read_particles(settings_path):
+    """Read particles per batch from settings.xml (None if unavailable)."""
+    try:
+        node = ET.parse(settings_path).getroot().find("particles")
+        return int(node.text) if node is not None else None
+    except (ET.ParseError, OSError, ValueError):
+        return None
+
+
+class ConvergenceChart(tk.Canvas):
+    """Rolling k-eff and particle-rate plot whose items are updated in place."""
+
+    MAX_POINTS = 400
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, bg="white", height=180, highlightthickness=0, **kwargs)
+        self.band = self.create_polygon(0, 0, 0, 0, 0, 0, fill="#cfe2f3", outline="")
+        self.k_line = self.create_line(0, 0, 0, 0, fill="gray")
+        self.mean_line = self.create_line(0, 0, 0, 0, fill="blue", width=2)
+        self.rate_line = self.create_line(0, 0, 0, 0, fill="green")
+        self.label = self.create_text(5, 5, anchor="nw", font=("Arial", 8),
+                                      text="k (gray), average k ± σ (blue), particles/s (green)")
+
+    @staticmethod
+    def _scale(values, lo_px, hi_px):
+        finite = values[np.isfinite(values)]
+        vmin, vmax = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+        if vmax - vmin < 1e-12:
+            vmin, vmax = vmin - 0.5, vmax + 0.5
+        return hi_px - (values - vmin) / (vmax - vmin) * (hi_px - lo_px)
+
+    def _set_line(self, item, x, y):
+        mask = np.isfinite(y)
+        if mask.sum() < 2:
+            self.coords(item, 0, 0, 0, 0)
+            return
+        self.coords(item, *np.column_stack((x[mask], y[mask])).ravel().tolist())
+
+    def update_series(self, series):
+        n = len(series)
+        if n < 2:
+            return
+        width = max(self.winfo_width(), 100)
+        height = max(self.winfo_height(), 100)
+
+        # Decimate to a bounded number of points so redraw cost stays flat
+        step = max(1, n // self.MAX_POINTS)
+        batch = series.column("batch")[::step]
+        k = series.column("k")[::step]
+        mean = series.column("k_mean")[::step]
+        std = series.column("k_std")[::step]
+        rate = series.column("rate")[::step]
+
+        x = 30 + (batch - batch[0]) / max(batch[-1] - batch[0], 1) * (width - 40)
+        k_all = np.concatenate((k, mean - std, mean + std))
+        k_top, k_bottom = 20, 0.7 * height
+        finite = k_all[np.isfinite(k_all)]
+        lo, hi = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+        span = max(hi - lo, 1e-12)
+        to_px = lambda v: k_bottom - (v - lo) / span * (k_bottom - k_top)
+
+        self._set_line(self.k_line, x, to_px(k))
+        self._set_line(self.mean_line, x, to_px(mean))
+        self._set_line(self.rate_line, x, self._scale(rate, 0.75 * height, height - 5))
+
+        active = np.isfinite(mean) & np.isfinite(std)
+        if active.sum() >= 2:
+            upper = np.column_stack((x[active], to_px(mean + std)[active]))
+            lower = np.column_stack((x[active], to_px(mean - std)[active]))[::-1]
+            self.coords(self.band, *np.vstack((upper, lower)).ravel().tolist())
+        else:
+            self.coords(self.band, 0, 0, 0, 0, 0, 0)
+
+        last = n - 1
+        text = f"batch {int(series.column('batch')[last])}   k = {series.column('k')[last]:.5f}"
+        if np.isfinite(series.column("k_mean")[last]):
+            text += f"   average k = {series.column('k_mean')[last]:.5f} ± {series.column('k_std')[last]:.5f}"
+        if np.isfinite(series.column("rate")[last]):
+            text += f"   {series.column('rate')[last]:.3g} particles/s"
+        self.itemconfig(self.label, text=text)
+
 
-import shutil  # For copying files
 
 class RunOpenMCApp(tk.Toplevel):
     def __init__(self, master):
         super().__init__(master)
         self.title("Run OpenMC Simulation")
-        self.geometry("600x350")
-        self.resizable(False, False)
+        self.geometry("760x1000")
 
         # Variables
         self.geometry_file = tk.StringVar()
@@ -18,6 +112,10 @@ class RunOpenMCApp(tk.Toplevel):
         self.settings_file = tk.StringVar()
         self.tallies_file = tk.StringVar()  # optional
         self.cross_file_var = tk.StringVar()
+        self.status_var = tk.StringVar(value="Idle")
+        self.runner = None
+        self.series = None
+        self.combined_keff = None
 
         # --- GUI ---
         self.add_browse_row("Geometry XML:", self.geometry_file)
@@ -25,9 +123,51 @@ class RunOpenMCApp(tk.Toplevel):
         self.add_browse_row("Settings XML:", self.settings_file)
         self.add_browse_row("Tallies XML (optional):", self.tallies_file)
         self.add_browse_row("Cross-Sections XML:", self.cross_file_var)
+        self.cross_file_var.set(default_library_path() or "")
+
+        # Continue an earlier run from its statepoint (openmc --restart)
+        restart_frame = tk.Frame(self)
+        restart_frame.pack(fill='x', padx=10, pady=(6, 2))
+        self.restart_var = tk.BooleanVar(value=False)
+        self.restart_file = tk.StringVar()
+        tk.Checkbutton(restart_frame, text="Restart from:", variable=self.restart_var).pack(side='left')
+        tk.Entry(restart_frame, textvariable=self.restart_file, width=40).pack(side='left', padx=(0, 5))
+        tk.Button(restart_frame, text="Latest", command=self.use_latest_statepoint).pack(side='left')
+
+        self.build_launch_panel()
+
+        self.run_button = tk.Button(self, text="Run OpenMC Simulation", command=self.run_openmc_sim, width=30, bg="lightgreen")
+        self.run_button.pack(pady=10)
+
+        # Run controls (enabled while a simulation is running)
+        control_frame = tk.Frame(self)
+        control_frame.pack()
+        self.pause_button = tk.Button(control_frame, text="Pause", command=self.toggle_pause, width=12, state="disabled")
+        self.pause_button.pack(side="left", padx=5)
+        self.cancel_button = tk.Button(control_frame, text="Cancel", command=self.cancel_run, width=12, state="disabled")
+        self.cancel_button.pack(side="left", padx=5)
+        tk.Label(self, textvariable=self.status_var, anchor="w").pack(fill="x", padx=10, pady=4)
+
+        # Live solver output (bounded) and convergence chart
+        log_frame = tk.Frame(self)
+        log_frame.pack(fill="both", expand=True, padx=10)
+        log_scroll = tk.Scrollbar(log_frame)
+        log_scroll.pack(side="right", fill="y")
+        self.log_text = tk.Text(log_frame, height=12, font=("Courier", 9), state="disabled", yscrollcommand=log_scroll.set)
+        self.log_text.pack(side="left", fill="both", expand=True)
+        log_scroll.config(command=self.log_text.yview)
+
+        self.chart = ConvergenceChart(self)
+        self.chart.pack(fill="x", padx=10, pady=4)
 
-        tk.Button(self, text="Run OpenMC Simulation", command=self.run_openmc_sim, width=30, bg="lightgreen").pack(pady=10)
         tk.Button(self, text="Generate openmc_run.py", command=self.generate_openmc_run_file, width=30, bg="lightblue").pack()
+        results_frame = tk.Frame(self)
+        results_frame.pack(pady=4)
+        tk.Button(results_frame, text="Preflight", command=self.open_preflight, width=12).pack(side="left", padx=4)
+        tk.Button(results_frame, text="Browse Results", command=self.open_results, width=18).pack(side="left", padx=4)
+        tk.Button(results_frame, text="Convergence", command=self.open_convergence, width=18).pack(side="left", padx=4)
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # ---------------- Developer credit label ----------------
         tk.Label(
@@ -52,7 +192,114 @@ class RunOpenMCApp(tk.Toplevel):
         if path:
             var.set(path)
 
+    # ---------------- Launch configuration ----------------
+    def build_launch_panel(self):
+        """MPI ranks x OpenMP threads for this machine, from its saved profile or the detected cores."""
+        frame = tk.LabelFrame(self, text=f"Launch on {host_name()}")
+        frame.pack(fill='x', padx=10, pady=4)
+        self.topology = detect_topology()
+        tk.Label(frame, text=format_topology(self.topology), anchor='w').grid(row=0, column=0, columnspan=8, sticky='w', padx=4)
+
+        self.launch_vars = {key: tk.StringVar() for key in ("ranks", "threads", "bind", "places", "mpiexec", "mpi_args")}
+        tk.Label(frame, text="MPI ranks:").grid(row=1, column=0, sticky='e', padx=4)
+        tk.Spinbox(frame, from_=1, to=4096, width=5, textvariable=self.launch_vars["ranks"]).grid(row=1, column=1, sticky='w')
+        tk.Label(frame, text="Threads per rank:").grid(row=1, column=2, sticky='e', padx=4)
+        tk.Spinbox(frame, from_=1, to=4096, width=5, textvariable=self.launch_vars["threads"]).grid(row=1, column=3, sticky='w')
+        tk.Label(frame, text="Bind:").grid(row=1, column=4, sticky='e', padx=4)
+        ttk.Combobox(frame, values=BIND_OPTIONS, textvariable=self.launch_vars["bind"], state="readonly", width=8).grid(row=1, column=5)
+        tk.Label(frame, text="Places:").grid(row=1, column=6, sticky='e', padx=4)
+        ttk.Combobox(frame, values=PLACES_OPTIONS, textvariable=self.launch_vars["places"], state="readonly", width=8).grid(row=1, column=7)
+        tk.Label(frame, text="mpiexec:").grid(row=2, column=0, sticky='e', padx=4)
+        tk.Entry(frame, textvariable=self.launch_vars["mpiexec"], width=22).grid(row=2, column=1, columnspan=3, sticky='w')
+        tk.Label(frame, text="MPI options:").grid(row=2, column=4, sticky='e', padx=4)
+        tk.Entry(frame, textvariable=self.launch_vars["mpi_args"], width=28).grid(row=2, column=5, columnspan=3, sticky='w')
+
+        buttons = tk.Frame(frame)
+        buttons.grid(row=3, column=0, columnspan=8, sticky='w', pady=2)
+        tk.Button(buttons, text="Detect", command=self.detect_launch).pack(side='left', padx=4)
+        tk.Button(buttons, text="Save for this machine", command=self.save_launch).pack(side='left', padx=4)
+        self.command_label = tk.Label(frame, text="", anchor='w', font=("Courier", 8), fg="gray30")
+        self.command_label.grid(row=4, column=0, columnspan=8, sticky='w', padx=4)
+        for var in self.launch_vars.values():
+            var.trace_add("write", lambda *_: self.show_launch_command())
+
+        self.set_launch(load_profile() or suggest_profile(self.topology))
+
+    def set_launch(self, profile):
+        self.launch_openmc_exec = profile.get("openmc_exec", "openmc")
+        for key, var in self.launch_vars.items():
+            var.set(str(profile.get(key, "")))
+
+    def launch_profile(self):
+        """The panel's profile; raises ValueError if it is incomplete."""
+        profile = {key: var.get().strip() for key, var in self.launch_vars.items()}
+        try:
+            profile["ranks"], profile["threads"] = int(profile["ranks"]), int(profile["threads"])
+        except ValueError:
+            raise ValueError("MPI ranks and threads must be whole numbers")
+        profile["openmc_exec"] = self.launch_openmc_exec
+        check_profile(profile)
+        return profile
+
+    def show_launch_command(self):
+        try:
+            self.command_label.config(text=format_command(self.launch_profile()))
+        except ValueError as e:
+            self.command_label.config(text=str(e))
+
+    def detect_launch(self):
+        self.topology = detect_topology()
+        self.set_launch(suggest_profile(self.topology))
+
+    def save_launch(self):
+        try:
+            save_profile(self.launch_profile())
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.status_var.set(f"Launch profile saved for {host_name()}")
+
+    def use_latest_statepoint(self):
+        from .results import latest_statepoint
+        path = latest_statepoint("output")
+        if not path:
+            messagebox.showerror("Error", "No statepoint found in output.")
+            return
+        self.restart_file.set(path)
+        self.restart_var.set(True)
+
+    def stage_input_files(self, run_dir):
+        """Link (or copy) the selected XML inputs into run_dir under their standard names.
+
+        cross_sections.xml is not staged: the library is passed to OpenMC
+        through OPENMC_CROSS_SECTIONS and stays where it is.
+        """
+        os.makedirs(run_dir, exist_ok=True)
+        files = [(self.geometry_file.get(), "geometry.xml"),
+                 (self.materials_file.get(), "materials.xml"),
+                 (self.settings_file.get(), "settings.xml")]
+        if self.tallies_file.get():
+            files.append((self.tallies_file.get(), "tallies.xml"))
+
+        for src, name in files:
+            # inputs picked straight from the run directory, or unchanged since the last run, are skipped
+            stage_file(src, os.path.join(run_dir, name))
+
     def run_openmc_sim(self):
+        if self.runner is not None and self.runner.is_running():
+            messagebox.showwarning("Running", "A simulation is already running.")
+            return
+
+        # The project's materials.xml is generated lazily; bring it up to date first
+        project_materials = os.path.join("output", "materials.xml")
+        if get_project().materials and os.path.abspath(self.materials_file.get() or project_materials) == os.path.abspath(project_materials):
+            try:
+                ensure_material_files("output")
+                self.materials_file.set(project_materials)
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not generate materials.xml:\n{str(e)}")
+                return
+
         # Check mandatory files
         for f, name in [(self.geometry_file.get(),"geometry.xml"),
                         (self.materials_file.get(),"materials.xml"),
@@ -62,55 +309,176 @@ class RunOpenMCApp(tk.Toplevel):
                 messagebox.showerror("Error", f"Please select a valid {name}.")
                 return
 
+        if self.restart_var.get() and not os.path.exists(self.restart_file.get()):
+            messagebox.showerror("Error", "Please select the statepoint to restart from.")
+            return
+
         # Optional tallies
         tallies_path = self.tallies_file.get()
         if tallies_path and not os.path.exists(tallies_path):
             messagebox.showerror("Error", "Tallies XML file does not exist.")
             return
 
-        # Set cross_sections explicitly
-        openmc.config['cross_sections'] = self.cross_file_var.get()
-
-        # Run OpenMC in the directory of settings.xml (or any common folder)
-        run_dir = os.path.dirname(self.settings_file.get())
-        cwd = os.getcwd()
-        os.chdir(run_dir)  # change working directory so OpenMC finds geometry.xml, materials.xml, settings.xml, tallies.xml
+        # Copy all files into output folder and run OpenMC there
+        run_dir = "output"
         try:
-            messagebox.showinfo("Running", "Simulation started. This may take a while...")
-            openmc.run()
-            messagebox.showinfo("Success", f"OpenMC simulation completed!\nResults are stored in {run_dir}")
+            self.stage_input_files(run_dir)
         except Exception as e:
-            messagebox.showerror("Error", f"Simulation failed:\n{str(e)}")
-        finally:
-            os.chdir(cwd)  # go back to original directory
+            messagebox.showerror("Error", f"Could not copy the input files:\n{str(e)}")
+            return
+        if not self.confirm_tally_memory(run_dir):
+            return
+        try:
+            self.series = BatchSeries(particles=read_particles(os.path.join(run_dir, "settings.xml")))
+            self.combined_keff = None
+            self.clear_log()
+            args = ["--restart", os.path.abspath(self.restart_file.get())] if self.restart_var.get() else []
+            self.runner = OpenMCRunner(run_dir, cross_sections=self.cross_file_var.get(), args=args,
+                                       launch=self.launch_profile())
+            self.runner.start()
+            self.remember_library(self.cross_file_var.get())
+        except Exception as e:
+            self.runner = None
+            messagebox.showerror("Error", f"Simulation failed to start:\n{str(e)}")
+            return
 
+        self.run_button.config(state="disabled")
+        self.pause_button.config(state="normal" if self.runner.can_pause() else "disabled", text="Pause")
+        self.cancel_button.config(state="normal")
+        self.status_var.set("Running...")
+        self.after(POLL_MS, self.poll_run)
 
-            # Optional tallies
-            tallies_path = self.tallies_file.get()
-            if tallies_path and not os.path.exists(tallies_path):
-                messagebox.showerror("Error", "Tallies XML file does not exist.")
-                return
+    def confirm_tally_memory(self, run_dir):
+        """Ask before running tallies that exceed the pre-flight limits."""
+        from .preflight import xml_tally_bins, check_tallies, load_thresholds
+
+        tallies = os.path.join(run_dir, "tallies.xml")
+        if not self.tallies_file.get() or not os.path.exists(tallies):
+            return True
+        try:
+            # each MPI rank on this host holds its own copy of the tallies
+            summary = check_tallies(xml_tally_bins(tallies), self.launch_profile()["ranks"],
+                                    load_thresholds(get_project().settings))
+        except (ET.ParseError, ValueError):
+            return True
+        if not summary["warnings"]:
+            return True
+        return messagebox.askyesno("Large tallies", "\n".join(summary["warnings"]) + "\n\nRun anyway?")
 
-        # Copy all files into output folder
-        os.makedirs("output", exist_ok=True)
-        shutil.copy(self.geometry_file.get(), "output/geometry.xml")
-        shutil.copy(self.materials_file.get(), "output/materials.xml")
-        shutil.copy(self.settings_file.get(), "output/settings.xml")
-        shutil.copy(self.cross_file_var.get(), "output/cross_sections.xml")
-        if tallies_path:
-            shutil.copy(tallies_path, "output/tallies.xml")
-
-        # Run OpenMC in output directory
-        cwd = os.getcwd()
-        os.chdir("output")
+    def open_preflight(self):
+        """Tally memory and run time estimate for the selected inputs."""
+        from .preflight_window import PreflightWindow
+        selected = (self.geometry_file, self.materials_file, self.settings_file, self.cross_file_var)
         try:
-            messagebox.showinfo("Running", "Simulation started. This may take a while...")
-            openmc.run()
-            messagebox.showinfo("Success", "OpenMC simulation completed!\nResults are stored in 'output' directory.")
+            # without a full selection, estimate whatever is already in the run directory
+            if all(var.get() for var in selected):
+                self.stage_input_files("output")
         except Exception as e:
-            messagebox.showerror("Error", f"Simulation failed:\n{str(e)}")
-        finally:
-            os.chdir(cwd)
+            messagebox.showerror("Error", f"Could not copy the input files:\n{str(e)}")
+            return
+        try:
+            launch = self.launch_profile()
+        except ValueError:
+            launch = None
+        PreflightWindow(self, "output", cross_sections=self.cross_file_var.get() or None, launch=launch)
+
+    def remember_library(self, path):
+        """Record the library in settings.json so the nuclide pickers use it too."""
+        project = get_project()
+        if project.settings and project.settings.get("cross_sections") != path:
+            project.settings["cross_sections"] = path
+            project.mark_dirty("settings")
+            project.save(["settings"])
+
+    # ---------------- Run monitoring ----------------
+    def poll_run(self):
+        if self.runner is None:
+            return
+        timed = self.runner.poll_timed_lines()
+        lines = [line for _, line in timed]
+        if lines:
+            self.append_log(lines)
+            new_batches = False
+            for now, line in timed:
+                new_batches |= self.series.feed(line, now=now)
+                self.combined_keff = parse_combined_keff(line) or self.combined_keff
+            if new_batches:
+                self.chart.update_series(self.series)
+            if not self.runner.paused:
+                self.status_var.set(lines[-1].strip() or "Running...")
+
+        if not self.runner.finished():
+            self.after(POLL_MS, self.poll_run)
+            return
+        self.on_run_finished()
+
+    def on_run_finished(self):
+        runner, self.runner = self.runner, None
+        self.run_button.config(state="normal")
+        self.pause_button.config(state="disabled", text="Pause")
+        self.cancel_button.config(state="disabled")
+
+        if runner.cancelled:
+            self.status_var.set("Cancelled")
+            messagebox.showinfo("Cancelled", "OpenMC simulation was cancelled.")
+        elif runner.returncode == 0:
+            self.status_var.set("Finished")
+            keff = f"\nCombined k-effective = {self.combined_keff[0]:.5f} +/- {self.combined_keff[1]:.5f}" if self.combined_keff else ""
+            messagebox.showinfo("Success", f"OpenMC simulation completed!{keff}\nResults are stored in '{runner.run_dir}' directory.")
+        else:
+            self.status_var.set(f"Failed (exit code {runner.returncode})")
+            messagebox.showerror("Error", f"Simulation failed with exit code {runner.returncode}.")
+
+    def open_results(self):
+        """Open the newest statepoint from the run directory in the results browser."""
+        from .results_browser import ResultsBrowser
+        ResultsBrowser(self)
+
+    def open_convergence(self):
+        """k-eff and entropy diagnostics for the newest statepoint."""
+        from .convergence_window import ConvergenceWindow
+        ConvergenceWindow(self)
+
+    def clear_log(self):
+        self.log_text.config(state="normal")
+        self.log_text.delete("1.0", tk.END)
+        self.log_text.config(state="disabled")
+
+    def append_log(self, lines):
+        """Append solver output, dropping the oldest lines beyond LOG_MAX_LINES."""
+        at_bottom = self.log_text.yview()[1] >= 0.999
+        self.log_text.config(state="normal")
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        n_lines = int(self.log_text.index("end-1c").split(".")[0]) - 1
+        if n_lines > LOG_MAX_LINES:
+            self.log_text.delete("1.0", f"{n_lines - LOG_MAX_LINES + 1}.0")
+        self.log_text.config(state="disabled")
+        if at_bottom:
+            self.log_text.see(tk.END)
+
+    def toggle_pause(self):
+        if self.runner is None:
+            return
+        if self.runner.paused:
+            self.runner.resume()
+            self.pause_button.config(text="Pause")
+            self.status_var.set("Running...")
+        else:
+            self.runner.pause()
+            self.pause_button.config(text="Resume")
+            self.status_var.set("Paused")
+
+    def cancel_run(self):
+        if self.runner is not None and messagebox.askyesno("Cancel", "Stop the running simulation?"):
+            self.runner.cancel()
+            self.status_var.set("Cancelling...")
+
+    def on_close(self):
+        if self.runner is not None and self.runner.is_running():
+            if not messagebox.askyesno("Running", "A simulation is still running. Stop it and close?"):
+                return
+            self.runner.cancel()
+        self.destroy()
 
     def generate_openmc_run_file(self):
         # similar logic: copy files to output folder and generate run script
@@ -1,17 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import json
-import openmc
-import numpy as np
 import textwrap
+from .project import get_project
+from .xml_exporter import build_settings, settings_key
+from .build_cache import export_xml
+from .spectrum import INTERPOLATIONS, prepare as prepare_spectrum, describe as describe_spectrum
 
 
 class SettingsWindow(tk.Toplevel):
     def __init__(self, master=None):
         super().__init__(master)
         self.title("Simulation Settings")
-        self.geometry("700x500")  # window height adjusted since tallies removed
+        self.geometry("760x680")
 
         # ---------------- Notebook ----------------
         notebook = ttk.Notebook(self)
@@ -29,6 +30,7 @@ class SettingsWindow(tk.Toplevel):
         self.build_run_tab()
         self.build_source_tab()
         self.build_output_tab()
+        self.load_saved_settings()
 
         # ---------------- Bottom Buttons ----------------
         frame_bottom = tk.Frame(self)
@@ -58,6 +60,7 @@ class SettingsWindow(tk.Toplevel):
         self.entry_batches = tk.Entry(f); self.entry_batches.insert(0, "50"); self.entry_batches.grid(row=1, column=1, padx=4)
         tk.Label(f, text="Inactive batches:").grid(row=2, column=0, sticky="e", pady=4, padx=4)
         self.entry_inactive = tk.Entry(f); self.entry_inactive.insert(0, "10"); self.entry_inactive.grid(row=2, column=1, padx=4)
+        tk.Button(f, text="Suggest from last run", command=self.suggest_inactive).grid(row=2, column=2, padx=4)
         tk.Label(f, text="Threads (blank=auto):").grid(row=3, column=0, sticky="e", pady=4, padx=4)
         self.entry_threads = tk.Entry(f); self.entry_threads.grid(row=3, column=1, padx=4)
         tk.Label(f, text="Random Seed (optional):").grid(row=4, column=0, sticky="e", pady=4, padx=4)
@@ -65,10 +68,38 @@ class SettingsWindow(tk.Toplevel):
         tk.Label(f, text="Run Mode:").grid(row=5, column=0, sticky="e", pady=4, padx=4)
         self.run_mode = ttk.Combobox(f, values=["Eigenvalue", "Fixed Source"], state="readonly")
         self.run_mode.set("Eigenvalue"); self.run_mode.grid(row=5, column=1, padx=4)
-        #tk.Label(f, text="Cross-section file:").grid(row=6, column=0, sticky="e", pady=4, padx=4)
+        # Library used for the nuclide pickers and passed to OpenMC
+        tk.Label(f, text="Cross-section file:").grid(row=6, column=0, sticky="e", pady=4, padx=4)
         self.cross_file_var = tk.StringVar()
-        #tk.Entry(f, textvariable=self.cross_file_var, width=40).grid(row=6, column=1, padx=4)
-        #tk.Button(f, text="Browse", command=self.browse_cross_file).grid(row=6, column=2, padx=4)
+        tk.Entry(f, textvariable=self.cross_file_var, width=40).grid(row=6, column=1, padx=4)
+        tk.Button(f, text="Browse", command=self.browse_cross_file).grid(row=6, column=2, padx=4)
+        # Shannon entropy needs a mesh; it is sized from the geometry and particle count on save
+        self.var_entropy = tk.BooleanVar(value=False)
+        tk.Checkbutton(f, text="Track Shannon entropy (automatic mesh)", variable=self.var_entropy).grid(
+            row=7, column=1, sticky="w", padx=4)
+
+    def suggest_inactive(self):
+        """Fill the inactive batches from the newest statepoint's convergence diagnostics."""
+        from .results import latest_statepoint
+        from .convergence import read_batches, analyze
+        path = latest_statepoint("output")
+        if not path:
+            messagebox.showerror("Error", "No statepoint found in output; run the model first.")
+            return
+        try:
+            report = analyze(read_batches(path))
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Error", f"Could not analyze {path}:\n{e}")
+            return
+        if report["suggested_inactive"] is None:
+            messagebox.showinfo("Inactive batches", "The last run was too short to tell; run more batches.")
+            return
+        self.entry_inactive.delete(0, tk.END)
+        self.entry_inactive.insert(0, str(report["suggested_inactive"]))
+        if report["entropy_batch"] is None:
+            self.var_entropy.set(True)
+            messagebox.showinfo("Inactive batches", "Suggested from k-eff only; entropy tracking has been "
+                                                    "enabled so the next run gives a more reliable suggestion.")
 
     def browse_cross_file(self):
         path = filedialog.askopenfilename(title="Select Cross-Section XML File", filetypes=[("XML Files", "*.xml")])
@@ -78,7 +109,7 @@ class SettingsWindow(tk.Toplevel):
     def build_source_tab(self):
         f = self.source_tab
         tk.Label(f, text="Source Type:").grid(row=0, column=0, sticky="e", pady=4, padx=4)
-        self.source_type = ttk.Combobox(f, values=["Point", "Box", "Spherical", "Cylindrical"], state="readonly")
+        self.source_type = ttk.Combobox(f, values=["Point", "Box", "Spherical", "Cylindrical", "File"], state="readonly")
         self.source_type.set("Point"); self.source_type.grid(row=0, column=1, padx=4)
 
         tk.Label(f, text="Position (x,y,z):").grid(row=1, column=0, sticky="e", pady=4, padx=4)
@@ -88,6 +119,9 @@ class SettingsWindow(tk.Toplevel):
 
         tk.Label(f, text="Radius (if sphere/cylinder):").grid(row=2, column=0, sticky="e", pady=4, padx=4)
         self.entry_radius = tk.Entry(f); self.entry_radius.grid(row=2, column=1, padx=4)
+        height_frame = tk.Frame(f); height_frame.grid(row=2, column=2, sticky="w")
+        tk.Label(height_frame, text="Height (cylinder):").pack(side="left")
+        self.entry_height = tk.Entry(height_frame, width=8); self.entry_height.pack(side="left", padx=4)
 
         tk.Label(f, text="Box Extent (x_min,x_max,y_min,y_max,z_min,z_max):").grid(row=3,column=0,sticky="e",pady=4,padx=4)
         self.entry_extent = tk.Entry(f, width=40); self.entry_extent.grid(row=3,column=1,padx=4)
@@ -110,32 +144,214 @@ class SettingsWindow(tk.Toplevel):
 
         tk.Button(f, text="Upload File (Tabular)", command=self.upload_energy_file).grid(row=5, column=2, padx=4)
 
+        # Tabular files: how the columns are read and an optional point limit
+        tk.Label(f, text="Tabular interpolation:").grid(row=6, column=0, sticky="e", pady=4, padx=4)
+        self.spectrum_interp = ttk.Combobox(f, values=INTERPOLATIONS, state="readonly")
+        self.spectrum_interp.set("histogram")
+        self.spectrum_interp.grid(row=6, column=1, padx=4)
+        tk.Label(f, text="Max points (blank = all):").grid(row=7, column=0, sticky="e", pady=4, padx=4)
+        self.spectrum_points = tk.Entry(f)
+        self.spectrum_points.grid(row=7, column=1, padx=4)
+        self.spectrum_info = tk.Label(f, text="", fg="gray")
+        self.spectrum_info.grid(row=8, column=0, columnspan=3, pady=4)
+
+        self.var_fissionable = tk.BooleanVar(value=False)
+        tk.Checkbutton(f, text="Only start particles in fissionable material",
+                       variable=self.var_fissionable).grid(row=9, column=0, columnspan=2, sticky="w", padx=4)
+        tk.Button(f, text="Preview Source", command=self.preview_source).grid(row=9, column=2, padx=4, pady=4)
+
+        # File sources reuse the source bank of an earlier run (e.g. a converged core)
+        tk.Label(f, text="Source file (File type):").grid(row=10, column=0, sticky="e", pady=4, padx=4)
+        self.entry_source_file = tk.Entry(f, width=40); self.entry_source_file.grid(row=10, column=1, padx=4)
+        file_buttons = tk.Frame(f); file_buttons.grid(row=10, column=2, sticky="w")
+        tk.Button(file_buttons, text="Browse", command=self.browse_source_file).pack(side="left", padx=2)
+        tk.Button(file_buttons, text="Latest Run", command=self.use_latest_source).pack(side="left", padx=2)
+        tk.Label(f, text="Strength (relative):").grid(row=11, column=0, sticky="e", pady=4, padx=4)
+        self.entry_strength = tk.Entry(f); self.entry_strength.insert(0, "1.0"); self.entry_strength.grid(row=11, column=1, padx=4)
+
+        # Several weighted sources: the list replaces the form when it is not empty
+        tk.Label(f, text="Sources (empty = the form above):").grid(row=12, column=0, sticky="ne", pady=4, padx=4)
+        self.sources = []
+        self.sources_listbox = tk.Listbox(f, height=4, width=50, exportselection=0)
+        self.sources_listbox.grid(row=12, column=1, padx=4, pady=4)
+        list_buttons = tk.Frame(f); list_buttons.grid(row=12, column=2, sticky="nw")
+        tk.Button(list_buttons, text="Add Source", command=self.add_source).pack(fill="x", pady=1)
+        tk.Button(list_buttons, text="Remove", command=self.remove_source).pack(fill="x", pady=1)
+
 
     def upload_energy_file(self):
         path = filedialog.askopenfilename(title="Select Energy Spectrum File", filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")])
-        if path: self.energy_param.delete(0,tk.END); self.energy_param.insert(0,path)
+        if path:
+            self.energy_param.delete(0,tk.END); self.energy_param.insert(0,path)
+            self.energy_dist.set("Tabular")
+            try:
+                self.spectrum_info.config(text=describe_spectrum(self.tabular_record()))
+            except (OSError, ValueError) as e:
+                self.spectrum_info.config(text=f"Could not read spectrum: {e}")
+
+    def browse_source_file(self):
+        path = filedialog.askopenfilename(title="Select Source File", filetypes=[("HDF5 files", "*.h5")],
+                                          initialdir="output" if os.path.isdir("output") else None)
+        if path:
+            self.entry_source_file.delete(0, tk.END); self.entry_source_file.insert(0, path)
+            self.source_type.set("File")
+
+    def use_latest_source(self):
+        """Point the file source at the newest source bank in the run directory."""
+        from .results import latest_source
+        path = latest_source("output")
+        if not path:
+            messagebox.showerror("Error", "No source.h5, surface_source.h5 or statepoint with a source bank in output.")
+            return
+        self.entry_source_file.delete(0, tk.END); self.entry_source_file.insert(0, path)
+        self.source_type.set("File")
+        messagebox.showinfo("Source file", f"Using {path}.\nA converged source needs far fewer inactive batches; "
+                                           "\"Suggest from last run\" on the Run Settings tab can check how many.")
+
+    def describe_source(self, record):
+        strength = record.get("strength") or 1.0
+        if record["type"] == "File":
+            return f"File {os.path.basename(record['path'])}  x{strength:g}"
+        pos = ", ".join(f"{v:g}" for v in record["position"])
+        return f"{record['type']} ({pos}) {record['energy']['dist']}  x{strength:g}"
+
+    def refresh_source_list(self):
+        self.sources_listbox.delete(0, tk.END)
+        for record in self.sources:
+            self.sources_listbox.insert(tk.END, self.describe_source(record))
+
+    def add_source(self):
+        try:
+            self.sources.append(self.source_record())
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Invalid source:\n{e}")
+            return
+        self.refresh_source_list()
+
+    def remove_source(self):
+        for i in reversed(self.sources_listbox.curselection()):
+            del self.sources[i]
+        self.refresh_source_list()
+
+    def source_records(self):
+        return self.sources or [self.source_record()]
+
+    def source_record(self):
+        """One source record of settings.json from the Source tab."""
+        strength = float(self.entry_strength.get() or 1.0)
+        if strength <= 0:
+            raise ValueError("Source strength must be positive")
+        if self.source_type.get() == "File":
+            path = self.entry_source_file.get().strip()
+            if not os.path.exists(path):
+                raise ValueError(f"Source file '{path}' does not exist")
+            return {"type": "File", "path": path, "strength": strength}
+        energy = {"dist": self.energy_dist.get(), "param": self.energy_param.get()}
+        if energy["dist"] == "Tabular":
+            energy = self.tabular_record()
+            self.spectrum_info.config(text=describe_spectrum(energy))
+        return {
+            "type": self.source_type.get(),
+            "strength": strength,
+            "position": [float(self.entry_src_x.get()), float(self.entry_src_y.get()), float(self.entry_src_z.get())],
+            "radius": float(self.entry_radius.get()) if self.entry_radius.get() else None,
+            "height": float(self.entry_height.get()) if self.entry_height.get() else None,
+            "extent": [float(x) for x in self.entry_extent.get().split(",")] if self.entry_extent.get() else None,
+            "only_fissionable": self.var_fissionable.get(),
+            "energy": energy
+        }
+
+    def preview_source(self):
+        """Sample source sites and report how many land in (fissionable) material."""
+        from .source_preview import preview, format_preview
+        try:
+            report = preview(get_project().as_dict(), self.source_records())
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Error", f"Could not preview the source:\n{e}")
+            return
+        messagebox.showinfo("Source Preview", format_preview(report))
+
+    def tabular_record(self):
+        """Energy record for a Tabular spectrum.
+
+        "cache" names the prepared .npy by the file's hash for the generated
+        settings.py; builds also hash the file itself (settings_key), so editing
+        it rebuilds settings.xml even without saving the settings again.
+        """
+        record = {"dist": "Tabular", "param": self.energy_param.get(), "interpolation": self.spectrum_interp.get(),
+                  "max_points": int(self.spectrum_points.get()) if self.spectrum_points.get().strip() else None}
+        _, _, record["kind"], record["cache"] = prepare_spectrum(record)
+        return record
 
     # ---------------- Output Tab ----------------
     def build_output_tab(self):
         f = self.output_tab
         self.var_statepoint = tk.BooleanVar(value=True)
         self.var_summary = tk.BooleanVar(value=True)
-        self.var_restart = tk.BooleanVar(value=False)
+        self.var_source_bank = tk.BooleanVar(value=False)
         tk.Checkbutton(f, text="statepoint.h5", variable=self.var_statepoint).pack(anchor="w", padx=10, pady=4)
         tk.Checkbutton(f, text="summary.h5", variable=self.var_summary).pack(anchor="w", padx=10, pady=4)
-        tk.Checkbutton(f, text="restart.h5", variable=self.var_restart).pack(anchor="w", padx=10, pady=4)
+        tk.Checkbutton(f, text="source.h5 (source bank for file sources of later runs)",
+                       variable=self.var_source_bank).pack(anchor="w", padx=10, pady=4)
         #tk.Label(f, text="Verbosity:").pack(anchor="w", padx=10, pady=4)
         #self.verbosity = ttk.Combobox(f, values=["1","2","3"], state="readonly"); self.verbosity.set("2"); self.verbosity.pack(anchor="w", padx=10, pady=4)
 
+    # ---------------- Load previous settings ----------------
+    def load_saved_settings(self):
+        """Prefill the form from output/settings.json if it exists."""
+        data = get_project().settings
+        if not data:
+            return
+
+        def put(entry, value):
+            entry.delete(0, tk.END)
+            if value is not None:
+                entry.insert(0, str(value))
+
+        put(self.entry_particles, data.get("particles"))
+        put(self.entry_batches, data.get("batches"))
+        put(self.entry_inactive, data.get("inactive"))
+        put(self.entry_threads, data.get("threads"))
+        put(self.entry_seed, data.get("seed"))
+        self.run_mode.set(data.get("run_mode", "Eigenvalue"))
+        self.cross_file_var.set(data.get("cross_sections") or "")
+        self.var_entropy.set(bool(data.get("entropy_mesh")))
+
+        src = data.get("source", {})
+        self.source_type.set(src.get("type", "Point"))
+        for entry, value in zip((self.entry_src_x, self.entry_src_y, self.entry_src_z), src.get("position", [0, 0, 0])):
+            put(entry, value)
+        put(self.entry_radius, src.get("radius"))
+        put(self.entry_height, src.get("height"))
+        self.var_fissionable.set(bool(src.get("only_fissionable")))
+        put(self.entry_strength, src.get("strength") or 1.0)
+        if src.get("type") == "File":
+            put(self.entry_source_file, src.get("path"))
+        if len(data.get("sources") or []) > 1:
+            self.sources = list(data["sources"])
+            self.refresh_source_list()
+        put(self.entry_extent, ",".join(str(x) for x in src["extent"]) if src.get("extent") else None)
+        energy = src.get("energy", {})
+        self.energy_dist.set(energy.get("dist", "OpenMC Default"))
+        put(self.energy_param, energy.get("param"))
+        # records without an interpolation predate Tabular support and were discrete lines
+        self.spectrum_interp.set(energy.get("interpolation") or ("discrete" if energy.get("dist") == "Tabular" else "histogram"))
+        put(self.spectrum_points, energy.get("max_points"))
+
+        outputs = data.get("outputs", {})
+        self.var_statepoint.set(outputs.get("statepoint", True))
+        self.var_summary.set(outputs.get("summary", True))
+        # "restart" is the key older files used for the source bank
+        self.var_source_bank.set(outputs.get("source_bank", outputs.get("restart", False)))
+
     # ---------------- Save Settings ----------------
     def save_settings(self):
-        import os, json, textwrap, numpy as np
-        import openmc
-
         os.makedirs("output", exist_ok=True)
 
         # --- Collect JSON dictionary ---
+        # keys owned by other windows (e.g. the preflight limits) are kept
         settings_dict = {
+            **(get_project().settings or {}),
             "particles": int(self.entry_particles.get()),
             "batches": int(self.entry_batches.get()),
             "inactive": int(self.entry_inactive.get() or 0),
@@ -143,23 +359,29 @@ class SettingsWindow(tk.Toplevel):
             "seed": self.entry_seed.get() or None,
             "run_mode": self.run_mode.get(),
             "cross_sections": self.cross_file_var.get() or os.environ.get("OPENMC_CROSS_SECTIONS", None),
-            "source": {
-                "type": self.source_type.get(),
-                "position": [float(self.entry_src_x.get()), float(self.entry_src_y.get()), float(self.entry_src_z.get())],
-                "radius": float(self.entry_radius.get()) if self.entry_radius.get() else None,
-                "extent": [float(x) for x in self.entry_extent.get().split(",")] if self.entry_extent.get() else None,
-                "energy": {"dist": self.energy_dist.get(), "param": self.energy_param.get()}
-            },
             
+            "entropy_mesh": None,
             "outputs": {
                 "statepoint": self.var_statepoint.get(),
                 "summary": self.var_summary.get(),
                 
-                "restart": self.var_restart.get()
+                "source_bank": self.var_source_bank.get()
                 #"verbosity": int(self.verbosity.get())
             }
         }
 
+        try:
+            settings_dict["sources"] = self.source_records()
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Invalid source:\n{e}")
+            return
+        # older readers of settings.json only know the single "source"
+        settings_dict["source"] = settings_dict["sources"][0]
+
+        if self.var_entropy.get():
+            from .convergence import entropy_mesh
+            settings_dict["entropy_mesh"] = entropy_mesh(get_project().surfaces, settings_dict["particles"])
+
         # --- Save Python settings file ---
         with open("output/settings.py", "w") as f:
             f.write(textwrap.dedent(f"""\
@@ -180,59 +402,86 @@ class SettingsWindow(tk.Toplevel):
             s.seed = settings['seed']
         #s.cross_sections = settings['cross_sections']
 
-        # ---------------- Source ----------------
-        src_data = settings['source']
-        src = openmc.Source()
-        pos = src_data['position']
-        radius = src_data['radius']
-        extent = src_data['extent']
-
-        # Space object for IndependentSource
-        if src_data['type'] == "Point":
-            src.space = openmc.stats.Point(pos)
-        elif src_data['type'] == "Spherical":
-            # approximate sphere with box
-            src.space = openmc.stats.Box(
-                lower_left=[pos[0]-radius, pos[1]-radius, pos[2]-radius],
-                upper_right=[pos[0]+radius, pos[1]+radius, pos[2]+radius]
-            )
-        elif src_data['type'] == "Cylindrical":
-            # approximate cylinder with box (height=2)
-            src.space = openmc.stats.Box(
-                lower_left=[pos[0]-radius, pos[1]-radius, pos[2]-1],
-                upper_right=[pos[0]+radius, pos[1]+radius, pos[2]+1]
-            )
-        elif src_data['type'] == "Box":
-            if extent and len(extent) == 6:
-                src.space = openmc.stats.Box(
-                    lower_left=[extent[0], extent[2], extent[4]],
-                    upper_right=[extent[1], extent[3], extent[5]]
+        # ---------------- Sources ----------------
+        sources = []
+        for src_data in settings.get('sources') or [settings['source']]:
+            if src_data['type'] == 'File':
+                sources.append(openmc.FileSource(src_data['path'], strength=src_data.get('strength') or 1.0))
+                continue
+            src = openmc.IndependentSource(strength=src_data.get('strength') or 1.0)
+            pos = src_data['position']
+            radius = src_data['radius'] or 1.0
+            extent = src_data['extent']
+
+            # Space object for IndependentSource
+            if src_data['type'] == "Point":
+                src.space = openmc.stats.Point(pos)
+            elif src_data['type'] == "Spherical":
+                src.space = openmc.stats.SphericalIndependent(
+                    r=openmc.stats.PowerLaw(0.0, radius, 2),
+                    cos_theta=openmc.stats.Uniform(-1.0, 1.0),
+                    phi=openmc.stats.Uniform(0.0, 2 * np.pi),
+                    origin=pos
                 )
-            else:
-                src.space = openmc.stats.Box(
-                    lower_left=[pos[0]-1, pos[1]-1, pos[2]-1],
-                    upper_right=[pos[0]+1, pos[1]+1, pos[2]+1]
+            elif src_data['type'] == "Cylindrical":
+                height = src_data.get('height') or 2.0
+                src.space = openmc.stats.CylindricalIndependent(
+                    r=openmc.stats.PowerLaw(0.0, radius, 1),
+                    phi=openmc.stats.Uniform(0.0, 2 * np.pi),
+                    z=openmc.stats.Uniform(-height / 2, height / 2),
+                    origin=pos
                 )
+            elif src_data['type'] == "Box":
+                if extent and len(extent) == 6:
+                    src.space = openmc.stats.Box(
+                        lower_left=[extent[0], extent[2], extent[4]],
+                        upper_right=[extent[1], extent[3], extent[5]]
+                    )
+                else:
+                    src.space = openmc.stats.Box(
+                        lower_left=[pos[0]-1, pos[1]-1, pos[2]-1],
+                        upper_right=[pos[0]+1, pos[1]+1, pos[2]+1]
+                    )
 
                 
 
-        # ---------------- Energy ----------------
-        energy = src_data['energy']
-        dist = energy['dist']
-        param = energy['param']
+            # ---------------- Energy ----------------
+            energy = src_data['energy']
+            dist = energy['dist']
+            param = energy['param']
 
-        if dist == 'Monoenergetic':
-            src.energy = openmc.stats.Discrete([float(param)], [1.0])
-        elif dist == 'Watt Spectrum':
-            a, b = [float(x) for x in param.split(",")]
-            src.energy = openmc.stats.Watt(a, b)
-        elif dist == 'Maxwell Spectrum':
-            src.energy = openmc.stats.Maxwell(float(param))
-        elif dist == 'Tabular':
-            data = np.loadtxt(param)
-            src.energy = openmc.stats.Discrete(data[:,0].tolist(), data[:,1].tolist())
-
-        s.source = src
+            if dist == 'Monoenergetic':
+                src.energy = openmc.stats.Discrete([float(param)], [1.0])
+            elif dist == 'Watt Spectrum':
+                a, b = [float(x) for x in param.split(",")]
+                src.energy = openmc.stats.Watt(a, b)
+            elif dist == 'Maxwell Spectrum':
+                src.energy = openmc.stats.Maxwell(float(param))
+            elif dist == 'Tabular':
+                # binary copy of the spectrum file written by the GUI (no text parsing here)
+                data = np.load(energy['cache'])
+                if energy['kind'] == 'discrete':
+                    src.energy = openmc.stats.Discrete(data[0].tolist(), data[1].tolist())
+                else:
+                    src.energy = openmc.stats.Tabular(data[0], data[1], interpolation=energy['kind'])
+
+            if src_data.get('only_fissionable'):
+                src.constraints = {{'fissionable': True}}
+            sources.append(src)
+        s.source = sources
+
+        # ---------------- Output files ----------------
+        s.output = {{'summary': settings['outputs'].get('summary', True)}}
+        if settings['outputs'].get('source_bank'):
+            s.sourcepoint = {{'batches': [s.batches], 'separate': True, 'write': True}}
+
+        # ---------------- Shannon entropy ----------------
+        if settings.get('entropy_mesh'):
+            mesh = openmc.RegularMesh()
+            mesh.lower_left = settings['entropy_mesh']['lower_left']
+            mesh.upper_right = settings['entropy_mesh']['upper_right']
+            mesh.dimension = settings['entropy_mesh']['dimension']
+            s.entropy_mesh = mesh
 
         # ---------------- Tallies ----------------
         # Example: user can later add tally definitions here using settings['tallies']
@@ -251,87 +500,16 @@ class SettingsWindow(tk.Toplevel):
         """))
 
 
-        # --- Create OpenMC Settings object ---
-        s = openmc.Settings()
-        s.run_mode = self.run_mode.get().lower().replace(" ", "_")
-        s.particles = int(self.entry_particles.get())
-        s.batches = int(self.entry_batches.get())
-        s.inactive = int(self.entry_inactive.get() or 0)
-        s.threads = int(self.entry_threads.get()) if self.entry_threads.get() else None
-        if self.entry_seed.get():
-            s.seed = int(self.entry_seed.get())
-        s.cross_sections = self.cross_file_var.get() or os.environ.get("OPENMC_CROSS_SECTIONS", None)
-        #s.verbosity = int(self.verbosity.get())
-
-        # --- Configure Source ---
-        src_type = self.source_type.get()
-        pos = [float(self.entry_src_x.get()), float(self.entry_src_y.get()), float(self.entry_src_z.get())]
-        radius = float(self.entry_radius.get()) if self.entry_radius.get() else 1.0
-        extent = [float(x) for x in self.entry_extent.get().split(",")] if self.entry_extent.get() else None
-
-        # Space object for IndependentSource
-        if src_type == "Point":
-            space = openmc.stats.Point(pos)
-        elif src_type == "Spherical":
-            # approximate sphere with box
-            space = openmc.stats.Box(
-                lower_left=[pos[0]-radius, pos[1]-radius, pos[2]-radius],
-                upper_right=[pos[0]+radius, pos[1]+radius, pos[2]+radius]
-            )
-        elif src_type == "Cylindrical":
-            # approximate cylinder with box (height=2)
-            space = openmc.stats.Box(
-                lower_left=[pos[0]-radius, pos[1]-radius, pos[2]-1],
-                upper_right=[pos[0]+radius, pos[1]+radius, pos[2]+1]
-            )
-        elif src_type == "Box":
-            if extent and len(extent) == 6:
-                space = openmc.stats.Box(
-                    lower_left=[extent[0], extent[2], extent[4]],
-                    upper_right=[extent[1], extent[3], extent[5]]
-                )
-            else:
-                space = openmc.stats.Box(
-                    lower_left=[pos[0]-1, pos[1]-1, pos[2]-1],
-                    upper_right=[pos[0]+1, pos[1]+1, pos[2]+1]
-                )
-
-        # Energy object
-    
-        # ---------------- Energy ----------------
-        energy_dist = self.energy_dist.get()
-        param = self.energy_param.get()
-
+        # --- Create OpenMC Settings object and export settings.xml ---
         try:
-            if energy_dist == "OpenMC Default":
-                # OpenMC default: do not pass energy
-                src = openmc.source.IndependentSource(space=space)
-            elif energy_dist == "Monoenergetic":
-                energy = openmc.stats.Discrete([float(param)], [1.0])
-                src = openmc.source.IndependentSource(space=space, energy=energy)
-            elif energy_dist == "Watt Spectrum":
-                a, b = [float(x) for x in param.split(",")]
-                energy = openmc.stats.Watt(a, b)
-                src = openmc.source.IndependentSource(space=space, energy=energy)
-            elif energy_dist == "Maxwell Spectrum":
-                energy = openmc.stats.Maxwell(float(param))
-                src = openmc.source.IndependentSource(space=space, energy=energy)
-            elif energy_dist == "Tabular":
-                data = np.loadtxt(param)
-                energy = openmc.stats.Discrete(data[:, 0].tolist(), data[:, 1].tolist())
-                src = openmc.source.IndependentSource(space=space, energy=energy)
+            export_xml("output", "settings.xml", settings_key(settings_dict), lambda: build_settings(settings_dict))
         except Exception as e:
-            messagebox.showerror("Error", f"Invalid energy parameters: {param}\n{e}")
+            messagebox.showerror("Error", f"Invalid energy parameters: {self.energy_param.get()}\n{e}")
             return
 
-        # Assign to settings
-
-
-        s.source = src
-
-        # --- Export settings.xml ---
-        s.export_to_xml("output/settings.xml")
-
-    
+        # --- Save JSON (read by the headless builder) ---
+        project = get_project()
+        project.set("settings", settings_dict)
+        project.save(["settings"])
 
         messagebox.showinfo("Saved", "Settings saved to Python and XML files in output folder")
@@ -0,0 +1,319 @@
+"""Geometry slice viewer.
+
+The view is split into fixed-size tiles on a zoom-level grid. Each tile is
+rasterized by classifying its pixel centres with the point classifier in a
+worker process; finished tiles are kept in an LRU cache keyed by project
+revision, plane, slice position, zoom and tile index, so panning only
+computes the tiles that come into view.
+"""
+import base64
+import colorsys
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+
+from .project import get_project
+from .point_classifier import GeometryModel
+
+TILE = 128              # tile edge in pixels
+MAX_TILES = 512         # cached tiles (int32 cell maps, 64 kB each)
+POLL_MS = 40
+PLANES = {"xy": (0, 1, 2), "xz": (0, 2, 1), "yz": (1, 2, 0)}   # (u axis, v axis, normal axis)
+UNDEFINED = (255, 255, 255)
+
+_worker_model = None
+
+
+# ---------------- Worker side ----------------
+def _init_worker(project_data, root):
+    global _worker_model
+    _worker_model = GeometryModel(project_data, root=root)
+
+
+def tile_points(plane, position, scale, tx, ty, size=TILE):
+    """Pixel-centre coordinates of tile (tx, ty), row 0 at the top."""
+    u_axis, v_axis, w_axis = PLANES[plane]
+    u = (tx * size + np.arange(size) + 0.5) * scale
+    v = ((ty + 1) * size - np.arange(size) - 0.5) * scale
+    uu, vv = np.meshgrid(u, v)
+    xyz = np.empty((size * size, 3))
+    xyz[:, u_axis] = uu.ravel()
+    xyz[:, v_axis] = vv.ravel()
+    xyz[:, w_axis] = position
+    return xyz
+
+
+def render_tile(plane, position, scale, tx, ty, universe=None, lattice=None):
+    cells = _worker_model.classify(tile_points(plane, position, scale, tx, ty),
+                                   universe=universe, lattice=lattice)
+    return cells.reshape(TILE, TILE)
+
+
+# ---------------- Colours ----------------
+def palette(n):
+    """n distinct colours (golden-ratio hue steps) plus white for undefined at index -1."""
+    colors = [colorsys.hsv_to_rgb((i * 0.618033988749895) % 1.0, 0.55, 0.95) for i in range(n)]
+    table = np.array([[int(255 * c) for c in rgb] for rgb in colors] + [UNDEFINED], dtype=np.uint8)
+    return table.reshape(-1, 3)
+
+
+def tile_image(indices, colors):
+    """Tk PhotoImage (base64 PPM) for an index map; -1 picks the last colour."""
+    rgb = colors[indices]
+    header = f"P6 {indices.shape[1]} {indices.shape[0]} 255 ".encode()
+    return tk.PhotoImage(data=base64.b64encode(header + rgb.tobytes()), format="PPM")
+
+
+class SlicePlotter:
+    def __init__(self, master, universe=None, lattice=None, title="Geometry Slice"):
+        self.master = tk.Toplevel(master)
+        self.master.title(title)
+        self.master.geometry("820x760")
+
+        self.project = get_project()
+        self.universe = universe
+        self.lattice = lattice
+        self.model = None
+        self.pool = None
+        self.revision = None
+        self.cache = OrderedDict()      # key -> int32 (TILE, TILE) cell map
+        self.pending = {}               # key -> Future
+        self.drawn = {}                 # key -> (canvas item, PhotoImage)
+        self.center = [0.0, 0.0]
+        self.zoom = 0
+        self.base_scale = 0.05          # cm per pixel at zoom 0
+        self.drag_from = None
+
+        # ---------------- Controls ----------------
+        controls = tk.Frame(self.master)
+        controls.pack(fill="x", pady=4)
+
+        tk.Label(controls, text="Plane").pack(side="left", padx=3)
+        self.plane_var = tk.StringVar(value="xy")
+        plane_box = ttk.Combobox(controls, textvariable=self.plane_var, values=list(PLANES), width=4, state="readonly")
+        plane_box.pack(side="left")
+        plane_box.bind("<<ComboboxSelected>>", lambda e: self.redraw(clear=True))
+
+        tk.Label(controls, text="Position (cm)").pack(side="left", padx=3)
+        self.position_entry = tk.Entry(controls, width=8)
+        self.position_entry.insert(0, "0.0")
+        self.position_entry.pack(side="left")
+        self.position_entry.bind("<Return>", lambda e: self.redraw(clear=True))
+
+        tk.Label(controls, text="Color by").pack(side="left", padx=3)
+        self.color_var = tk.StringVar(value="cell")
+        color_box = ttk.Combobox(controls, textvariable=self.color_var, values=["cell", "material"], width=8, state="readonly")
+        color_box.pack(side="left")
+        color_box.bind("<<ComboboxSelected>>", lambda e: self.redraw(clear=True))
+
+        tk.Button(controls, text="Zoom +", command=lambda: self.zoom_by(1)).pack(side="left", padx=3)
+        tk.Button(controls, text="Zoom -", command=lambda: self.zoom_by(-1)).pack(side="left")
+        tk.Button(controls, text="Reset View", command=self.reset_view).pack(side="left", padx=3)
+
+        self.canvas = tk.Canvas(self.master, bg="white", highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True)
+        self.status = tk.Label(self.master, text="", anchor="w")
+        self.status.pack(fill="x")
+
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<ButtonPress-1>", self.start_drag)
+        self.canvas.bind("<B1-Motion>", self.drag)
+        self.canvas.bind("<ButtonRelease-1>", lambda e: self.redraw())
+        self.canvas.bind("<Motion>", self.show_point)
+        self.canvas.bind("<MouseWheel>", lambda e: self.zoom_by(1 if e.delta > 0 else -1, e))
+        self.canvas.bind("<Button-4>", lambda e: self.zoom_by(1, e))
+        self.canvas.bind("<Button-5>", lambda e: self.zoom_by(-1, e))
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        if self.load_model():
+            self.reset_view()
+        self.poll_id = self.master.after(POLL_MS, self.poll_tiles)
+
+    # ---------------- Model and workers ----------------
+    def load_model(self):
+        """(Re)compile the geometry and restart the worker pool for the current revision."""
+        self.revision = self.project.revision
+        data = self.project.as_dict()
+        try:
+            self.model = GeometryModel(data, root=self.universe)
+            if self.model.root is None and self.lattice is None:
+                raise ValueError(self.model.root_error)
+        except (ValueError, KeyError) as e:
+            self.model = None
+            self.status.config(text=f"Cannot plot geometry: {e}", fg="red")
+            return False
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        self.pending.clear()
+        self.pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker, initargs=(data, self.universe))
+        self.status.config(text="", fg="black")
+        return True
+
+    def bounding_half_width(self):
+        """Rough half-width of the model from plane and cylinder surfaces."""
+        extents = [abs(float(info["params"][0])) for info in self.project.surfaces.values()
+                   if info["type"] in ("XPlane", "YPlane", "ZPlane", "ZCylinder", "HexagonalPrism")]
+        return max(extents) if extents else 10.0
+
+    def reset_view(self):
+        self.center = [0.0, 0.0]
+        self.zoom = 0
+        width = max(self.canvas.winfo_width(), 400)
+        base_scale = 2.2 * self.bounding_half_width() / width
+        if base_scale != self.base_scale:
+            self.cache.clear()   # keys only carry the zoom level
+            self.base_scale = base_scale
+        self.redraw(clear=True)
+
+    # ---------------- View geometry ----------------
+    @property
+    def scale(self):
+        return self.base_scale * 2.0 ** (-self.zoom)
+
+    def to_world(self, px, py):
+        w, h = self.canvas.winfo_width(), self.canvas.winfo_height()
+        return self.center[0] + (px - w / 2) * self.scale, self.center[1] - (py - h / 2) * self.scale
+
+    def tile_key(self, tx, ty):
+        try:
+            position = float(self.position_entry.get())
+        except ValueError:
+            position = 0.0
+        return (self.revision, self.plane_var.get(), position, self.zoom, tx, ty)
+
+    def visible_tiles(self):
+        w, h = self.canvas.winfo_width(), self.canvas.winfo_height()
+        u0, v1 = self.to_world(0, 0)
+        u1, v0 = self.to_world(w, h)
+        span = TILE * self.scale
+        return [(tx, ty)
+                for ty in range(int(np.floor(v0 / span)), int(np.floor(v1 / span)) + 1)
+                for tx in range(int(np.floor(u0 / span)), int(np.floor(u1 / span)) + 1)]
+
+    def tile_origin(self, tx, ty):
+        """Canvas coordinates of a tile's top-left corner."""
+        w, h = self.canvas.winfo_width(), self.canvas.winfo_height()
+        return (w / 2 + tx * TILE - self.center[0] / self.scale,
+                h / 2 - (ty + 1) * TILE + self.center[1] / self.scale)
+
+    # ---------------- Drawing ----------------
+    def colors(self):
+        if self.color_var.get() == "material":
+            return palette(len(self.model.material_names))
+        return palette(len(self.model.cell_names))
+
+    def indices_for_color(self, cells):
+        if self.color_var.get() == "material":
+            return np.where(cells >= 0, self.model.cell_material[cells], -1)
+        return cells
+
+    def redraw(self, clear=False):
+        if self.model is None:
+            return
+        if clear:
+            self.canvas.delete("tile")
+            self.drawn.clear()
+        wanted = {self.tile_key(tx, ty): (tx, ty) for tx, ty in self.visible_tiles()}
+
+        for key in list(self.drawn):
+            if key not in wanted:
+                self.canvas.delete(self.drawn.pop(key)[0])
+        for key in list(self.pending):
+            if key not in wanted and self.pending[key].cancel():
+                del self.pending[key]
+
+        colors = self.colors()
+        for key, (tx, ty) in wanted.items():
+            x, y = self.tile_origin(tx, ty)
+            if key in self.drawn:
+                self.canvas.coords(self.drawn[key][0], x, y)
+            elif key in self.cache:
+                self.cache.move_to_end(key)
+                image = tile_image(self.indices_for_color(self.cache[key]), colors)
+                item = self.canvas.create_image(x, y, image=image, anchor="nw", tags="tile")
+                self.drawn[key] = (item, image)
+            elif key not in self.pending:
+                _, plane, position, _, _, _ = key
+                self.pending[key] = self.pool.submit(render_tile, plane, position, self.scale, tx, ty,
+                                                     self.universe, self.lattice)
+        self.update_status()
+
+    def poll_tiles(self):
+        if self.revision != self.project.revision:
+            if self.load_model():
+                self.redraw(clear=True)
+        finished = [key for key, future in self.pending.items() if future.done()]
+        for key in finished:
+            future = self.pending.pop(key)
+            if future.cancelled():
+                continue
+            try:
+                self.cache[key] = future.result()
+            except Exception as e:
+                self.status.config(text=f"Tile failed: {e}", fg="red")
+                continue
+            while len(self.cache) > MAX_TILES:
+                self.cache.popitem(last=False)
+        if finished:
+            self.redraw()
+        self.poll_id = self.master.after(POLL_MS, self.poll_tiles)
+
+    def update_status(self):
+        if self.pending:
+            self.status.config(text=f"Rendering {len(self.pending)} tiles...", fg="black")
+
+    # ---------------- Interaction ----------------
+    def start_drag(self, event):
+        self.drag_from = (event.x, event.y)
+
+    def drag(self, event):
+        if self.drag_from is None:
+            return
+        dx, dy = event.x - self.drag_from[0], event.y - self.drag_from[1]
+        self.drag_from = (event.x, event.y)
+        self.center[0] -= dx * self.scale
+        self.center[1] += dy * self.scale
+        self.canvas.move("tile", dx, dy)
+
+    def zoom_by(self, step, event=None):
+        px = event.x if event else self.canvas.winfo_width() / 2
+        py = event.y if event else self.canvas.winfo_height() / 2
+        # keep the point under the cursor fixed
+        anchor = self.to_world(px, py)
+        self.zoom += step
+        after = self.to_world(px, py)
+        self.center[0] += anchor[0] - after[0]
+        self.center[1] += anchor[1] - after[1]
+        self.redraw(clear=True)
+
+    def show_point(self, event):
+        if self.model is None:
+            return
+        u, v = self.to_world(event.x, event.y)
+        span = TILE * self.scale
+        tx, ty = int(np.floor(u / span)), int(np.floor(v / span))
+        cells = self.cache.get(self.tile_key(tx, ty))
+        text = f"{self.plane_var.get()[0]}={u:.3f}  {self.plane_var.get()[1]}={v:.3f}"
+        if cells is not None:
+            col = min(int(u / self.scale - tx * TILE), TILE - 1)
+            row = min(int((ty + 1) * TILE - v / self.scale), TILE - 1)
+            cell = int(cells[row, col])
+            if cell < 0:
+                text += "   (no cell)"
+            else:
+                material = self.model.cell_material[cell]
+                text += f"   cell: {self.model.cell_names[cell]}"
+                if material >= 0:
+                    text += f"   material: {self.model.material_names[material]}"
+        if not self.pending:
+            self.status.config(text=text, fg="black")
+
+    def on_close(self):
+        self.master.after_cancel(self.poll_id)
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        self.master.destroy()
@@ -0,0 +1,127 @@
+"""Vectorized sampling of the settings.json source for a pre-run preview.
+
+Sites are drawn from the same spatial distribution the exporter gives
+OpenMC (uniform in a box, sphere or finite cylinder) and classified with
+the point classifier, so the share of sites that land in the geometry (or,
+with the fissionable-only constraint, in fissionable material) is known
+before a run. OpenMC rejects and resamples the others, which costs time in
+the first batches and fails the run when too few are accepted.
+"""
+import re
+import numpy as np
+
+from .point_classifier import GeometryModel, inside_boundary
+
+PREVIEW_SITES = 100_000
+DEFAULT_CYLINDER_HEIGHT = 2.0   # what older projects got from the box approximation
+# elements with fissionable isotopes in the nuclear data libraries (Z >= 90)
+FISSIONABLE_ELEMENTS = {"Th", "Pa", "U", "Np", "Pu", "Am", "Cm", "Bk", "Cf", "Es", "Fm"}
+
+
+def source_box(src_data):
+    """(lower_left, upper_right) of a Box source (or the 2 cm cube around the position)."""
+    pos, extent = src_data["position"], src_data.get("extent")
+    if extent and len(extent) == 6:
+        return [extent[0], extent[2], extent[4]], [extent[1], extent[3], extent[5]]
+    return [p - 1 for p in pos], [p + 1 for p in pos]
+
+
+def sample_sites(src_data, n, rng=None):
+    """(n, 3) source sites drawn from the spatial distribution of a source record."""
+    rng = rng or np.random.default_rng()
+    src_type = src_data["type"]
+    if src_type == "File":
+        return file_sites(src_data["path"], n, rng)
+    pos = np.asarray(src_data["position"], dtype=float)
+    radius = float(src_data.get("radius") or 1.0)
+    if src_type == "Point":
+        return np.tile(pos, (n, 1))
+    if src_type == "Spherical":
+        # isotropic direction, r ~ R u^(1/3) for a uniform density
+        mu = rng.uniform(-1.0, 1.0, n)
+        phi = rng.uniform(0.0, 2 * np.pi, n)
+        r = radius * np.cbrt(rng.random(n))
+        s = np.sqrt(1.0 - mu * mu)
+        return pos + (r[:, None] * np.column_stack((s * np.cos(phi), s * np.sin(phi), mu)))
+    if src_type == "Cylindrical":
+        height = float(src_data.get("height") or DEFAULT_CYLINDER_HEIGHT)
+        r = radius * np.sqrt(rng.random(n))
+        phi = rng.uniform(0.0, 2 * np.pi, n)
+        z = rng.uniform(-height / 2, height / 2, n)
+        return pos + np.column_stack((r * np.cos(phi), r * np.sin(phi), z))
+    lower_left, upper_right = source_box(src_data)
+    return rng.uniform(lower_left, upper_right, (n, 3))
+
+
+def file_sites(path, n, rng):
+    """n positions drawn (with replacement) from the source bank of a source or statepoint file."""
+    import h5py
+    with h5py.File(path, "r") as f:
+        if "source_bank" not in f:
+            raise ValueError(f"{path} holds no source bank")
+        bank = f["source_bank"]
+        if not len(bank):
+            raise ValueError(f"{path} has an empty source bank")
+        # sorted indices keep the read a forward pass through the file
+        picks = np.sort(rng.integers(0, len(bank), n))
+        unique, inverse = np.unique(picks, return_inverse=True)
+        r = bank.fields("r")[unique] if len(unique) < len(bank) else bank.fields("r")[()]
+    xyz = np.column_stack([r[c] for c in ("x", "y", "z")]) if r.dtype.names else np.asarray(r, dtype=float)
+    return xyz[inverse]
+
+
+# ---------------- Fissionable material ----------------
+def _element(name):
+    m = re.match(r"[A-Z][a-z]?", name)
+    return m.group(0) if m else ""
+
+
+def is_fissionable(name, materials):
+    """True if a material (or any part of a mix) contains a fissionable element or nuclide."""
+    record = materials[name]
+    if record.get("is_mix") and record.get("mix"):
+        return any(is_fissionable(part, materials) for part in record["mix"]["materials"])
+    return any(_element(c["name"]) in FISSIONABLE_ELEMENTS for c in record.get("components") or [])
+
+
+def preview(project, sources, n=PREVIEW_SITES, seed=None):
+    """Where n sites sampled from the sources (split by strength) land, overall and per material."""
+    if isinstance(sources, dict):
+        sources = [sources]
+    rng = np.random.default_rng(seed)
+    strengths = np.array([float(src.get("strength") or 1.0) for src in sources])
+    counts_per_source = rng.multinomial(n, strengths / strengths.sum())
+    sites = np.vstack([sample_sites(src, k, rng) for src, k in zip(sources, counts_per_source)])
+    only_fissionable = np.repeat([bool(src.get("only_fissionable")) for src in sources], counts_per_source)
+
+    model = GeometryModel(project)
+    inside = inside_boundary(project["surfaces"], sites)
+    material = np.full(n, -1, dtype=np.int32)
+    material[inside] = model.materials(sites[inside])
+    fissionable = np.array([is_fissionable(m, project["materials"]) for m in model.material_names], dtype=bool)
+    in_fissionable = (material >= 0) & fissionable[np.maximum(material, 0)]
+    counts = np.bincount(material[material >= 0], minlength=len(model.material_names))
+    accepted = np.where(only_fissionable, in_fissionable, material >= 0)
+    return {
+        "n": n,
+        "in_geometry": float(np.mean(material >= 0)),
+        "in_fissionable": float(np.mean(in_fissionable)),
+        "acceptance": float(np.mean(accepted)),
+        "constraint": ("fissionable material only" if only_fissionable.all() else
+                       "anywhere in the model" if not only_fissionable.any() else "fissionable-only where set"),
+        "materials": {name: int(c) for name, c in zip(model.material_names, counts) if c},
+    }
+
+
+def format_preview(report):
+    lines = [f"{report['n']:,} sampled source sites",
+             f"Inside the geometry: {report['in_geometry']:.1%}",
+             f"In fissionable material: {report['in_fissionable']:.1%}"]
+    for name, count in sorted(report["materials"].items(), key=lambda kv: -kv[1]):
+        lines.append(f"  {name}: {count / report['n']:.1%}")
+    lines.append(f"Accepted ({report['constraint']}): {report['acceptance']:.1%}")
+    if report["acceptance"] == 0:
+        lines.append("No site would be accepted: OpenMC will stop with a source sampling error.")
+    elif report["acceptance"] < 0.05:
+        lines.append("Fewer than 5% of sites are accepted; shrink the source to the region of interest.")
+    return "\n".join(lines)
@@ -0,0 +1,134 @@
+"""Tabular source energy spectra, parsed once and cached as .npy.
+
+A spectrum file is a two-column text table (energy in eV, value). It is
+parsed the first time it is used and stored under <project>/spectra by
+the SHA-1 of its contents, so later saves and builds only hash the file and
+load the binary array. The prepared arrays (after interpolation choice and
+down-sampling) are cached the same way for the generated settings.py.
+
+Interpretations:
+    histogram      energies are bin edges, values are the density in each
+                   bin (the last value is ignored), as openmc.stats.Tabular
+    linear-linear  values are point densities, interpolated linearly
+    discrete       energies are lines with the given weights (the format
+                   older projects used), as openmc.stats.Discrete
+
+Down-sampling keeps a subset of the energies (half at equal steps of the
+cumulative distribution, half at equal steps of lethargy, plus both ends)
+and returns a histogram whose bins hold exactly the probability the
+original spectrum had between the kept energies.
+"""
+import os
+import numpy as np
+
+from .build_cache import file_digest
+
+SPECTRA_DIR = "spectra"
+INTERPOLATIONS = ["histogram", "linear-linear", "discrete"]
+
+
+def spectra_dir(project_dir="output"):
+    """Cache directory of a project's prepared spectra."""
+    return os.path.join(project_dir, SPECTRA_DIR)
+
+
+def read_table(path):
+    """(energies, values) of a two-column spectrum text file, checked."""
+    data = np.loadtxt(path, ndmin=2)
+    if data.shape[1] < 2:
+        raise ValueError(f"{path}: expected two columns (energy in eV, value)")
+    energy, value = data[:, 0].astype(float), data[:, 1].astype(float)
+    if len(energy) < 2:
+        raise ValueError(f"{path}: a tabular spectrum needs at least two points")
+    if np.any(np.diff(energy) <= 0) or energy[0] < 0:
+        raise ValueError(f"{path}: energies must be non-negative and strictly increasing")
+    if np.any(value < 0) or not np.any(value > 0):
+        raise ValueError(f"{path}: values must be non-negative and not all zero")
+    return energy, value
+
+
+def load_table(path, cache_dir=None):
+    """(sha1, energies, values), from the .npy cache when the file was seen before."""
+    cache_dir = cache_dir or spectra_dir()
+    sha1 = file_digest(path)
+    cached = os.path.join(cache_dir, f"{sha1}.npy")
+    if os.path.exists(cached):
+        data = np.load(cached)
+        return sha1, data[0], data[1]
+    energy, value = read_table(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = cached + ".tmp.npy"
+    np.save(tmp, np.vstack((energy, value)))
+    os.replace(tmp, cached)
+    return sha1, energy, value
+
+
+# ---------------- Distributions ----------------
+def cdf(energy, value, interpolation):
+    """Cumulative probability at each energy (normalized to 1 at the last)."""
+    dx = np.diff(energy)
+    if interpolation == "histogram":
+        pieces = value[:-1] * dx
+    elif interpolation == "linear-linear":
+        pieces = 0.5 * (value[:-1] + value[1:]) * dx
+    else:
+        return np.cumsum(value) / value.sum()
+    c = np.concatenate(([0.0], np.cumsum(pieces)))
+    if c[-1] <= 0:
+        raise ValueError("The spectrum integrates to zero")
+    return c / c[-1]
+
+
+def _reduced(interpolation, n, max_points):
+    return interpolation != "discrete" and bool(max_points) and n > max_points
+
+
+def downsample(energy, value, interpolation, max_points):
+    """Histogram on at most max_points energies with the original probability in every bin."""
+    n = len(energy)
+    if not _reduced(interpolation, n, max_points):
+        return energy, value, interpolation
+    if max_points < 3:
+        raise ValueError("Down-sampling needs at least 3 points")
+    c = cdf(energy, value, interpolation)
+    half = (max_points - 2) // 2
+    keep = [0, n - 1]
+    # equal probability steps follow the peaks ...
+    keep.extend(np.searchsorted(c, np.linspace(0, 1, half + 2)[1:-1]).tolist())
+    # ... and equal lethargy steps keep the shape of the tails
+    low = energy[0] if energy[0] > 0 else energy[1]
+    grid = np.geomspace(low, energy[-1], max_points - 2 - half + 2)[1:-1]
+    keep.extend(np.searchsorted(energy, grid).tolist())
+    keep = np.unique(np.clip(keep, 0, n - 1))
+    edges = energy[keep]
+    density = np.diff(c[keep]) / np.diff(edges)
+    return edges, np.append(density, 0.0), "histogram"
+
+
+def prepare(energy_record, cache_dir=None):
+    """(energies, values, interpolation, cache path) for a Tabular energy record of settings.json."""
+    cache_dir = cache_dir or spectra_dir()
+    interpolation = energy_record.get("interpolation") or "discrete"
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"Unknown spectrum interpolation '{interpolation}'")
+    max_points = int(energy_record.get("max_points") or 0)
+    sha1, energy, value = load_table(energy_record["param"], cache_dir)
+    if not _reduced(interpolation, len(energy), max_points):
+        return energy, value, interpolation, os.path.join(cache_dir, f"{sha1}.npy")
+    path = os.path.join(cache_dir, f"{sha1}-{interpolation}-{max_points}.npy")
+    if os.path.exists(path):
+        data = np.load(path)
+        return data[0], data[1], "histogram", path
+    energy, value, kind = downsample(energy, value, interpolation, max_points)
+    tmp = path + ".tmp.npy"
+    np.save(tmp, np.vstack((energy, value)))
+    os.replace(tmp, path)
+    return energy, value, kind, path
+
+
+def describe(energy_record, cache_dir=None):
+    """One-line summary of a Tabular record, e.g. for the settings window."""
+    _, energy, _ = load_table(energy_record["param"], cache_dir)
+    x, _, kind, _ = prepare(energy_record, cache_dir)
+    return (f"{len(energy):,} points, {energy[0]:.4g} - {energy[-1]:.4g} eV"
+            + (f", {len(x):,} after down-sampling ({kind})" if len(x) != len(energy) else f" ({kind})"))
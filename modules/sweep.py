@@ -0,0 +1,179 @@
+"""Parameter sweeps over fields of the project JSON files.
+
+A sweep definition is a JSON file such as::
+
+    {
+      "project_dir": "output",
+      "out_dir": "sweeps/pitch",
+      "method": "grid",
+      "parameters": [
+        {"name": "pitch", "field": "lattices.json/core/pitch", "values": [1.22, 1.26, 1.30]},
+        {"name": "radius", "field": "surfaces.json/fuel_or/params/0", "values": [0.39, 0.41]}
+      ],
+      "run": {"enabled": true, "threads": 4}
+    }
+
+``field`` is the JSON file name followed by the key/index path inside it.
+With ``"method": "lhs"`` each parameter gives ``low``/``high`` instead of
+``values`` and ``samples`` sets the number of Latin hypercube points.
+"""
+import os
+import csv
+import json
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+
+from .project import PROJECT_FILES
+from .xml_exporter import load_project, build_project
+from .run_engine import OpenMCRunner
+from .run_monitor import parse_combined_keff
+
+FILE_KEYS = {filename: key for key, (filename, _) in PROJECT_FILES.items()}
+
+
+def load_sweep(path):
+    with open(path, "r") as f:
+        defn = json.load(f)
+    if not defn.get("parameters"):
+        raise ValueError("Sweep definition has no parameters")
+    return defn
+
+
+# ---------------- Variants ----------------
+def generate_variants(defn):
+    """Return a list of {parameter name: value} dicts, one per variant."""
+    params = defn["parameters"]
+    names = [p["name"] for p in params]
+    method = defn.get("method", "grid")
+
+    if method == "grid":
+        return [dict(zip(names, combo)) for combo in itertools.product(*(p["values"] for p in params))]
+
+    if method == "lhs":
+        n = int(defn.get("samples", 10))
+        rng = np.random.default_rng(defn.get("seed"))
+        # One point per stratum in every dimension, strata shuffled independently
+        strata = np.argsort(rng.random((len(params), n)), axis=1)
+        u = (strata + rng.random((len(params), n))) / n
+        low = np.array([float(p["low"]) for p in params])[:, None]
+        high = np.array([float(p["high"]) for p in params])[:, None]
+        samples = low + u * (high - low)
+        return [dict(zip(names, samples[:, i].tolist())) for i in range(n)]
+
+    raise ValueError(f"Unknown sweep method '{method}' (use 'grid' or 'lhs')")
+
+
+def set_field(project, field, value):
+    """Set 'file.json/key/0/key' inside a loaded project dict."""
+    filename, _, path = field.partition("/")
+    if filename not in FILE_KEYS or not path:
+        raise ValueError(f"Invalid sweep field '{field}'")
+    node = project[FILE_KEYS[filename]]
+    keys = path.split("/")
+    for key in keys[:-1]:
+        node = node[int(key)] if isinstance(node, list) else node[key]
+    last = keys[-1]
+    if isinstance(node, list):
+        node[int(last)] = value
+    elif last in node:
+        node[last] = value
+    else:
+        raise KeyError(f"'{last}' not found for sweep field '{field}'")
+
+
+def write_variant(project_dir, variant_dir, fields, root=None):
+    """Write one variant's JSON files and XML into variant_dir (runs in a worker process)."""
+    project = load_project(project_dir)
+    for field, value in fields.items():
+        set_field(project, field, value)
+
+    os.makedirs(variant_dir, exist_ok=True)
+    for key, (filename, _) in PROJECT_FILES.items():
+        if project[key]:
+            with open(os.path.join(variant_dir, filename), "w") as f:
+                json.dump(project[key], f, indent=2)
+    build_project(variant_dir, root=root)
+    return variant_dir
+
+
+# ---------------- Running ----------------
+def run_variant(variant_dir, threads=None, openmc_exec="openmc", cross_sections=None):
+    """Run OpenMC in variant_dir and return (k, sigma, runtime seconds, status)."""
+    args = ["-s", str(threads)] if threads else []
+    runner = OpenMCRunner(variant_dir, cross_sections=cross_sections, openmc_exec=openmc_exec, args=args)
+    start = time.monotonic()
+    keff = None
+    with open(os.path.join(variant_dir, "openmc.log"), "w") as log:
+        runner.start()
+        while not runner.finished():
+            for line in runner.poll_lines():
+                log.write(line + "\n")
+                keff = parse_combined_keff(line) or keff
+            time.sleep(0.2)
+    runtime = time.monotonic() - start
+    status = "ok" if runner.returncode == 0 else f"failed ({runner.returncode})"
+    k, sigma = keff if keff else (None, None)
+    return k, sigma, runtime, status
+
+
+def run_sweep(defn, workers=None, run=None, progress=print):
+    """Generate every variant in parallel, optionally run them, and write results.csv."""
+    project_dir = defn.get("project_dir", "output")
+    out_dir = defn.get("out_dir", os.path.join("output", "sweep"))
+    run_cfg = defn.get("run", {})
+    run = run_cfg.get("enabled", False) if run is None else run
+    fields = {p["name"]: p["field"] for p in defn["parameters"]}
+
+    variants = generate_variants(defn)
+    rows = []
+    for i, values in enumerate(variants, start=1):
+        rows.append({"variant": f"variant_{i:04d}", **values})
+
+    # XML generation is CPU bound (openmc object building), so fan out over processes
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for row in rows:
+            variant_fields = {fields[name]: row[name] for name in fields}
+            variant_dir = os.path.join(out_dir, row["variant"])
+            futures.append(pool.submit(write_variant, project_dir, variant_dir, variant_fields, defn.get("root")))
+        for row, future in zip(rows, futures):
+            try:
+                future.result()
+                row["status"] = "built"
+            except Exception as e:
+                row["status"] = f"build failed: {e}"
+            progress(f"{row['variant']}: {row['status']}")
+
+    if run:
+        # Cap concurrent OpenMC instances so instances x threads does not exceed the cores
+        threads = int(run_cfg.get("threads") or 1)
+        max_parallel = run_cfg.get("max_parallel") or max(1, (os.cpu_count() or 1) // threads)
+        to_run = [row for row in rows if row["status"] == "built"]
+        with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+            futures = {
+                pool.submit(run_variant, os.path.join(out_dir, row["variant"]), threads,
+                            run_cfg.get("openmc_exec", "openmc"), run_cfg.get("cross_sections")): row
+                for row in to_run
+            }
+            for future, row in futures.items():
+                try:
+                    row["keff"], row["keff_std"], row["runtime_s"], row["status"] = future.result()
+                except Exception as e:
+                    row["status"] = f"run failed: {e}"
+                progress(f"{row['variant']}: {row['status']}")
+
+    results_path = os.path.join(out_dir, "results.csv")
+    write_results(results_path, rows, list(fields))
+    return results_path, rows
+
+
+def write_results(path, rows, param_names):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    columns = ["variant"] + param_names + ["keff", "keff_std", "runtime_s", "status"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
@@ -1,30 +1,28 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
-import os
-import openmc
-
-# Path for saved tallies
-TALLY_JSON = "output/tallies.json"
+from .project import get_project, reachable_cells
+from .xml_exporter import build_tallies, tallies_key
+from .build_cache import export_xml
+from .nuclide_catalog import get_catalog
+from .point_classifier import bounding_box
+from .tally_spec import (SPATIAL_FILTERS, BYTES_PER_BIN, group_structures, tally_filters, energy_edges,
+                         resolve_ids, check_mesh, estimate_memory, tally_bins, physical_memory, format_bytes)
 
 # Predefined options
-FILTER_OPTIONS = ["Cell", "Material", "Mesh", "Energy"]
+FILTER_OPTIONS = SPATIAL_FILTERS
+RAM_WARNING_FRACTION = 0.5   # ask before saving tallies that need more than this share of RAM
 SCORE_OPTIONS = ["flux", "fission", "nu-fission", "kappa-fission", "absorption", "scatter", "heating", "total"]
-NUCLIDE_OPTIONS = ["U235", "U238", "H1", "O16"]  # Add more if needed
+NUCLIDE_OPTIONS = ["U235", "U238", "H1", "O16"]  # used when no cross_sections.xml is selected
 
 # --- Load previous tallies ---
 def load_tallies():
-    try:
-        with open(TALLY_JSON, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    return get_project().tallies
 
 # --- Save tallies to JSON ---
 def save_tallies(data):
-    os.makedirs("output", exist_ok=True)
-    with open(TALLY_JSON, "w") as f:
-        json.dump(data, f, indent=4)
+    project = get_project()
+    project.set("tallies", data)
+    project.save(["tallies"])
 
 # --- GUI App ---
 class TallyBuilderApp:
@@ -32,10 +30,13 @@ class TallyBuilderApp:
         # Create new popup window
         self.window = tk.Toplevel(master)
         self.window.title("OpenMC Tally Builder")
-        self.window.geometry("750x450")
+        self.window.geometry("980x620")
 
         # Previous tallies
         self.prev_tallies = load_tallies()
+        self.project = get_project()
+        structures = group_structures()
+        self.group_names = sorted(structures, key=lambda g: (len(structures[g]), g))
 
         # Left frame for tally input
         input_frame = ttk.Frame(self.window, padding=10)
@@ -51,29 +52,77 @@ class TallyBuilderApp:
             input_frame, textvariable=self.filter_var,
             values=FILTER_OPTIONS, state="readonly"
         )
-        self.filter_dropdown.grid(row=1, column=1, pady=5)
+        self.filter_var.set("None")
+        self.filter_dropdown.grid(row=1, column=1, pady=5, sticky="w")
+        self.filter_dropdown.bind("<<ComboboxSelected>>", lambda e: self.show_filter_options())
+
+        # Cell / material names (nothing selected = every cell or material)
+        self.names_frame = ttk.Frame(input_frame)
+        ttk.Label(self.names_frame, text="Bins (none selected = all):").pack(anchor="w")
+        self.names_listbox = tk.Listbox(self.names_frame, selectmode="multiple", exportselection=0, height=5)
+        self.names_listbox.pack(fill="x")
+        self.names_listbox.bind("<<ListboxSelect>>", lambda e: self.update_estimate())
+
+        # Regular mesh bounds and dimension
+        self.mesh_frame = ttk.Frame(input_frame)
+        self.mesh_entries = {}
+        for row, (key, label, default) in enumerate((("lower_left", "Lower left (x,y,z):", "-10,-10,-10"),
+                                                      ("upper_right", "Upper right (x,y,z):", "10,10,10"),
+                                                      ("dimension", "Dimension (nx,ny,nz):", "10,10,1"))):
+            ttk.Label(self.mesh_frame, text=label).grid(row=row, column=0, sticky="w")
+            entry = ttk.Entry(self.mesh_frame, width=22)
+            entry.insert(0, default)
+            entry.grid(row=row, column=1, pady=1)
+            entry.bind("<KeyRelease>", lambda e: self.update_estimate())
+            self.mesh_entries[key] = entry
+        ttk.Button(self.mesh_frame, text="Fit to Geometry", command=self.fit_mesh).grid(row=3, column=1, sticky="w")
+
+        self.filter_detail = ttk.Frame(input_frame)
+        self.filter_detail.grid(row=2, column=0, columnspan=2, sticky="we")
 
-        ttk.Label(input_frame, text="Scores:").grid(row=2, column=0, sticky="w")
+        ttk.Label(input_frame, text="Energy groups:").grid(row=3, column=0, sticky="w")
+        self.energy_dropdown = ttk.Combobox(input_frame, values=["None"] + self.group_names + ["Custom"],
+                                            state="readonly", width=18)
+        self.energy_dropdown.set("None")
+        self.energy_dropdown.grid(row=3, column=1, pady=5, sticky="w")
+        self.energy_dropdown.bind("<<ComboboxSelected>>", lambda e: self.update_estimate())
+        ttk.Label(input_frame, text="Custom edges (eV):").grid(row=4, column=0, sticky="w")
+        self.edges_entry = ttk.Entry(input_frame, width=30)
+        self.edges_entry.insert(0, "0, 0.625, 2e7")
+        self.edges_entry.grid(row=4, column=1, pady=2, sticky="w")
+        self.edges_entry.bind("<KeyRelease>", lambda e: self.update_estimate())
+
+        ttk.Label(input_frame, text="Scores:").grid(row=5, column=0, sticky="w")
         self.scores_listbox = tk.Listbox(input_frame, selectmode="multiple", exportselection=0, height=6)
         for score in SCORE_OPTIONS:
             self.scores_listbox.insert(tk.END, score)
-        self.scores_listbox.grid(row=2, column=1, pady=5)
+        self.scores_listbox.grid(row=5, column=1, pady=5)
+        self.scores_listbox.bind("<<ListboxSelect>>", lambda e: self.update_estimate())
 
-        ttk.Label(input_frame, text="Nuclides:").grid(row=3, column=0, sticky="w")
+        # Nuclides come from the cross_sections.xml library; type to filter
+        self.catalog = get_catalog()
+        self.selected_nuclides = []
+        ttk.Label(input_frame, text="Nuclides:").grid(row=6, column=0, sticky="w")
+        self.nuclide_filter = ttk.Entry(input_frame, width=20)
+        self.nuclide_filter.grid(row=6, column=1, pady=(5, 0), sticky="w")
+        self.nuclide_filter.bind("<KeyRelease>", self.refresh_nuclide_list)
         self.nuclides_listbox = tk.Listbox(input_frame, selectmode="multiple", exportselection=0, height=6)
-        for nuc in NUCLIDE_OPTIONS:
-            self.nuclides_listbox.insert(tk.END, nuc)
-        self.nuclides_listbox.grid(row=3, column=1, pady=5)
+        self.nuclides_listbox.grid(row=7, column=1, pady=5)
+        self.nuclides_listbox.bind("<<ListboxSelect>>", self.on_nuclide_select)
+        self.refresh_nuclide_list()
+
+        self.estimate_label = ttk.Label(input_frame, text="", justify="left")
+        self.estimate_label.grid(row=8, column=0, columnspan=2, sticky="w")
 
         save_btn = ttk.Button(input_frame, text="Save Tally", command=self.save_tally)
-        save_btn.grid(row=4, column=0, columnspan=2, pady=10)
+        save_btn.grid(row=9, column=0, columnspan=2, pady=10)
 
         # Right frame for previous tallies
         right_frame = ttk.Frame(self.window, padding=10)
         right_frame.grid(row=0, column=1, sticky="nsew")
 
         ttk.Label(right_frame, text="Previous Tallies:").pack(anchor="w")
-        self.tally_box = tk.Text(right_frame, width=50, height=25, state="disabled")
+        self.tally_box = tk.Text(right_frame, width=55, height=30, state="disabled")
         self.tally_box.pack()
         self.refresh_tally_box()
 
@@ -87,78 +136,218 @@ class TallyBuilderApp:
             justify="right"
         ).place(relx=0.98, rely=0.98, anchor="se")
 
+        self.update_estimate()
+
+
+    # --- Nuclide list filtering ---
+    def refresh_nuclide_list(self, event=None):
+        text = self.nuclide_filter.get()
+        if self.catalog is not None:
+            options = self.catalog.search(text)
+        else:
+            options = [n for n in NUCLIDE_OPTIONS if text.lower() in n.lower()]
+        self.nuclides_listbox.delete(0, tk.END)
+        for i, nuc in enumerate(options):
+            self.nuclides_listbox.insert(tk.END, nuc)
+            if nuc in self.selected_nuclides:
+                self.nuclides_listbox.selection_set(i)
+
+    def on_nuclide_select(self, event=None):
+        # Keep selections made under earlier filters
+        visible = self.nuclides_listbox.get(0, tk.END)
+        chosen = {visible[i] for i in self.nuclides_listbox.curselection()}
+        self.selected_nuclides = [n for n in self.selected_nuclides if n not in visible or n in chosen]
+        self.selected_nuclides += [n for n in visible if n in chosen and n not in self.selected_nuclides]
+        self.update_estimate()
+
+    # --- Filter options ---
+    def show_filter_options(self):
+        self.names_frame.pack_forget()
+        self.mesh_frame.pack_forget()
+        choice = self.filter_var.get()
+        if choice in ("Cell", "Material"):
+            names = self.cell_choices() if choice == "Cell" else list(self.project.materials)
+            self.names_listbox.delete(0, tk.END)
+            for name in names:
+                self.names_listbox.insert(tk.END, name)
+            self.names_frame.pack(in_=self.filter_detail, fill="x")
+        elif choice == "Mesh":
+            self.mesh_frame.pack(in_=self.filter_detail, fill="x")
+        self.update_estimate()
+
+    def fit_mesh(self):
+        """Set the mesh bounds to the model's boundary surfaces."""
+        lower_left, upper_right = bounding_box(self.project.surfaces, margin=1.0)
+        for key, values in (("lower_left", lower_left), ("upper_right", upper_right)):
+            self.mesh_entries[key].delete(0, tk.END)
+            self.mesh_entries[key].insert(0, ",".join(f"{v:g}" for v in values))
+        self.update_estimate()
+
+    def current_filters(self):
+        """Filter specs from the form (raises ValueError for malformed entries)."""
+        filters = []
+        choice = self.filter_var.get()
+        if choice in ("Cell", "Material"):
+            filters.append({"type": choice,
+                            "bins": [self.names_listbox.get(i) for i in self.names_listbox.curselection()]})
+        elif choice == "Mesh":
+            spec = {"type": "Mesh"}
+            for key, entry in self.mesh_entries.items():
+                cast = int if key == "dimension" else float
+                spec[key] = [cast(v) for v in entry.get().split(",")]
+            filters.append(spec)
+        groups = self.energy_dropdown.get()
+        if groups == "Custom":
+            spec = {"type": "Energy", "edges": [float(v) for v in self.edges_entry.get().split(",")]}
+            energy_edges(spec)
+            filters.append(spec)
+        elif groups and groups != "None":
+            filters.append({"type": "Energy", "groups": groups})
+        return filters
+
+    def current_tally(self):
+        return {
+            "name": self.tally_name_entry.get() or "unnamed_tally",
+            "filters": self.current_filters(),
+            "scores": [self.scores_listbox.get(i) for i in self.scores_listbox.curselection()],
+            "nuclides": list(self.selected_nuclides),
+        }
+
+    def cell_choices(self):
+        """Cells that will be in geometry.xml (all cells while the root universe is undecided)."""
+        try:
+            return reachable_cells(self.project.as_dict())
+        except ValueError:
+            return [c["name"] for c in self.project.cells]
+
+    def update_estimate(self):
+        """Show result bins and memory for this tally and for all tallies together."""
+        data = self.project.as_dict()
+        try:
+            draft = self.current_tally()
+            draft_bins = tally_bins(draft, data)
+        except (ValueError, KeyError) as e:
+            self.estimate_label.config(text=f"Filter: {e}", foreground="red")
+            return
+        try:
+            _, saved_bytes = estimate_memory(self.prev_tallies, data)
+        except (ValueError, KeyError) as e:
+            self.estimate_label.config(text=f"Saved tallies: {e}", foreground="red")
+            return
+        total = saved_bytes + draft_bins * BYTES_PER_BIN
+        ram = physical_memory()
+        text = (f"This tally: {draft_bins:,} bins ({format_bytes(draft_bins * BYTES_PER_BIN)})\n"
+                f"All tallies with this one: {format_bytes(total)}")
+        if ram:
+            text += f" of {format_bytes(ram)} RAM per process"
+        heavy = ram is not None and total > RAM_WARNING_FRACTION * ram
+        self.estimate_label.config(text=text, foreground="red" if heavy else "black")
 
     # --- Refresh previous tallies ---
     def refresh_tally_box(self):
         self.tally_box.config(state="normal")
         self.tally_box.delete(1.0, tk.END)
+        data = self.project.as_dict()
         for t in self.prev_tallies:
+            filters = ", ".join(describe_filter(spec) for spec in tally_filters(t)) or "none"
+            try:
+                size = f"{tally_bins(t, data):,} bins"
+            except (ValueError, KeyError) as e:
+                size = f"invalid: {e}"
             self.tally_box.insert(
                 tk.END,
-                f"Name: {t['name']}, Filter: {t['filter']}, Scores: {t['scores']}, Nuclides: {t['nuclides']}\n"
+                f"Name: {t['name']}, Filters: {filters}, Scores: {t['scores']}, Nuclides: {t['nuclides']} ({size})\n"
             )
         self.tally_box.config(state="disabled")
 
     # --- Save new tally ---
     def save_tally(self):
-        name = self.tally_name_entry.get() or "unnamed_tally"
-        filter_choice = self.filter_var.get()
-        scores = [self.scores_listbox.get(i) for i in self.scores_listbox.curselection()]
-        nuclides = [self.nuclides_listbox.get(i) for i in self.nuclides_listbox.curselection()]
+        try:
+            new_tally = self.current_tally()
+            data = self.project.as_dict()
+            bins = tally_bins(new_tally, data)
+            _, saved_bytes = estimate_memory(self.prev_tallies, data)
+        except (ValueError, KeyError) as e:
+            messagebox.showerror("Error", f"Invalid tally filter:\n{e}")
+            return
+        name = new_tally["name"]
 
-        if not filter_choice or not scores:
-            messagebox.showerror("Error", "Filter and at least one Score must be selected!")
+        if not new_tally["scores"]:
+            messagebox.showerror("Error", "At least one Score must be selected!")
             return
 
-        new_tally = {"name": name, "filter": filter_choice, "scores": scores, "nuclides": nuclides}
+        total = saved_bytes + bins * BYTES_PER_BIN
+        ram = physical_memory()
+        if ram and total > RAM_WARNING_FRACTION * ram:
+            if not messagebox.askyesno("Large tallies", f"All tallies together need about {format_bytes(total)} "
+                                                        f"per OpenMC process, of {format_bytes(ram)} RAM.\n"
+                                                        "Save anyway?"):
+                return
+
         self.prev_tallies.append(new_tally)
         save_tallies(self.prev_tallies)
 
-        self.export_openmc_tallies()
+        try:
+            self.export_openmc_tallies()
+        except Exception as e:
+            messagebox.showerror("Error", f"Tally saved, but tallies.xml could not be written:\n{e}")
+            return
+        self.update_estimate()
         self.refresh_tally_box()
         messagebox.showinfo("Saved", f"Tally '{name}' saved successfully!")
 
     # --- Export OpenMC Python + XML ---
     def export_openmc_tallies(self):
-        tallies = openmc.Tallies()
+        data = self.project.as_dict()
 
-        for t in self.prev_tallies:
-            tally = openmc.Tally(name=t["name"])
-
-            # Apply filter
-            ftype = t.get("filter", "")
-            if ftype == "Cell":
-                tally.filters = [openmc.CellFilter([1])]  # placeholder
-            elif ftype == "Material":
-                tally.filters = [openmc.MaterialFilter([1])]
-            elif ftype == "Mesh":
-                mesh = openmc.RegularMesh()
-                mesh.dimension = [5, 5, 1]
-                mesh.lower_left = [0., 0., 0.]
-                mesh.upper_right = [10., 10., 10.]
-                tally.filters = [openmc.MeshFilter(mesh)]
-            elif ftype == "Energy":
-                tally.filters = [openmc.EnergyFilter([0.0, 0.625e-6, 20.0e6])]
-
-            tally.scores = t.get("scores", [])
-            if t.get("nuclides"):
-                tally.nuclides = t["nuclides"]
-
-            tallies.append(tally)
-
-        # Export to XML
-        os.makedirs("output", exist_ok=True)
-        tallies.export_to_xml("output/tallies.xml")
+        # Export to XML (skipped when neither the tallies nor the names they refer to changed)
+        export_xml("output", "tallies.xml", tallies_key(self.prev_tallies, data),
+                   lambda: build_tallies(self.prev_tallies, data))
 
         # Export to Python
         with open("output/tallies.py", "w") as f:
-            f.write("import openmc\n\n")
+            f.write("import openmc\nimport openmc.mgxs\n\n")
             f.write("tallies = openmc.Tallies()\n\n")
             for i, t in enumerate(self.prev_tallies, start=1):
                 f.write(f"# Tally {i}: {t['name']}\n")
                 f.write(f"tally{i} = openmc.Tally(name='{t['name']}')\n")
+                f.writelines(filter_python(f"tally{i}", t, data))
                 f.write(f"tally{i}.scores = {t['scores']}\n")
                 if t['nuclides']:
                     f.write(f"tally{i}.nuclides = {t['nuclides']}\n")
                 f.write(f"tallies.append(tally{i})\n\n")
             f.write("tallies.export_to_xml('output/tallies.xml')\n")
+
+
+def describe_filter(spec):
+    if spec["type"] in ("Cell", "Material"):
+        return f"{spec['type']} ({', '.join(spec.get('bins') or []) or 'all'})"
+    if spec["type"] == "Mesh":
+        return f"Mesh {'x'.join(map(str, spec['dimension']))}"
+    if spec["type"] == "Energy":
+        return f"Energy {spec['groups']}" if spec.get("groups") else f"Energy {len(spec['edges']) - 1} groups"
+    return spec["type"]
+
+
+def filter_python(var, record, project):
+    """Code lines creating the filters of one tally, with IDs already resolved."""
+    lines, names = [], []
+    for k, spec in enumerate(tally_filters(record)):
+        fname = f"{var}_filter{k}"
+        if spec["type"] in ("Cell", "Material"):
+            lines.append(f"{fname} = openmc.{spec['type']}Filter({resolve_ids(spec, project)})\n")
+        elif spec["type"] == "Mesh":
+            lower_left, upper_right, dimension = check_mesh(spec)
+            lines.append(f"{fname}_mesh = openmc.RegularMesh(name='{record['name']}')\n")
+            lines.append(f"{fname}_mesh.lower_left = {lower_left}\n")
+            lines.append(f"{fname}_mesh.upper_right = {upper_right}\n")
+            lines.append(f"{fname}_mesh.dimension = {dimension}\n")
+            lines.append(f"{fname} = openmc.MeshFilter({fname}_mesh)\n")
+        elif spec.get("groups"):
+            lines.append(f"{fname} = openmc.EnergyFilter(openmc.mgxs.GROUP_STRUCTURES['{spec['groups']}'])\n")
+        else:
+            lines.append(f"{fname} = openmc.EnergyFilter({energy_edges(spec)})\n")
+        names.append(fname)
+    if names:
+        lines.append(f"{var}.filters = [{', '.join(names)}]\n")
+    return lines
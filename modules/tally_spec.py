@@ -0,0 +1,132 @@
+"""Tally filter definitions and tally memory estimates.
+
+tallies.json stores each tally's filters compactly: cells and materials by
+name, meshes by bounds and dimension, energy bins by the name of a group
+structure (or explicit edges). Names are resolved to the IDs the exporter
+gives cells and materials (their position in cells.json / materials.json,
+starting at 1), so the filters follow the model instead of placeholders.
+
+Older records with a single "filter" string are read as the equivalent
+filter list.
+"""
+import os
+
+from .project import reachable_cells
+
+# OpenMC keeps value, sum and sum of squares (3 doubles) for every tally bin
+BYTES_PER_BIN = 24
+SPATIAL_FILTERS = ["None", "Cell", "Material", "Mesh"]
+LEGACY_MESH = {"type": "Mesh", "lower_left": [0.0, 0.0, 0.0], "upper_right": [10.0, 10.0, 10.0], "dimension": [5, 5, 1]}
+THERMAL_FAST = [0.0, 0.625, 20.0e6]
+
+
+def group_structures():
+    """{name: energy edges in eV} from OpenMC's group structure library."""
+    from openmc.mgxs import GROUP_STRUCTURES
+    return GROUP_STRUCTURES
+
+
+def tally_filters(record):
+    """Filter specs of a tallies.json record (converting the old single-filter form)."""
+    if "filters" in record:
+        return record["filters"]
+    legacy = record.get("filter", "")
+    if legacy in ("Cell", "Material"):
+        return [{"type": legacy, "bins": []}]
+    if legacy == "Mesh":
+        return [dict(LEGACY_MESH)]
+    if legacy == "Energy":
+        return [{"type": "Energy", "edges": THERMAL_FAST}]
+    return []
+
+
+def energy_edges(spec):
+    if spec.get("groups"):
+        structures = group_structures()
+        if spec["groups"] not in structures:
+            raise ValueError(f"Unknown energy group structure '{spec['groups']}'")
+        return [float(e) for e in structures[spec["groups"]]]
+    edges = [float(e) for e in spec["edges"]]
+    if len(edges) < 2 or any(b <= a for a, b in zip(edges, edges[1:])):
+        raise ValueError("Energy edges must be at least two increasing values")
+    return edges
+
+
+def resolve_ids(spec, project, root=None):
+    """Cell or material IDs for a filter spec; an empty name list means all of them.
+
+    Cells are limited to those reachable from the root universe: OpenMC stops
+    on a cell filter naming a cell that is not in geometry.xml.
+    """
+    if spec["type"] == "Cell":
+        ids = {c["name"]: i for i, c in enumerate(project["cells"], start=1)}
+        in_geometry = reachable_cells(project, root)
+    else:
+        ids = {name: i for i, name in enumerate(project["materials"], start=1)}
+        in_geometry = list(ids)
+    names = spec.get("bins") or in_geometry
+    unknown = [n for n in names if n not in ids]
+    if unknown:
+        raise ValueError(f"Unknown {spec['type'].lower()}s in tally filter: {', '.join(unknown)}")
+    present = set(in_geometry)
+    unreachable = [n for n in names if n not in present]
+    if unreachable:
+        raise ValueError(f"Cells not in the geometry (not reachable from the root universe): {', '.join(unreachable)}")
+    return [ids[n] for n in names]
+
+
+def check_mesh(spec):
+    lower_left, upper_right = [float(v) for v in spec["lower_left"]], [float(v) for v in spec["upper_right"]]
+    dimension = [int(d) for d in spec["dimension"]]
+    if not len(lower_left) == len(upper_right) == len(dimension) or len(dimension) not in (1, 2, 3):
+        raise ValueError("Mesh lower left, upper right and dimension need the same number (1-3) of values")
+    if any(hi <= lo for lo, hi in zip(lower_left, upper_right)) or min(dimension) < 1:
+        raise ValueError("Mesh upper right must exceed lower left and every dimension must be at least 1")
+    return lower_left, upper_right, dimension
+
+
+def filter_bins(spec, project):
+    """Number of bins a filter spec produces."""
+    if spec["type"] in ("Cell", "Material"):
+        return len(resolve_ids(spec, project))
+    if spec["type"] == "Mesh":
+        n = 1
+        for d in check_mesh(spec)[2]:
+            n *= d
+        return n
+    if spec["type"] == "Energy":
+        return len(energy_edges(spec)) - 1
+    raise ValueError(f"Unknown tally filter type '{spec['type']}'")
+
+
+def tally_bins(record, project):
+    """Total result bins of one tally: filter bins x nuclides x scores."""
+    n = 1
+    for spec in tally_filters(record):
+        n *= filter_bins(spec, project)
+    return n * max(1, len(record.get("nuclides") or [])) * max(1, len(record.get("scores") or []))
+
+
+def estimate_memory(tallies, project):
+    """[(tally name, bins, bytes)] for every tally, plus the total bytes."""
+    rows = []
+    for record in tallies:
+        bins = tally_bins(record, project)
+        rows.append((record.get("name", ""), bins, bins * BYTES_PER_BIN))
+    return rows, sum(r[2] for r in rows)
+
+
+def physical_memory():
+    """Installed RAM in bytes, or None where it cannot be read."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def format_bytes(n):
+    for unit in ("B", "kB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
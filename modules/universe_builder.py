@@ -1,8 +1,7 @@
 import tkinter as tk
 from tkinter import messagebox
 import os
-import json
-import openmc
+from .project import get_project
 
 class UniverseBuilder:
     def __init__(self, master, cells, materials, universes):
@@ -11,7 +10,7 @@ class UniverseBuilder:
         self.master.geometry("600x550")
 
         # Files
-        self.json_file = os.path.join("output", "universes.json")
+        self.project = get_project()
         self.py_file = os.path.join("output", "geometry.py")
 
         # Load predefined cells
@@ -44,6 +43,7 @@ class UniverseBuilder:
         btn_frame.pack(pady=10)
         tk.Button(btn_frame, text="Add Universe", command=self.add_universe).grid(row=0, column=0, padx=5)
         tk.Button(btn_frame, text="Save Universes", command=self.save_universes).grid(row=0, column=1, padx=5)
+        tk.Button(btn_frame, text="Plot Universe", command=self.plot_universe).grid(row=0, column=2, padx=5)
 
         # Created universes
         tk.Label(self.master, text="Created Universes:").pack()
@@ -83,26 +83,23 @@ class UniverseBuilder:
             return
 
         self.universes[name] = {"id": uid, "cells": selected_cells}
+        self.project.mark_dirty("universes")
         self.refresh_universe_listbox()
 
     def save_universes(self):
         os.makedirs("output", exist_ok=True)
 
         # Save JSON
-        with open(self.json_file, "w") as f:
-            json.dump(self.universes, f, indent=2)
+        self.project.save(["universes"])
 
         # Save Python (geometry.py)
         lines = ["import openmc\nfrom surfaces import *\nfrom materials import *\n\n"]
 
         # Cells first
-        cells_json_path = os.path.join("output", "cells.json")
-        if os.path.exists(cells_json_path):
-            with open(cells_json_path, "r") as f:
-                cells_data = json.load(f)
-            for cell in cells_data:
-                fill = cell.get("material") or cell.get("universe")
-                lines.append(f"{cell['name']} = openmc.Cell(name='{cell['name']}', fill={fill}, region={cell['region']})\n")
+        cells_data = self.project.cells
+        for cell in cells_data:
+            fill = cell.get("material") or cell.get("universe")
+            lines.append(f"{cell['name']} = openmc.Cell(name='{cell['name']}', fill={fill}, region={cell['region']})\n")
 
         # Universes
         lines.append("\nuniverses = {}\n")
@@ -126,3 +123,13 @@ class UniverseBuilder:
             f.writelines(lines)
 
         messagebox.showinfo("Saved", f"Geometry saved to {self.py_file}")
+
+    def plot_universe(self):
+        """Slice plot of the universe selected in the list."""
+        selection = self.universe_listbox.curselection()
+        if not selection:
+            messagebox.showerror("Error", "Select a universe to plot.")
+            return
+        from .slice_plotter import SlicePlotter
+        name = list(self.universes)[selection[0]]
+        SlicePlotter(self.master, universe=name, title=f"Universe {name}")
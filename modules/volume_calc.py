@@ -0,0 +1,315 @@
+"""Cell and material volumes for depletion.
+
+Cells whose region (together with the regions of the cells and lattice
+tiles that contain them) is an intersection of simple halfspaces get an
+exact volume: the cross-section is one convex shape (circle, hexagon or
+box) minus at most one nested hole, times the z-extent, times the number
+of lattice instances. Every other cell is estimated by sampling uniform
+points in the model's bounding box, in worker processes, until each
+material reaches the target relative error.
+"""
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from .point_classifier import GeometryModel, bounding_box
+
+CHUNK = 500_000
+SQRT3 = math.sqrt(3.0)
+EPS = 1e-9
+
+_worker_model = None
+
+
+# ---------------- 2D shapes ----------------
+# ("circle", r), ("hex", edge, orientation), ("box", xlo, xhi, ylo, yhi); all centred at the origin but boxes
+def shape_area(shape):
+    if shape[0] == "circle":
+        return math.pi * shape[1] ** 2
+    if shape[0] == "hex":
+        return 1.5 * SQRT3 * shape[1] ** 2
+    _, xlo, xhi, ylo, yhi = shape
+    return max(xhi - xlo, 0.0) * max(yhi - ylo, 0.0)
+
+
+def shape_vertices(shape):
+    if shape[0] == "hex":
+        a = shape[1]
+        pts = [(a * math.cos(t), a * math.sin(t)) for t in np.radians([90, 30, -30, -90, -150, 150])]
+        return pts if shape[2] == "y" else [(y, x) for x, y in pts]
+    if shape[0] == "box":
+        _, xlo, xhi, ylo, yhi = shape
+        return [(xlo, ylo), (xlo, yhi), (xhi, ylo), (xhi, yhi)]
+    return None
+
+
+def point_inside(shape, x, y):
+    if not (math.isfinite(x) and math.isfinite(y)):
+        return False
+    if shape[0] == "circle":
+        return x * x + y * y <= shape[1] ** 2 + EPS
+    if shape[0] == "hex":
+        u, v = (abs(x), abs(y)) if shape[2] == "y" else (abs(y), abs(x))
+        return u <= SQRT3 / 2 * shape[1] + EPS and u / SQRT3 + v <= shape[1] + EPS
+    _, xlo, xhi, ylo, yhi = shape
+    return xlo - EPS <= x <= xhi + EPS and ylo - EPS <= y <= yhi + EPS
+
+
+def points_inside(shape, x, y):
+    """Vectorized point_inside for arrays of coordinates."""
+    if shape[0] == "circle":
+        return x * x + y * y <= shape[1] ** 2 + EPS
+    if shape[0] == "hex":
+        u, v = (np.abs(x), np.abs(y)) if shape[2] == "y" else (np.abs(y), np.abs(x))
+        return (u <= SQRT3 / 2 * shape[1] + EPS) & (u / SQRT3 + v <= shape[1] + EPS)
+    _, xlo, xhi, ylo, yhi = shape
+    return (xlo - EPS <= x) & (x <= xhi + EPS) & (ylo - EPS <= y) & (y <= yhi + EPS)
+
+
+def contains(outer, inner):
+    """True if inner lies entirely inside outer (outer is convex)."""
+    if inner[0] == "circle":
+        r = inner[1]
+        if outer[0] == "circle":
+            return r <= outer[1] + EPS
+        if outer[0] == "hex":
+            return r <= SQRT3 / 2 * outer[1] + EPS
+        return all(point_inside(outer, x, y) for x, y in ((-r, -r), (-r, r), (r, -r), (r, r)))
+    return all(point_inside(outer, x, y) for x, y in shape_vertices(inner))
+
+
+def convex_parts(halfspaces, tile=None):
+    """(smallest enclosing convex shape or None, [hole shapes]) for xy halfspaces."""
+    outers = [tile] if tile else []
+    holes = []
+    box = [-math.inf, math.inf, -math.inf, math.inf]
+    for info, positive in halfspaces:
+        stype, params = info["type"], info["params"]
+        if stype in ("XPlane", "YPlane"):
+            k = 0 if stype == "XPlane" else 2
+            value = float(params[0])
+            if positive:
+                box[k] = max(box[k], value)
+            else:
+                box[k + 1] = min(box[k + 1], value)
+        else:
+            shape = ("circle", float(params[0])) if stype == "ZCylinder" else ("hex", float(params[0]), params[1])
+            (holes if positive else outers).append(shape)
+    if box != [-math.inf, math.inf, -math.inf, math.inf]:
+        outers.append(("box", *box))
+
+    outer = next((o for o in outers if all(contains(other, o) for other in outers)), None)
+    if outer is not None and not math.isfinite(shape_area(outer)):
+        outer = None
+    return outer, holes
+
+
+def cross_section_area(halfspaces, tile=None):
+    """Area of tile ∩ halfspaces in the xy plane, or None if it has no simple closed form.
+
+    halfspaces are (surfaces.json entry, positive) pairs without z-planes.
+    """
+    outer, holes = convex_parts(halfspaces, tile)
+    if outer is None:
+        return None
+    if not holes:
+        return shape_area(outer)
+    hole = next((h for h in holes if all(contains(h, other) for other in holes)), None)
+    if hole is None or not contains(outer, hole):
+        return None
+    return shape_area(outer) - shape_area(hole)
+
+
+def split_z(halfspaces):
+    """Separate z-planes: returns (xy halfspaces, zlo, zhi)."""
+    xy, zlo, zhi = [], -math.inf, math.inf
+    for info, positive in halfspaces:
+        if info["type"] == "ZPlane":
+            z0 = float(info["params"][0])
+            if positive:
+                zlo = max(zlo, z0)
+            else:
+                zhi = min(zhi, z0)
+        else:
+            xy.append((info, positive))
+    return xy, zlo, zhi
+
+
+# ---------------- Analytic volumes ----------------
+def analytic_cell_volumes(model):
+    """Total volume of every leaf cell over all its instances; NaN where no closed form applies."""
+    volumes = np.zeros(len(model.cells))
+    exact = np.ones(len(model.cells), dtype=bool)
+
+    def mark_inexact(u, seen=None):
+        seen = seen if seen is not None else set()
+        if u in seen:
+            return
+        seen.add(u)
+        for ci in model.universe_cells[u]:
+            exact[ci] = False
+            kind, target = model.fills[ci]
+            if kind == "universe":
+                mark_inexact(target, seen)
+            elif kind == "lattice":
+                for child in set(target.table.ravel().tolist()) | {target.outer}:
+                    if child >= 0:
+                        mark_inexact(child, seen)
+
+    def walk(u, frame, zcons, count, tile):
+        for ci in model.universe_cells[u]:
+            kind, target = model.fills[ci]
+            halfspaces = model.regions[ci].halfspaces()
+            if halfspaces is None:
+                exact[ci] = False
+                if kind == "universe":
+                    mark_inexact(target)
+                elif kind == "lattice":
+                    for child in set(target.table.ravel().tolist()) | {target.outer}:
+                        if child >= 0:
+                            mark_inexact(child)
+                continue
+            xy, zlo, zhi = split_z([(model.surfaces[name], positive) for name, positive in halfspaces])
+            xy = frame + xy
+            zlo, zhi = max(zlo, zcons[0]), min(zhi, zcons[1])
+
+            if kind == "material":
+                area = cross_section_area(xy, tile)
+                if area is None or not (math.isfinite(zlo) and math.isfinite(zhi)):
+                    exact[ci] = False
+                else:
+                    volumes[ci] += count * area * max(zhi - zlo, 0.0)
+            elif kind == "universe":
+                walk(target, xy, (zlo, zhi), count, tile)
+            else:
+                walk_lattice(target, xy, (zlo, zhi), count, tile)
+
+    def walk_lattice(lat, container, zcons, count, tile):
+        # Tiles must sit wholly inside the containing cell (or parent tile) and
+        # there must be no outer universe, otherwise instance counts are not
+        # known exactly. Axial (3-D) lattices are left to sampling.
+        tile_shape = lat.tile_shape()
+        outer, holes = convex_parts(container, tile)
+        fits = outer is not None and not holes and lat.outer < 0 and not lat.axial
+        if fits:
+            centers = lat.tile_centers()
+            for vx, vy in shape_vertices(tile_shape):
+                if not points_inside(outer, centers[:, 0] + vx, centers[:, 1] + vy).all():
+                    fits = False
+                    break
+        children, counts = np.unique(lat.table[lat.table >= 0], return_counts=True)
+        if not fits:
+            for child in set(children.tolist()) | {lat.outer}:
+                if child >= 0:
+                    mark_inexact(child)
+            return
+        for child, n in zip(children.tolist(), counts.tolist()):
+            walk(child, [], zcons, count * n, tile_shape)
+
+    if model.root is None:
+        raise ValueError(model.root_error)
+    walk(model.root, [], (-math.inf, math.inf), 1, None)
+    return np.where(exact, volumes, np.nan)
+
+
+# ---------------- Stochastic volumes ----------------
+def _init_worker(project_data, root):
+    global _worker_model
+    _worker_model = GeometryModel(project_data, root=root)
+
+
+def count_chunk(seed, n, lower_left, upper_right):
+    """Hits per leaf cell for n uniform points (index 0 counts points in no cell)."""
+    rng = np.random.default_rng(seed)
+    cells = _worker_model.classify(rng.uniform(lower_left, upper_right, size=(n, 3)))
+    return np.bincount(cells + 1, minlength=len(_worker_model.cells) + 1)
+
+
+def estimate_volumes(project_data, target_rel_error=1e-3, max_samples=50_000_000, seed=None, root=None,
+                     workers=None, cancel=None, progress=None):
+    """Volumes of every material (cm3) with one-sigma uncertainties.
+
+    Returns {"materials": {name: {"volume", "std", "method"}}, "cells": {...},
+    "samples": points sampled, "seed": entropy used}.
+    """
+    model = GeometryModel(project_data, root=root)
+    cell_volumes = analytic_cell_volumes(model)
+    cell_std = np.zeros(len(model.cells))
+    need = np.isnan(cell_volumes) & (model.cell_material >= 0)
+    seq = np.random.SeedSequence(seed)
+    samples, box_volume = 0, 0.0
+    hits = np.zeros(len(model.cells) + 1, dtype=np.int64)
+
+    if need.any():
+        lower_left, upper_right = bounding_box(model.surfaces)
+        box_volume = float(np.prod(upper_right - lower_left))
+        workers = workers or multiprocessing.cpu_count()
+        stochastic_materials = np.unique(model.cell_material[need])
+        mat_of_cell = model.cell_material
+
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(project_data, root))
+        try:
+            while samples < max_samples:
+                n_chunks = max(1, min(workers * 2, (max_samples - samples) // CHUNK))
+                futures = [pool.submit(count_chunk, s, CHUNK, lower_left, upper_right) for s in seq.spawn(n_chunks)]
+                for future in futures:
+                    hits += future.result()
+                samples += n_chunks * CHUNK
+
+                # Relative error of the sampled part of each material that needs sampling
+                fractions = hits[1:] / samples
+                worst = 0.0
+                for m in stochastic_materials:
+                    cells = need & (mat_of_cell == m)
+                    f = fractions[cells].sum()
+                    exact_part = np.nansum(np.where(mat_of_cell == m, cell_volumes, 0.0))
+                    total = f * box_volume + exact_part
+                    rel = box_volume * math.sqrt(f * (1 - f) / samples) / total if f > 0 else math.inf
+                    worst = max(worst, rel)
+                if progress:
+                    progress(samples, worst)
+                if worst <= target_rel_error or (cancel is not None and cancel.is_set()):
+                    break
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        f = hits[1:] / samples
+        cell_volumes = np.where(need, f * box_volume, cell_volumes)
+        cell_std = np.where(need, box_volume * np.sqrt(f * (1 - f) / samples), 0.0)
+
+    report = {"samples": samples, "seed": seq.entropy, "cells": {}, "materials": {}}
+    for ci, name in enumerate(model.cell_names):
+        if model.cell_material[ci] >= 0:
+            report["cells"][name] = {"volume": float(cell_volumes[ci]), "std": float(cell_std[ci]),
+                                     "method": "stochastic" if need[ci] else "analytic"}
+    for m, name in enumerate(model.material_names):
+        cells = model.cell_material == m
+        if not cells.any():
+            continue
+        methods = {"stochastic" if need[ci] else "analytic" for ci in np.nonzero(cells)[0]}
+        sampled = cells & need
+        fm = float((hits[1:][sampled] / samples).sum()) if sampled.any() else 0.0
+        std = box_volume * math.sqrt(fm * (1 - fm) / samples) if sampled.any() else 0.0
+        report["materials"][name] = {"volume": float(np.nansum(cell_volumes[cells])), "std": std,
+                                     "method": methods.pop() if len(methods) == 1 else "mixed"}
+    return report
+
+
+def apply_volumes(project, report):
+    """Store the material volumes in materials.json (the 'volume' key, cm3)."""
+    for name, result in report["materials"].items():
+        if name in project.materials:
+            project.materials[name]["volume"] = result["volume"]
+    project.mark_dirty("materials")
+    project.save(["materials"])
+
+
+def format_report(report):
+    lines = [f"{'Material':<20}{'Volume (cm3)':>16}{'± 1σ':>14}  Method"]
+    for name, r in report["materials"].items():
+        lines.append(f"{name:<20}{r['volume']:>16.6g}{r['std']:>14.3g}  {r['method']}")
+    if report["samples"]:
+        lines.append(f"\n{report['samples']:,} points sampled (seed {report['seed']})")
+    return "\n".join(lines)
@@ -0,0 +1,109 @@
+import threading
+import tkinter as tk
+from tkinter import messagebox
+
+from .project import get_project
+from .volume_calc import estimate_volumes, apply_volumes, format_report
+
+POLL_MS = 100
+
+
+class VolumeWindow:
+    def __init__(self, master):
+        self.master = tk.Toplevel(master)
+        self.master.title("Material Volumes")
+        self.master.geometry("600x480")
+
+        self.project = get_project()
+        self.thread = None
+        self.cancel = threading.Event()
+        self.result = None
+        self.progress = None
+
+        form = tk.Frame(self.master)
+        form.pack(pady=8)
+        tk.Label(form, text="Target relative error").grid(row=0, column=0, sticky="e", padx=4, pady=2)
+        self.target_entry = tk.Entry(form, width=14)
+        self.target_entry.insert(0, "0.001")
+        self.target_entry.grid(row=0, column=1, sticky="w")
+
+        tk.Label(form, text="Max samples").grid(row=1, column=0, sticky="e", padx=4, pady=2)
+        self.max_entry = tk.Entry(form, width=14)
+        self.max_entry.insert(0, "50000000")
+        self.max_entry.grid(row=1, column=1, sticky="w")
+
+        tk.Label(form, text="Seed (blank = random)").grid(row=2, column=0, sticky="e", padx=4, pady=2)
+        self.seed_entry = tk.Entry(form, width=14)
+        self.seed_entry.grid(row=2, column=1, sticky="w")
+
+        tk.Label(
+            self.master,
+            text="Exact volumes are used where cells are simple cylinders, hexagons or boxes;\n"
+                 "other cells are sampled. Results are stored as material volumes in materials.json.",
+            font=("Arial", 9),
+            fg="gray"
+        ).pack(pady=2)
+
+        btn_frame = tk.Frame(self.master)
+        btn_frame.pack(pady=4)
+        self.run_button = tk.Button(btn_frame, text="Calculate", command=self.start)
+        self.run_button.grid(row=0, column=0, padx=5)
+        tk.Button(btn_frame, text="Stop", command=self.cancel.set).grid(row=0, column=1, padx=5)
+
+        self.status = tk.Label(self.master, text="")
+        self.status.pack()
+        self.report_text = tk.Text(self.master, height=16, width=76, wrap="none", font=("Courier", 10))
+        self.report_text.pack(fill="both", expand=True, padx=6, pady=6)
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        try:
+            target = float(self.target_entry.get())
+            max_samples = int(self.max_entry.get())
+            seed = int(self.seed_entry.get()) if self.seed_entry.get().strip() else None
+        except ValueError:
+            messagebox.showerror("Error", "Invalid target, sample count or seed.")
+            return
+
+        self.cancel.clear()
+        self.result = None
+        self.progress = None
+        self.run_button.config(state="disabled")
+        self.report_text.delete("1.0", tk.END)
+        data = self.project.as_dict()
+        root = self.project.geometry.get("root_universe")
+        self.thread = threading.Thread(target=self.run, args=(data, target, max_samples, seed, root), daemon=True)
+        self.thread.start()
+        self.master.after(POLL_MS, self.poll)
+
+    def run(self, data, target, max_samples, seed, root):
+        try:
+            self.result = estimate_volumes(data, target_rel_error=target, max_samples=max_samples, seed=seed,
+                                           root=root, cancel=self.cancel, progress=self.set_progress)
+        except Exception as e:
+            self.result = e
+
+    def set_progress(self, samples, worst):
+        self.progress = (samples, worst)
+
+    def poll(self):
+        if not self.master.winfo_exists():
+            return
+        if self.thread.is_alive():
+            if self.progress:
+                samples, worst = self.progress
+                self.status.config(text=f"{samples:,} points sampled, worst relative error {worst:.2e}")
+            else:
+                self.status.config(text="Calculating...")
+            self.master.after(POLL_MS, self.poll)
+            return
+
+        self.run_button.config(state="normal")
+        if isinstance(self.result, Exception):
+            self.status.config(text="Volume calculation failed", fg="red")
+            messagebox.showerror("Error", f"Volume calculation failed:\n{self.result}")
+            return
+        apply_volumes(self.project, self.result)
+        self.status.config(text="Volumes saved to materials.json", fg="green")
+        self.report_text.insert(tk.END, format_report(self.result))
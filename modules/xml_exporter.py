@@ -0,0 +1,355 @@
+"""Build OpenMC XML inputs from the output/*.json project files.
+
+Nothing here imports tkinter, so the same code serves the GUI builders and
+the headless ``python -m modules build`` command.
+"""
+import os
+import numpy as np
+import openmc
+
+from .project import Project, find_root_universe
+from .material_store import ensure_material_files
+from .build_cache import BuildManifest, digest, file_digest
+from .region import compile_region
+from .lattice_model import RectLatticeMap, lattice_rings, rect_pitch, rect_lower_left
+from .tally_spec import tally_filters, resolve_ids, check_mesh, energy_edges
+from .spectrum import prepare as prepare_spectrum, spectra_dir
+from .source_preview import source_box, DEFAULT_CYLINDER_HEIGHT
+
+
+def load_project(project_dir="output"):
+    """Read every project JSON file into one dict keyed by PROJECT_FILES."""
+    return Project(project_dir).as_dict()
+
+
+# ---------------- Materials ----------------
+def build_material(name, data, material_id=None, materials_by_name=None):
+    """Create one openmc.Material from its materials.json record."""
+    if data.get("is_mix") and data.get("mix"):
+        mix = data["mix"]
+        parts = [materials_by_name[m] for m in mix["materials"]]
+        mat = openmc.Material.mix_materials(parts, mix["fractions"], "vo", name=name)
+    else:
+        mat = openmc.Material(name=name)
+        mat.set_density("g/cm3", data["density"])
+        for entry in data.get("components") or []:
+            if entry["type"] == "nuclide":
+                mat.add_nuclide(entry["name"], entry["amount"])
+            elif entry.get("enrichment") is not None:
+                mat.add_element(entry["name"], entry["amount"], enrichment=entry["enrichment"])
+            else:
+                mat.add_element(entry["name"], entry["amount"])
+        if data.get("sab"):
+            mat.add_s_alpha_beta(data["sab"])
+
+    if material_id is not None:
+        mat.id = material_id
+    if data.get("temperature") is not None:
+        mat.temperature = data["temperature"]
+    mat.depletable = bool(data.get("depletable"))
+    if data.get("volume"):
+        mat.volume = data["volume"]
+    return mat
+
+
+def build_materials(materials_data):
+    """Return (openmc.Materials, {name: Material}); IDs follow materials.json order."""
+    by_name = {}
+    for i, (name, data) in enumerate(materials_data.items(), start=1):
+        by_name[name] = build_material(name, data, material_id=i, materials_by_name=by_name)
+    return openmc.Materials(by_name.values()), by_name
+
+
+# ---------------- Geometry ----------------
+def build_surface(name, info):
+    stype, sid, params = info["type"], info.get("id"), info["params"]
+    kwargs = {"name": name}
+    if info.get("boundary_type"):
+        kwargs["boundary_type"] = info["boundary_type"]
+
+    if stype == "HexagonalPrism":
+        kwargs.pop("name")
+        return openmc.model.HexagonalPrism(edge_length=float(params[0]), orientation=params[1], **kwargs)
+    if sid:
+        kwargs["surface_id"] = int(sid)
+    if stype == "XPlane":
+        return openmc.XPlane(x0=float(params[0]), **kwargs)
+    if stype == "YPlane":
+        return openmc.YPlane(y0=float(params[0]), **kwargs)
+    if stype == "ZPlane":
+        return openmc.ZPlane(z0=float(params[0]), **kwargs)
+    if stype == "ZCylinder":
+        return openmc.ZCylinder(r=float(params[0]), **kwargs)
+    raise ValueError(f"Unsupported surface type '{stype}' for surface '{name}'")
+
+
+def build_surfaces(surfaces_data):
+    return {name: build_surface(name, info) for name, info in surfaces_data.items()}
+
+
+def build_region(expression, surfaces):
+    """Turn a region string such as '+s1 & -s2' into an openmc.Region."""
+    return compile_region(expression).to_openmc(surfaces)
+
+
+def build_geometry(project, materials_by_name, root=None):
+    """Assemble openmc.Geometry from surfaces, cells, universes and lattices."""
+    surfaces = build_surfaces(project["surfaces"])
+    cell_index = {c["name"]: i for i, c in enumerate(project["cells"])}
+    cells, universes, lattices = {}, {}, {}
+    in_progress = set()
+
+    def check_cycle(key):
+        if key in in_progress:
+            raise ValueError(f"Circular fill reference through {key[0]} '{key[1]}'")
+        in_progress.add(key)
+
+    def get_cell(name):
+        if name not in cells:
+            if name not in cell_index:
+                raise ValueError(f"Unknown cell '{name}'")
+            check_cycle(("cell", name))
+            data = project["cells"][cell_index[name]]
+            cell = openmc.Cell(cell_id=cell_index[name] + 1, name=name,
+                               region=build_region(data["region"], surfaces))
+            if "lattice" in data:
+                cell.fill = get_lattice(data["lattice"])
+            elif "universe" in data:
+                cell.fill = get_universe(data["universe"])
+            else:
+                cell.fill = materials_by_name[data["material"]]
+            cells[name] = cell
+            in_progress.discard(("cell", name))
+        return cells[name]
+
+    def get_universe(name):
+        if name not in universes:
+            if name not in project["universes"]:
+                raise ValueError(f"Unknown universe '{name}'")
+            check_cycle(("universe", name))
+            data = project["universes"][name]
+            uni = openmc.Universe(universe_id=data.get("id"), name=name)
+            for c in data.get("cells", []):
+                uni.add_cell(get_cell(c))
+            universes[name] = uni
+            in_progress.discard(("universe", name))
+        return universes[name]
+
+    def get_lattice(name):
+        if name not in lattices:
+            if name not in project["lattices"]:
+                raise ValueError(f"Unknown lattice '{name}'")
+            check_cycle(("lattice", name))
+            data = project["lattices"][name]
+            if data.get("type") == "rect":
+                lat = openmc.RectLattice(name=name)
+                lat.pitch = rect_pitch(data)
+                lat.lower_left = rect_lower_left(data)
+                lattice = RectLatticeMap.from_record(data)
+                if (lattice.indices < 0).any():
+                    raise ValueError(f"Lattice '{name}' has positions with no universe")
+                palette = np.empty(len(lattice.palette), dtype=object)
+                palette[:] = [get_universe(u) for u in lattice.palette]
+                nz, ny, nx = lattice.shape
+                lat.universes = palette[lattice.indices.reshape((ny, nx) if nz == 1 else (nz, ny, nx))]
+            else:
+                lat = openmc.HexLattice(name=name)
+                lat.center = (0., 0.)
+                lat.pitch = tuple(float(p) for p in str(data["pitch"]).split(","))
+                lat.orientation = data["orientation"]
+                lat.universes = [[get_universe(u) for u in ring] for ring in lattice_rings(data)]
+            if data.get("outer"):
+                lat.outer = get_universe(data["outer"])
+            lattices[name] = lat
+            in_progress.discard(("lattice", name))
+        return lattices[name]
+
+    if project["universes"]:
+        root = root or project["geometry"].get("root_universe") or find_root_universe(project)
+        return openmc.Geometry(get_universe(root))
+
+    # No universes defined: every cell belongs to the root universe
+    return openmc.Geometry([get_cell(c["name"]) for c in project["cells"]])
+
+
+# ---------------- Settings ----------------
+def source_records(settings_data):
+    """Source records of settings.json: the "sources" list, or the single "source" of older files."""
+    return settings_data.get("sources") or [settings_data["source"]]
+
+
+def build_source(src_data, project_dir="output"):
+    """Create an IndependentSource (or a FileSource) from one source record of settings.json."""
+    strength = float(src_data.get("strength") or 1.0)
+    if src_data["type"] == "File":
+        # source bank of an earlier run: source.h5, surface_source.h5 or a statepoint
+        if not src_data.get("path"):
+            raise ValueError("A file source needs the path of a source or statepoint file")
+        return openmc.FileSource(os.path.abspath(src_data["path"]), strength=strength)
+    pos = src_data["position"]
+    radius = float(src_data.get("radius") or 1.0)
+    src_type = src_data["type"]
+
+    if src_type == "Point":
+        space = openmc.stats.Point(pos)
+    elif src_type == "Spherical":
+        # uniform in the ball: r^2 density, isotropic direction
+        space = openmc.stats.SphericalIndependent(
+            r=openmc.stats.PowerLaw(0.0, radius, 2), cos_theta=openmc.stats.Uniform(-1.0, 1.0),
+            phi=openmc.stats.Uniform(0.0, 2 * np.pi), origin=pos)
+    elif src_type == "Cylindrical":
+        # uniform in a finite z-cylinder centred on the position
+        height = float(src_data.get("height") or DEFAULT_CYLINDER_HEIGHT)
+        space = openmc.stats.CylindricalIndependent(
+            r=openmc.stats.PowerLaw(0.0, radius, 1), phi=openmc.stats.Uniform(0.0, 2 * np.pi),
+            z=openmc.stats.Uniform(-height / 2, height / 2), origin=pos)
+    else:
+        lower_left, upper_right = source_box(src_data)
+        space = openmc.stats.Box(lower_left=lower_left, upper_right=upper_right)
+
+    # OpenMC rejects and resamples sites outside fissionable material
+    kwargs = {"strength": strength}
+    if src_data.get("only_fissionable"):
+        kwargs["constraints"] = {"fissionable": True}
+
+    energy = src_data.get("energy") or {}
+    dist, param = energy.get("dist", "OpenMC Default"), energy.get("param")
+    if dist == "Monoenergetic":
+        kwargs["energy"] = openmc.stats.Discrete([float(param)], [1.0])
+    elif dist == "Watt Spectrum":
+        a, b = [float(x) for x in param.split(",")]
+        kwargs["energy"] = openmc.stats.Watt(a, b)
+    elif dist == "Maxwell Spectrum":
+        kwargs["energy"] = openmc.stats.Maxwell(float(param))
+    elif dist == "Tabular":
+        # parsed once and cached as .npy; see spectrum.py
+        x, p, kind, _ = prepare_spectrum(energy, spectra_dir(project_dir))
+        if kind == "discrete":
+            kwargs["energy"] = openmc.stats.Discrete(x.tolist(), p.tolist())
+        else:
+            kwargs["energy"] = openmc.stats.Tabular(x, p, interpolation=kind)
+    # OpenMC default: do not pass energy
+    return openmc.IndependentSource(space=space, **kwargs)
+
+
+def build_settings(settings_data, project_dir="output"):
+    s = openmc.Settings()
+    s.run_mode = settings_data["run_mode"].lower().replace(" ", "_")
+    s.particles = int(settings_data["particles"])
+    s.batches = int(settings_data["batches"])
+    s.inactive = int(settings_data.get("inactive") or 0)
+    if settings_data.get("threads"):
+        s.threads = int(settings_data["threads"])
+    if settings_data.get("seed"):
+        s.seed = int(settings_data["seed"])
+    s.source = [build_source(record, project_dir) for record in source_records(settings_data)]
+    outputs = settings_data.get("outputs") or {}
+    s.output = {"summary": bool(outputs.get("summary", True))}
+    if outputs.get("source_bank", outputs.get("restart")):
+        # source bank in its own source.<batch>.h5, for file sources of later runs
+        # ("restart" is the key older settings.json files used)
+        s.sourcepoint = {"batches": [s.batches], "separate": True, "write": True}
+    mesh = settings_data.get("entropy_mesh")
+    if mesh:
+        s.entropy_mesh = openmc.RegularMesh()
+        s.entropy_mesh.lower_left = mesh["lower_left"]
+        s.entropy_mesh.upper_right = mesh["upper_right"]
+        s.entropy_mesh.dimension = mesh["dimension"]
+    return s
+
+
+# ---------------- Tallies ----------------
+def build_tally_filter(spec, project, name, root=None):
+    """openmc.Filter for one filter spec of tallies.json (see tally_spec)."""
+    if spec["type"] == "Cell":
+        return openmc.CellFilter(resolve_ids(spec, project, root))
+    if spec["type"] == "Material":
+        return openmc.MaterialFilter(resolve_ids(spec, project))
+    if spec["type"] == "Mesh":
+        lower_left, upper_right, dimension = check_mesh(spec)
+        mesh = openmc.RegularMesh(name=name)
+        mesh.lower_left = lower_left
+        mesh.upper_right = upper_right
+        mesh.dimension = dimension
+        return openmc.MeshFilter(mesh)
+    if spec["type"] == "Energy":
+        return openmc.EnergyFilter(energy_edges(spec))
+    raise ValueError(f"Unknown tally filter type '{spec['type']}'")
+
+
+def build_tallies(tallies_data, project, root=None):
+    """openmc.Tallies with cell/material names resolved against the project dict."""
+    tallies = openmc.Tallies()
+
+    for t in tallies_data:
+        tally = openmc.Tally(name=t["name"])
+        tally.filters = [build_tally_filter(spec, project, t["name"], root) for spec in tally_filters(t)]
+        tally.scores = t.get("scores", [])
+        if t.get("nuclides"):
+            tally.nuclides = t["nuclides"]
+
+        tallies.append(tally)
+
+    return tallies
+
+
+# ---------------- Whole project ----------------
+def geometry_key(project, root=None):
+    """Digest of everything geometry.xml is built from (materials only by name and ID)."""
+    return digest(*(project[k] for k in ("surfaces", "cells", "universes", "lattices", "geometry")),
+                  list(project["materials"]), root)
+
+
+def settings_key(settings_data):
+    """Digest of the settings and the contents of every Tabular spectrum file they use."""
+    spectra = [file_digest(record["energy"]["param"]) for record in source_records(settings_data)
+               if (record.get("energy") or {}).get("dist") == "Tabular"]
+    return digest(settings_data, spectra)
+
+
+def tallies_key(tallies_data, project, root=None):
+    """Digest of the tallies and the cell/material names their filters resolve to."""
+    # fills decide which cells are in the geometry, and so in "all cells" filters
+    fills = [{c["name"]: c.get("universe") or c.get("lattice") for c in project["cells"]},
+             project["universes"], project["lattices"], project["geometry"], root]
+    return digest(tallies_data, [c["name"] for c in project["cells"]], list(project["materials"]), fills)
+
+
+def build_project(project_dir="output", out_dir=None, root=None, force=False):
+    """Write materials, geometry, settings and (optional) tallies XML for a project.
+
+    Files whose inputs did not change since the last build are left alone
+    (see build_cache); force rebuilds them all. Returns the files written.
+    """
+    out_dir = out_dir or project_dir
+    os.makedirs(out_dir, exist_ok=True)
+    project = load_project(project_dir)
+    if not project["settings"]:
+        raise ValueError(f"No settings.json in {project_dir}; save the simulation settings first")
+
+    written = []
+    manifest = BuildManifest(out_dir)
+    if force:
+        manifest.entries = {}
+    # materials.xml is streamed from the material store; only changed materials are re-serialized
+    if ensure_material_files(project_dir, project["materials"], out_dir=out_dir):
+        written.append("materials.xml")
+
+    def write_geometry(path):
+        _, materials_by_name = build_materials(project["materials"])
+        build_geometry(project, materials_by_name, root=root).export_to_xml(path)
+
+    try:
+        if manifest.build("geometry.xml", geometry_key(project, root), write_geometry):
+            written.append("geometry.xml")
+        if manifest.build("settings.xml", settings_key(project["settings"]),
+                          lambda path: build_settings(project["settings"], project_dir).export_to_xml(path)):
+            written.append("settings.xml")
+        if project["tallies"] and manifest.build(
+                "tallies.xml", tallies_key(project["tallies"], project, root),
+                lambda path: build_tallies(project["tallies"], project, root).export_to_xml(path)):
+            written.append("tallies.xml")
+    finally:
+        manifest.save()
+
+    return [os.path.join(out_dir, name) for name in written]